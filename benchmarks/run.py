@@ -0,0 +1,103 @@
+"""
+Deterministic benchmarks of google_trends_api against the offline FakeTrends server.
+Every scenario reports the number of requests, wall-clock seconds and peak memory (tracemalloc).
+
+python -m benchmarks.run
+python -m benchmarks.run hourly_1y hourly_5y --latency 0.02 --rate-limit-every 50 --json bench.json
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from loguru import logger
+
+from google_trends_api import hourly_data, hourly_data_many, daily_data
+from google_trends_api.testing import FakeTrends
+
+START = datetime(2017, 1, 1)
+UTC = timezone.utc
+KEYWORDS = ['bitcoin', 'nft', 'eth', 'doge', 'sol', 'ada', 'xrp', 'dot', 'ltc', 'bnb']
+
+SCENARIOS = {
+    'hourly_1w': lambda session: hourly_data('bitcoin', START, START + timedelta(days=7), UTC, session=session),
+    'hourly_1y': lambda session: hourly_data('bitcoin', START, START + timedelta(days=365), UTC, session=session),
+    'hourly_1y_packed': lambda session: hourly_data(
+        'bitcoin', START, START + timedelta(days=365), UTC, pack=5, session=session,
+    ),
+    'hourly_5y': lambda session: hourly_data('bitcoin', START, START + timedelta(days=5 * 365), UTC, session=session),
+    'hourly_5y_concurrent': lambda session: hourly_data(
+        'bitcoin', START, START + timedelta(days=5 * 365), UTC, max_concurrency=8, session=session,
+    ),
+    'hourly_5y_series': lambda session: hourly_data(
+        'bitcoin', START, START + timedelta(days=5 * 365), UTC, as_series=True, session=session,
+    ),
+    'many_10_keywords_90d': lambda session: hourly_data_many(
+        KEYWORDS, START, START + timedelta(days=90), UTC, session=session,
+    ),
+    'daily_5y': lambda session: daily_data('bitcoin', START, START + timedelta(days=5 * 365), UTC, session=session),
+}
+
+
+async def _run(name: str, fake: FakeTrends):
+    async with fake.session() as session:
+        return await SCENARIOS[name](session)
+
+
+async def run_scenario(name: str, *, latency: float = 0, rate_limit_every: int = 0) -> dict:
+    """
+    Run a scenario twice against a fresh fake: once timed, once traced by tracemalloc, which slows it down.
+
+    @return: {'scenario', 'requests', 'explore_requests', 'wall_s', 'peak_kib', 'points'}
+    """
+    fake = FakeTrends(latency=latency, rate_limit_every=rate_limit_every)
+    start = time.perf_counter()
+    result = await _run(name, fake)
+    wall = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        await _run(name, FakeTrends(latency=latency, rate_limit_every=rate_limit_every))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'scenario': name,
+        'requests': len(fake.requests),
+        'explore_requests': fake.count('/trends/api/explore'),
+        'wall_s': round(wall, 3),
+        'peak_kib': round(peak / 1024),
+        'points': sum(len(v) for v in result.values()) if isinstance(result, dict) else len(result),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scenarios', nargs='*', choices=[[]] + list(SCENARIOS), help='Defaults to all of them')
+    parser.add_argument('--latency', type=float, default=0, help='Seconds every fake response is delayed by')
+    parser.add_argument('--rate-limit-every', type=int, default=0, help='Answer every n-th explore request by 429')
+    parser.add_argument('--json', help='Also write results to this file')
+    args = parser.parse_args()
+
+    # Rate limit warnings would flood the report
+    logger.disable('google_trends_api')
+    results = []
+    print(f"{'scenario':<24}{'requests':>10}{'explore':>10}{'wall_s':>10}{'peak_kib':>10}{'points':>10}")
+    for name in args.scenarios or SCENARIOS:
+        r = asyncio.run(run_scenario(name, latency=args.latency, rate_limit_every=args.rate_limit_every))
+        results.append(r)
+        print(
+            f"{r['scenario']:<24}{r['requests']:>10}{r['explore_requests']:>10}"
+            f"{r['wall_s']:>10}{r['peak_kib']:>10}{r['points']:>10}"
+        )
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
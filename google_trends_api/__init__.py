@@ -1,14 +1,25 @@
-import os
+import asyncio
+import collections
+import itertools
 from datetime import datetime, timezone, timedelta
-from typing import List
+from typing import List, Dict
 
 import loguru
 from loguru import logger
-from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type, stop_never, wait_incrementing, \
+from tenacity import retry, stop_after_attempt, wait_none, retry_if_exception_type, stop_never, wait_incrementing, \
     stop_after_delay
 
 from google_trends_api import constants, utils, _api
-from google_trends_api._api import RateLimit
+from google_trends_api._api import RateLimit, TokenExpired
+from google_trends_api.cache import ResponseCache, MemoryCache, SQLiteCache, TokenCache, window_key
+from google_trends_api.cookies import CookiePool
+from google_trends_api.parsing import Timeline
+from google_trends_api.hooks import Hooks, StatsHooks, PrometheusHooks, OpenTelemetryHooks, CacheEvent, RetryEvent
+from google_trends_api.proxies import Proxy, ProxyPool
+from google_trends_api.ratelimit import RateLimiter, default_rate_limiter
+from google_trends_api.series import TrendSeries, TrendMatrix, anchor
+from google_trends_api.session import TrendsSession, session_scope
+from google_trends_api.stitching import Stitcher, WindowScale
 from google_trends_api.utils import datetime_range, alist
 
 
@@ -20,6 +31,7 @@ async def _seven_days_hourly_data(
         cookies: dict = None,
         geo: str = "",
         host_language: str = "en-US",
+        session: TrendsSession = None,
 ):
     """
     Get 7 days google trends data for a keyword. [start_datetime, start_datetime + 7 days)
@@ -28,40 +40,182 @@ async def _seven_days_hourly_data(
     :param keyword: The keyword to get data for.
     :param start_datetime: The start datetime to get data for.
     :param tzinfo: The timezone to get data for. Defaults to local timezone.
+    :param session: Session used to send requests. A temporary session is used if not specified.
 
     @return: yield (timestamp, value)
     """
-    cookies = cookies or await _api.get_cookies()
-    tz_offset = -int(tz.utcoffset(None).total_seconds() / 60)
-    end_dt = (start_dt + timedelta(days=7))
+    async for timestamp, values in _window_rows(
+            [keyword], start_dt, start_dt + timedelta(days=7), tz, constants.Frequency.HOURLY,
+            cookies=cookies, geo=geo, host_language=host_language, session=session,
+    ):
+        yield timestamp, values[0]
 
-    start_dt = start_dt + timedelta(minutes=tz_offset)
-    end_dt = end_dt + timedelta(minutes=tz_offset)
-    start_dt = start_dt.replace(tzinfo=tz)
-    end_dt = end_dt.replace(tzinfo=tz)
 
-    widgets = await _api.get_widgets(
-        keyword,
-        timezone_offset=tz_offset,
-        cookies=cookies,
-        custom_time_range=(start_dt, end_dt),
-        frequency=constants.Frequency.HOURLY,
-        geo=geo,
-        host_language=host_language,
-    )
+async def _window_rows(
+        keywords: List[str],
+        start_dt: datetime,
+        end_dt: datetime,
+        tz: timezone,
+        frequency: str,
+        *,
+        cookies: dict = None,
+        geo: str = "",
+        host_language: str = "en-US",
+        session: TrendsSession = None,
+):
+    """
+    Get google trends data of [start_dt, end_dt) in one request, comparing up to 5 keywords.
+    Values of all keywords share the same scale.
 
-    js = await _api.interest_over_time(
-        cookies=cookies,
-        widgets=widgets,
-        timezone_offset=tz_offset,
-        host_language=host_language,
+    :param frequency: constants.Frequency.HOURLY for windows up to 7 days,
+        constants.Frequency.DAILY for windows up to 270 days. Daily windows only use the date of start_dt and end_dt.
+
+    @return: yield (timestamp, [value of every keyword])
+    """
+    tz_offset = -int(tz.utcoffset(None).total_seconds() / 60)
+    (start_dt, end_dt), _, end_ts, closed_dt = _window_request(start_dt, end_dt, tz, frequency)
+
+    cache = session.cache if session is not None else None
+    cache_key = window_key(
+        keywords[0] if len(keywords) == 1 else keywords, geo, tz_offset, start_dt, end_dt, frequency, host_language,
     )
-    hourly_items = js['default']['timelineData']
+    js = None
+    if cache is not None:
+        js = cache.get(cache_key)
+        session.emit(CacheEvent(cache_key, js is not None))
+
+    async def _fetch():
+        async with session_scope(session) as _session:
+            widgets = await _api.get_widgets(
+                keywords,
+                timezone_offset=tz_offset,
+                cookies=cookies,
+                custom_time_range=(start_dt, end_dt),
+                frequency=frequency,
+                geo=geo,
+                host_language=host_language,
+                session=_session,
+            )
+
+            timeline = await _api.interest_over_time_timeline(
+                cookies=cookies,
+                widgets=widgets,
+                timezone_offset=tz_offset,
+                host_language=host_language,
+                session=_session,
+            )
+        if cache is not None:
+            cache.set(cache_key, timeline.to_json(), ttl=cache.ttl_for(closed_dt))
+        return timeline
+
+    if js is not None:
+        timeline = Timeline.from_json(js)
+    else:
+        # Concurrent callers of the same window share one request
+        timeline = await session.single_flight.do(cache_key, _fetch) if session is not None else await _fetch()
+
+    for row in timeline.rows(end_ts):
+        yield row
+
+
+def _window_request(start_dt: datetime, end_dt: datetime, tz: timezone, frequency: str) -> tuple:
+    """
+    Time range of the window [start_dt, end_dt) as sent to Google.
+
+    @return: ((start, end) of the custom time range, timestamp of the first point,
+        timestamp points are truncated at, datetime after which the window is closed)
+    """
+    tz_offset = -int(tz.utcoffset(None).total_seconds() / 60)
+
+    if frequency == constants.Frequency.HOURLY:
+        start_ts = int(start_dt.replace(tzinfo=tz).timestamp())
+        end_ts = int(end_dt.replace(tzinfo=tz).timestamp())
+        # Google reads hourly time range as UTC
+        start_dt = start_dt + timedelta(minutes=tz_offset)
+        end_dt = end_dt + timedelta(minutes=tz_offset)
+        start_dt = start_dt.replace(tzinfo=tz)
+        end_dt = end_dt.replace(tzinfo=tz)
+        closed_dt = end_dt - timedelta(minutes=tz_offset)
+    else:
+        # Both dates of a daily time range are included. Daily timestamps are midnight UTC of the date
+        start_ts = int(datetime(start_dt.year, start_dt.month, start_dt.day, tzinfo=timezone.utc).timestamp())
+        end_ts = int(datetime(end_dt.year, end_dt.month, end_dt.day, tzinfo=timezone.utc).timestamp())
+        closed_dt = end_dt.replace(tzinfo=tz)
+        end_dt = end_dt - timedelta(days=1)
+    return (start_dt, end_dt), start_ts, end_ts, closed_dt
+
+
+async def _packed_window_rows(
+        keyword: str,
+        start_dts: List[datetime],
+        window_size: timedelta,
+        tz: timezone,
+        frequency: str,
+        *,
+        cookies: dict = None,
+        geo: str = "",
+        host_language: str = "en-US",
+        session: TrendsSession = None,
+) -> List[list]:
+    """
+    Get google trends data of up to 5 windows [start_dt, start_dt + window_size) of a keyword in one request,
+    one comparisonItem per window. Windows are cached one by one, under the same keys as _window_rows,
+    and only the windows missing from the cache are requested.
 
-    for item in hourly_items:
-        timestamp = int(item['time'])
-        if item['hasData'][0] and datetime.fromtimestamp(timestamp, tz=tz) < (end_dt - timedelta(minutes=tz_offset)):
-            yield timestamp, item['value'][0]
+    @return: [[(timestamp, [value])] of every window], in the order of start_dts
+    """
+    tz_offset = -int(tz.utcoffset(None).total_seconds() / 60)
+    requests = [_window_request(dt, dt + window_size, tz, frequency) for dt in start_dts]
+    cache = session.cache if session is not None else None
+    cache_keys = [
+        window_key(keyword, geo, tz_offset, time_range[0], time_range[1], frequency, host_language)
+        for time_range, *_ in requests
+    ]
+
+    timelines = [None] * len(requests)
+    if cache is not None:
+        for i, cache_key in enumerate(cache_keys):
+            js = cache.get(cache_key)
+            session.emit(CacheEvent(cache_key, js is not None))
+            if js is not None:
+                timelines[i] = Timeline.from_json(js)
+
+    missing = [i for i, timeline in enumerate(timelines) if timeline is None]
+
+    async def _fetch():
+        async with session_scope(session) as _session:
+            widgets = await _api.get_widgets(
+                keyword,
+                timezone_offset=tz_offset,
+                cookies=cookies,
+                custom_time_ranges=[requests[i][0] for i in missing],
+                frequency=frequency,
+                geo=geo,
+                host_language=host_language,
+                session=_session,
+            )
+            fetched = await _api.interest_over_time_windows(
+                cookies=cookies,
+                widgets=widgets,
+                timezone_offset=tz_offset,
+                starts=[requests[i][1] for i in missing],
+                step=int(_WINDOWS[frequency][1].total_seconds()),
+                host_language=host_language,
+                session=_session,
+            )
+        if cache is not None:
+            for i, timeline in zip(missing, fetched):
+                cache.set(cache_keys[i], timeline.to_json(), ttl=cache.ttl_for(requests[i][3]))
+        return fetched
+
+    if missing:
+        # Concurrent callers of the same packed windows share one request
+        key = tuple(cache_keys[i] for i in missing)
+        fetched = await session.single_flight.do(key, _fetch) if session is not None else await _fetch()
+        for i, timeline in zip(missing, fetched):
+            timelines[i] = timeline
+
+    return [list(timeline.rows(end_ts)) for timeline, (_, _, end_ts, _) in zip(timelines, requests)]
 
 
 async def _hourly_data(
@@ -73,6 +227,7 @@ async def _hourly_data(
         cookies: dict = None,
         geo: str = "",
         host_language: str = "en-US",
+        session: TrendsSession = None,
 ) -> List[list]:
     """
     Get hourly google trends data for a keyword in every 7 day period. [start_datetime, end_datetime)
@@ -82,33 +237,35 @@ async def _hourly_data(
     :param start_datetime: The start datetime to get data for.
     :param end_datetime: The end datetime to get data for.
     :param tzinfo: The timezone to get data for. Defaults to local timezone.
+    :param session: Session used to send requests. A temporary session is used if not specified.
 
     @return: yield (timestamp, value)
     """
 
-    # Currently, the only way to get hourly data is requesting api with time range of 7 day every time
-    cookies = cookies or await _api.get_cookies()
-
     start_dt = start_dt.replace(tzinfo=tz)
     end_dt = end_dt.replace(tzinfo=tz)
     end_ts = int(end_dt.timestamp())
 
-    step = timedelta(days=7)
-    for dt in utils.datetime_range(start_dt, end_dt, step, can_overflow=True):
-        _7days_items = await alist(_seven_days_hourly_data(
-            keyword,
-            dt,
-            tz,
-            cookies=cookies,
-            geo=geo,
-            host_language=host_language,
-        ))
-        if _7days_items[-1][0] < end_ts:
-            yield _7days_items
-        else:
-            index = utils.find_index(_7days_items, lambda item: item[0] >= end_ts)
-            if index != 0:  # Avoid yield [], it's meaningless and looks foolish
-                yield _7days_items[:index]
+    async with session_scope(session) as session:
+        # Currently, the only way to get hourly data is requesting api with time range of 7 day every time
+
+        step = timedelta(days=7)
+        for dt in utils.datetime_range(start_dt, end_dt, step, can_overflow=True):
+            _7days_items = await alist(_seven_days_hourly_data(
+                keyword,
+                dt,
+                tz,
+                cookies=cookies,
+                geo=geo,
+                host_language=host_language,
+                session=session,
+            ))
+            if _7days_items[-1][0] < end_ts:
+                yield _7days_items
+            else:
+                index = utils.find_index(_7days_items, lambda item: item[0] >= end_ts)
+                if index != 0:  # Avoid yield [], it's meaningless and looks foolish
+                    yield _7days_items[:index]
 
 
 async def hourly_data(
@@ -123,6 +280,12 @@ async def hourly_data(
         retries: int = -1,
         timeout: int = 600,
         proxy: str = None,
+        max_concurrency: int = 1,
+        as_series: bool = False,
+        anchor_daily: bool = False,
+        stitcher: Stitcher = None,
+        pack: int = 1,
+        session: TrendsSession = None,
 ):
     """
     Get hourly google trends data for a keyword.
@@ -138,81 +301,1022 @@ async def hourly_data(
 
     :param start_dt: The start datetime to get data for. granularity is hourly. minutes, seconds and microseconds will be ignored.
     :param end_dt: The end datetime to get data for. granularity is hourly. minutes, seconds and microseconds will be ignored.
+    :param cookies: NID cookies sent with every request. Cookies of session.cookie_pool are used if not specified.
     :param retries: The number of retries to get data. -1 means infinite retries.
+    :param proxy: Proxy url of the session created by this call. Use TrendsSession(proxy_pool=...) for many proxies.
+    :param max_concurrency: Maximum number of 7 days windows fetched at the same time.
+        When greater than 1, all windows are planned up front and fetched concurrently,
+        otherwise every window starts at the last hour returned by the previous one.
+    :param as_series: Return a TrendSeries, storing points in arrays, instead of a list of tuples.
+    :param anchor_daily: Also fetch daily data of the range, and rescale every day of hourly data to it.
+        This fixes the drift accumulated by stitching many 7 days windows, for about one request pair per 270 days.
+    :param stitcher: Fits the ratio between consecutive windows, Stitcher() overlapping windows by 1 hour if not specified.
+        Stitcher(overlap=24) makes ratios robust to zero and small values, and reports the confidence of every window
+        in stitcher.reports.
+    :param pack: Number of 7 days windows fetched per request, up to 5, one comparisonItem per window.
+        pack=5 takes ~11 request pairs per year instead of ~53. Packed windows share the scale of the busiest one,
+        so quiet windows lose some resolution to rounding.
+    :param session: Session shared by all requests, so that connections are reused between 7 days windows.
+        A session is created and closed within this call if not specified.
     """
     start_dt = start_dt.replace(tzinfo=tz).replace(microsecond=0, second=0, minute=0)
     end_dt = min(datetime.now(tz=tz), end_dt.replace(tzinfo=tz)).replace(microsecond=0, second=0, minute=0)
-    cookies = cookies or await _api.get_cookies()
-    if proxy:
-        os.environ['ALL_PROXY'] = proxy
+    if proxy and session is not None:
+        raise ValueError('proxy must be configured on the session when session is given')
+
+    async with session_scope(session, proxy=proxy) as session:
+        series, = await _stitched_series(
+            [keyword], start_dt, end_dt, tz,
+            cookies=cookies, geo=geo, host_language=host_language,
+            retries=retries, timeout=timeout, max_concurrency=max_concurrency, session=session,
+            stitcher=stitcher, pack=pack,
+        )
+        if anchor_daily:
+            daily = await daily_data(
+                keyword, start_dt, end_dt + timedelta(days=1), tz,
+                cookies=cookies, geo=geo, host_language=host_language,
+                retries=retries, timeout=timeout, max_concurrency=max_concurrency, as_series=True, session=session,
+            )
+            # Daily timestamps are midnight UTC, while Google splits days in tz
+            utc_offset = int(tz.utcoffset(None).total_seconds())
+            series = anchor(series, TrendSeries((t - utc_offset for t in daily.timestamps), daily.values))
+
+    # Normalize to [0, 100]
+    series.normalize()
+    return series if as_series else series.to_list()
 
-    _SEVEN_DAYS = timedelta(days=7)
-    _ONE_HOUR = timedelta(hours=1)
 
+async def _stitched_series(
+        keywords: List[str],
+        start_dt: datetime,
+        end_dt: datetime,
+        tz: timezone,
+        **kwargs,
+) -> List[TrendSeries]:
+    """
+    Fetch and stitch every window of [start_dt, end_dt) for up to 5 keywords compared together.
+    kwargs are the same as _stitched_chunks.
+
+    @return: TrendSeries of every keyword, scaled to the first window but not normalized.
+    """
+    result_series = [TrendSeries() for _ in keywords]
+    async for chunk in _stitched_chunks(keywords, start_dt, end_dt, tz, **kwargs):
+        for series, chunk_series in zip(result_series, chunk):
+            series.extend(chunk_series)
+    return result_series
+
+
+_WINDOWS = {
+    # frequency: (window size, interval between points)
+    constants.Frequency.HOURLY: (timedelta(days=7), timedelta(hours=1)),
+    constants.Frequency.DAILY: (timedelta(days=270), timedelta(days=1)),
+}
+
+
+def _rate_limit_retry(retries: int, timeout: int, session: TrendsSession):
+    """
+    Tenacity decorator retrying a coroutine function on RateLimit, and on TokenExpired of cached widgets.
+    """
     from tenacity import _utils
 
     def after_log(retry_state):
         sec_format: str = "%0.3f"
-        wait_fixed_seconds = retry_state.retry_object.wait.wait_fixed
+        exception = retry_state.outcome.exception()
+        retry_after = getattr(exception, 'retry_after', None)
+        session.emit(RetryEvent(
+            _utils.get_callback_name(retry_state.fn), retry_state.attempt_number, retry_after,
+            retry_state.seconds_since_start,
+        ))
 
+        if isinstance(exception, TokenExpired):
+            logger.info(
+                f"Cached widget token has been rejected. Exploring again. {exception} "
+                f"fn={_utils.get_callback_name(retry_state.fn)}"
+            )
+            return
+        # With a proxy pool, the 429 slowed down the rate limiter of its proxy instead of session.rate_limiter
+        rate = f"rate={sec_format % session.rate_limiter.rate}/s " if session.proxy_pool is None else ""
         logger.warning(
-            f"Google Trends Rate limit has been hit. Retrying in {wait_fixed_seconds} seconds. "
+            f"Google Trends Rate limit has been hit. Retrying when rate limiter allows. "
+            f"retry_after={retry_after} {rate}"
             f"fn={_utils.get_callback_name(retry_state.fn)} "
             f"attempt_count={retry_state.attempt_number} "
             f"seconds_since_start={sec_format % retry_state.seconds_since_start}s"
         )
 
-    @retry(
-        retry=retry_if_exception_type(RateLimit),
+    return retry(
+        retry=retry_if_exception_type((RateLimit, TokenExpired)),
         stop=(stop_after_attempt(retries) if retries >= 0 else stop_never) | stop_after_delay(timeout),
-        wait=wait_fixed(10),
+        # session.rate_limiter has been slowed down by the 429 and delays the retry by itself
+        wait=wait_none(),
         after=after_log,
         reraise=True,
     )
-    async def _get_7days_hourly_data(_start_dt):
-        return await alist(_seven_days_hourly_data(
-            keyword=keyword,
-            start_dt=_start_dt,
-            tz=tz,
+
+
+async def _stitched_chunks(
+        keywords: List[str],
+        start_dt: datetime,
+        end_dt: datetime,
+        tz: timezone,
+        *,
+        frequency: str = constants.Frequency.HOURLY,
+        cookies: dict,
+        geo: str,
+        host_language: str,
+        retries: int,
+        timeout: int,
+        max_concurrency: int,
+        session: TrendsSession,
+        stitcher: Stitcher = None,
+        previous_group: list = None,
+        pack: int = 1,
+):
+    """
+    Fetch every window of [start_dt, end_dt) in order, for up to 5 keywords compared together.
+    Windows are 7 days long for hourly data and 270 days long for daily data,
+    and consecutive windows share stitcher.overlap points to fit their ratio on.
+    At most max_concurrency requests are fetched ahead of the one being yielded.
+
+    :param stitcher: Fits the ratio of every window, Stitcher() if not specified.
+    :param pack: Number of windows of a single keyword fetched per request, up to 5.
+    :param previous_group: [(timestamp, [value of every keyword])] previously stitched, ending at start_dt
+        (or up to stitcher.overlap points before it). The first window is scaled to it instead of being the reference scale.
+
+    @return: yield [TrendSeries of every keyword] of every window, scaled to the first window (or previous_group)
+        but not normalized.
+    """
+    stitcher = stitcher or Stitcher()
+    window_size, unit = _WINDOWS[frequency]
+    overlap = unit * stitcher.overlap
+    if overlap >= window_size:
+        raise ValueError(f'stitcher.overlap must be less than {window_size // unit} for {frequency} data')
+    if not 1 <= pack <= 5 or (pack > 1 and len(keywords) != 1):
+        raise ValueError('pack must be 1, or up to 5 for a single keyword')
+
+    @_rate_limit_retry(retries, timeout, session)
+    async def _get_windows(_start_dts):
+        if len(_start_dts) == 1:
+            return [await alist(_window_rows(
+                keywords=keywords,
+                start_dt=_start_dts[0],
+                end_dt=_start_dts[0] + window_size,
+                tz=tz,
+                frequency=frequency,
+                cookies=cookies,
+                geo=geo,
+                host_language=host_language,
+                session=session,
+            ))]
+        return await _packed_window_rows(
+            keywords[0], _start_dts, window_size, tz, frequency,
+            cookies=cookies, geo=geo, host_language=host_language, session=session,
+        )
+
+    async def _groups():
+        if max_concurrency > 1 or pack > 1:
+            # Every window starts `overlap` before the end of the previous one, so all of them are known up front
+            windows = iter(utils.plan_windows(start_dt, end_dt, window_size, overlap=overlap))
+            packs = iter(lambda: list(itertools.islice(windows, pack)), [])
+            pending = collections.deque(
+                asyncio.ensure_future(_get_windows(dts)) for dts in itertools.islice(packs, max_concurrency)
+            )
+            try:
+                while pending:
+                    current_groups = await pending.popleft()
+                    for dts in itertools.islice(packs, 1):
+                        pending.append(asyncio.ensure_future(_get_windows(dts)))
+                    for current_group in current_groups:
+                        yield current_group
+            finally:
+                for task in pending:
+                    task.cancel()
+        else:
+            current_dt = start_dt
+            while True:
+                current_group, = await _get_windows([current_dt])
+                yield current_group
+
+                last_dt = datetime.fromtimestamp(current_group[-1][0], tz=start_dt.tzinfo)
+                # The last point covers [last_dt, last_dt + unit). Round down end_dt to hour
+                if last_dt + unit >= end_dt.replace(microsecond=0, second=0, minute=0):
+                    break
+                current_dt = last_dt - (overlap - unit)
+
+    # ==================== Above is util ====================
+    stitched = _StitchedWindows(len(keywords), int(end_dt.timestamp()), stitcher, previous_group)
+    async for current_group in _groups():
+        chunk = stitched.add(current_group)
+        if len(chunk[0]):
+            yield chunk
+
+
+class _StitchedWindows:
+    """
+    Scale windows, added in order, to the first one (or to previous_group), dropping their overlapped points.
+    """
+
+    def __init__(self, width: int, end_ts: int, stitcher: Stitcher, previous_group: list = None):
+        """
+        :param width: Number of keywords of every window.
+        :param end_ts: Points at or after end_ts are dropped.
+        """
+        self.width = width
+        self.end_ts = end_ts
+        self.stitcher = stitcher
+        self.previous_group, self.previous_ratio = previous_group or [], 1.0
+        self.last_ts = self.previous_group[-1][0] if self.previous_group else None
+
+    def add(self, current_group: list) -> List[TrendSeries]:
+        """
+        :param current_group: [(timestamp, [value of every keyword])] of the next window.
+
+        @return: [TrendSeries of every keyword] of the points after the previous window, possibly empty.
+        """
+        ratio = self.stitcher.fit(self.previous_group, self.previous_ratio, current_group).ratio
+        # Overlapped points have been added with the previous window already
+        last_ts = self.last_ts
+        new_items = current_group if last_ts is None else [item for item in current_group if item[0] > last_ts]
+        self.previous_group, self.previous_ratio = current_group, ratio
+        self.last_ts = max(last_ts or 0, current_group[-1][0])
+
+        chunk = []
+        for i in range(self.width):
+            series = TrendSeries()
+            series.extend(((t, values[i]) for t, values in new_items), ratio)
+            series.truncate(self.end_ts)
+            chunk.append(series)
+        return chunk
+
+
+async def hourly_data_many(
+        keywords: List[str],
+        start_dt: datetime,
+        end_dt: datetime,
+        tz: timezone = None,
+        *,
+        reference: str = None,
+        cookies: dict = None,
+        geo: str = "",
+        host_language: str = "en-US",
+        retries: int = -1,
+        timeout: int = 600,
+        max_concurrency: int = 1,
+        as_series: bool = False,
+        stitcher: Stitcher = None,
+        session: TrendsSession = None,
+) -> Dict[str, List[tuple]]:
+    """
+    Get hourly google trends data for many keywords, comparing 5 keywords per request.
+    Every request contains the reference keyword, so values of all keywords are comparable.
+    All trends value are based on max value of all keywords between [start_dt, end_dt).
+
+    :param keywords: Keywords to get data for.
+    :param reference: Keyword included in every request to scale batches against each other.
+        Defaults to the first keyword. A popular keyword, never zero in the range, works best.
+    :param max_concurrency: Maximum number of 7 days windows of a batch fetched at the same time.
+    :param as_series: Return TrendSeries instead of lists of tuples.
+
+    Other params are the same as hourly_data.
+
+    @return: {keyword: [(timestamp, value)]}, or {keyword: TrendSeries} if as_series
+    """
+    keywords = list(dict.fromkeys(keywords))
+    reference = reference or keywords[0]
+    others = [k for k in keywords if k != reference]
+    batches = [[reference] + others[i:i + 4] for i in range(0, len(others), 4)] or [[reference]]
+
+    start_dt = start_dt.replace(tzinfo=tz).replace(microsecond=0, second=0, minute=0)
+    end_dt = min(datetime.now(tz=tz), end_dt.replace(tzinfo=tz)).replace(microsecond=0, second=0, minute=0)
+
+    async with session_scope(session) as session:
+        series = {}
+        reference_total = None
+        for batch in batches:
+            batch_series = await _stitched_series(
+                batch, start_dt, end_dt, tz,
+                cookies=cookies, geo=geo, host_language=host_language,
+                retries=retries, timeout=timeout, max_concurrency=max_concurrency, session=session,
+                stitcher=stitcher,
+            )
+            # Scale every batch so that its reference matches the reference of the first batch
+            total = sum(batch_series[0].values)
+            if not total and len(batches) > 1:
+                raise ValueError(
+                    f'Reference keyword {reference!r} has no volume between {start_dt} and {end_dt}, '
+                    f'batches can not be scaled against each other. Pass a popular keyword as reference'
+                )
+            reference_total = reference_total or total
+            for keyword, keyword_series in zip(batch, batch_series):
+                if total:
+                    keyword_series.scale(reference_total / total)
+                series[keyword] = keyword_series
+
+    # Normalize to [0, 100]
+    max_value = max(series[keyword].max() for keyword in keywords)
+    if max_value > 0:
+        for keyword in keywords:
+            series[keyword].normalize(max_value)
+    return {
+        keyword: series[keyword] if as_series else series[keyword].to_list()
+        for keyword in keywords
+    }
+
+
+async def hourly_data_ranges(
+        keyword: str,
+        ranges: List[tuple],
+        tz: timezone = None,
+        *,
+        cookies: dict = None,
+        geo: str = "",
+        host_language: str = "en-US",
+        retries: int = -1,
+        timeout: int = 600,
+        max_concurrency: int = 1,
+        as_series: bool = False,
+        stitcher: Stitcher = None,
+        session: TrendsSession = None,
+) -> list:
+    """
+    Get hourly google trends data of many ranges of a keyword, e.g. requested by several workers.
+    Overlapping and adjacent ranges are merged and fetched as one set of windows, then sliced back.
+    Every range is normalized to its own max value, like hourly_data.
+
+    :param ranges: [(start_dt, end_dt)], same as start_dt and end_dt of hourly_data.
+
+    Other params are the same as hourly_data.
+
+    @return: data of every range, in the order of ranges
+    """
+    ranges = [
+        (
+            start_dt.replace(tzinfo=tz).replace(microsecond=0, second=0, minute=0),
+            min(datetime.now(tz=tz), end_dt.replace(tzinfo=tz)).replace(microsecond=0, second=0, minute=0),
+        )
+        for start_dt, end_dt in ranges
+    ]
+    merged, owners = utils.merge_ranges(ranges)
+
+    async with session_scope(session) as session:
+        merged_series = []
+        for start_dt, end_dt in merged:
+            series, = await _stitched_series(
+                [keyword], start_dt, end_dt, tz,
+                cookies=cookies, geo=geo, host_language=host_language,
+                retries=retries, timeout=timeout, max_concurrency=max_concurrency, session=session,
+                stitcher=stitcher,
+            )
+            merged_series.append(series)
+
+    result = []
+    for (start_dt, end_dt), owner in zip(ranges, owners):
+        series = merged_series[owner].between(int(start_dt.timestamp()), int(end_dt.timestamp()))
+        # Normalize to [0, 100]
+        if len(series) and series.max() > 0:
+            series.normalize()
+        result.append(series if as_series else series.to_list())
+    return result
+
+
+class HourlyStream:
+    """
+    Stitched hourly data yielded window by window, as returned by hourly_data_stream.
+
+    async for items in stream: items are [(timestamp, value)] of one window, scaled to the first window.
+    Multiply them by stream.rescale_factor to get the values hourly_data would return.
+    rescale_factor is running: it only becomes final once the stream is exhausted.
+    """
+
+    def __init__(self, chunks, as_series: bool = False):
+        self._chunks = chunks
+        self.as_series = as_series
+        self.max_value = 0.0
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        async for chunk in self._chunks:
+            series = chunk[0]
+            self.max_value = max(self.max_value, series.max())
+            yield series if self.as_series else series.to_list()
+
+    @property
+    def rescale_factor(self) -> float:
+        """
+        Factor mapping streamed values to [0, 100], based on the max value streamed so far.
+        """
+        return 100 / self.max_value if self.max_value else 1.0
+
+
+def hourly_data_stream(
+        keyword: str,
+        start_dt: datetime,
+        end_dt: datetime,
+        tz: timezone = None,
+        *,
+        cookies: dict = None,
+        geo: str = "",
+        host_language: str = "en-US",
+        retries: int = -1,
+        timeout: int = 600,
+        proxy: str = None,
+        max_concurrency: int = 1,
+        as_series: bool = False,
+        stitcher: Stitcher = None,
+        session: TrendsSession = None,
+) -> HourlyStream:
+    """
+    Stream hourly google trends data for a keyword window by window, instead of buffering the whole range.
+    Values are relative to the first window, use HourlyStream.rescale_factor to normalize them.
+
+    stream = hourly_data_stream('nft', start_dt, end_dt, tz)
+    async for items in stream:
+        store(items)
+    rescale_stored(stream.rescale_factor)
+
+    :param max_concurrency: Maximum number of 7 days windows fetched ahead of the one being yielded.
+    :param as_series: Yield TrendSeries instead of lists of tuples.
+
+    Other params are the same as hourly_data.
+    """
+    start_dt = start_dt.replace(tzinfo=tz).replace(microsecond=0, second=0, minute=0)
+    end_dt = min(datetime.now(tz=tz), end_dt.replace(tzinfo=tz)).replace(microsecond=0, second=0, minute=0)
+    if proxy and session is not None:
+        raise ValueError('proxy must be configured on the session when session is given')
+
+    async def _chunks():
+        async with session_scope(session, proxy=proxy) as _session:
+            async for chunk in _stitched_chunks(
+                    [keyword], start_dt, end_dt, tz,
+                    cookies=cookies, geo=geo, host_language=host_language,
+                    retries=retries, timeout=timeout, max_concurrency=max_concurrency, session=_session,
+                    stitcher=stitcher,
+            ):
+                yield chunk
+
+    return HourlyStream(_chunks(), as_series=as_series)
+
+
+async def hourly_data_since(
+        keyword: str,
+        previous,
+        end_dt: datetime = None,
+        tz: timezone = timezone.utc,
+        *,
+        max_value: float = None,
+        cookies: dict = None,
+        geo: str = "",
+        host_language: str = "en-US",
+        retries: int = -1,
+        timeout: int = 600,
+        max_concurrency: int = 1,
+        as_series: bool = False,
+        stitcher: Stitcher = None,
+        session: TrendsSession = None,
+):
+    """
+    Get hourly google trends data after a previously stored series, only fetching windows after its last point.
+    The new points are scaled to the stored series through their overlapped hours, the last stitcher.overlap stored ones.
+
+    :param previous: Stored [(timestamp, value)] or TrendSeries, or only its last (timestamp, value).
+    :param end_dt: The end datetime to get data for. Defaults to now.
+    :param tz: Timezone used to build windows. Timestamps are absolute, so it hardly matters.
+    :param max_value: Max value of the stored series. Defaults to max of previous, or 100 if only the last item is given.
+    :param max_concurrency: Maximum number of 7 days windows fetched at the same time.
+    :param as_series: Return the new points as a TrendSeries instead of a list of tuples.
+
+    Other params are the same as hourly_data.
+
+    @return: (new points after the last stored one, rescale_factor)
+        Multiply stored and new points by rescale_factor to keep them normalized to [0, 100].
+    """
+    if not len(previous):
+        raise ValueError('previous has no point to continue from, get the whole range with hourly_data instead')
+    stitcher = stitcher or Stitcher()
+    if isinstance(previous, tuple):
+        previous_items = [previous]
+        max_value = max_value if max_value is not None else 100
+    else:
+        previous_items = list(previous[-stitcher.overlap:])
+        max_value = max_value if max_value is not None else max(v for _, v in previous)
+
+    previous_group = [(int(t), [v]) for t, v in previous_items]
+    start_dt = datetime.fromtimestamp(previous_group[0][0], tz=tz)
+    end_dt = min(datetime.now(tz=tz), (end_dt or datetime.now(tz=tz)).replace(tzinfo=tz))
+    end_dt = end_dt.replace(microsecond=0, second=0, minute=0)
+
+    tail = TrendSeries()
+    if datetime.fromtimestamp(previous_group[-1][0], tz=tz) + timedelta(hours=1) < end_dt:
+        async with session_scope(session) as session:
+            async for chunk in _stitched_chunks(
+                    [keyword], start_dt, end_dt, tz,
+                    cookies=cookies, geo=geo, host_language=host_language,
+                    retries=retries, timeout=timeout, max_concurrency=max_concurrency, session=session,
+                    stitcher=stitcher, previous_group=previous_group,
+            ):
+                tail.extend(chunk[0])
+
+    max_value = max(max_value, tail.max() if len(tail) else 0)
+    # Like hourly_data, a keyword without volume stays at 0
+    rescale_factor = 100 / max_value if max_value > 0 else 1.0
+    return (tail if as_series else tail.to_list()), rescale_factor
+
+
+async def daily_data(
+        keyword: str,
+        start_dt: datetime,
+        end_dt: datetime,
+        tz: timezone = None,
+        *,
+        cookies: dict = None,
+        geo: str = "",
+        host_language: str = "en-US",
+        retries: int = -1,
+        timeout: int = 600,
+        max_concurrency: int = 1,
+        as_series: bool = False,
+        stitcher: Stitcher = None,
+        pack: int = 1,
+        session: TrendsSession = None,
+):
+    """
+    Get daily google trends data for a keyword, stitching windows of 270 days.
+    All trends value are based on max value between the dates of [start_dt, end_dt).
+    5 years of history take 7 windows, instead of ~260 hourly windows.
+
+    (1647302400, 50) means: On 2022-03-15, google trends is 50. Timestamps are midnight UTC of the date.
+
+    :param start_dt: The start date to get data for. Time is ignored.
+    :param end_dt: The end date to get data for, excluded. Time is ignored.
+    :param tz: The timezone Google uses to split days. Defaults to UTC.
+    :param pack: Number of 270 days windows fetched per request, up to 5.
+
+    Other params are the same as hourly_data.
+    """
+    tz = tz or timezone.utc
+    today = datetime.now(tz=tz)
+    start_dt = datetime(start_dt.year, start_dt.month, start_dt.day, tzinfo=timezone.utc)
+    end_dt = min(end_dt.replace(tzinfo=tz), today)
+    end_dt = datetime(end_dt.year, end_dt.month, end_dt.day, tzinfo=timezone.utc)
+
+    async with session_scope(session) as session:
+        series, = await _stitched_series(
+            [keyword], start_dt, end_dt, tz,
+            frequency=constants.Frequency.DAILY,
+            cookies=cookies, geo=geo, host_language=host_language,
+            retries=retries, timeout=timeout, max_concurrency=max_concurrency, session=session,
+            stitcher=stitcher, pack=pack,
+        )
+
+    # Normalize to [0, 100]
+    if len(series) and series.max() > 0:
+        series.normalize()
+    return series if as_series else series.to_list()
+
+
+async def coarse_data(
+        keyword: str,
+        start_dt: datetime = None,
+        end_dt: datetime = None,
+        tz: timezone = None,
+        *,
+        time_range: str = None,
+        cookies: dict = None,
+        geo: str = "",
+        host_language: str = "en-US",
+        retries: int = -1,
+        timeout: int = 600,
+        as_series: bool = False,
+        session: TrendsSession = None,
+):
+    """
+    Get google trends data of a long range in a single request, at the resolution Google picks for it:
+    daily up to 270 days, weekly up to 5 years and monthly beyond.
+    All trends value are based on max value of the range.
+
+    :param start_dt: The start date to get data for. Time is ignored.
+    :param end_dt: The end date to get data for, excluded. Time is ignored.
+    :param time_range: constants.TimeRange, e.g. constants.TimeRange.PAST_5Y, instead of start_dt and end_dt.
+    :param tz: The timezone Google uses to split days. Defaults to UTC.
+
+    Other params are the same as hourly_data.
+    """
+    tz = tz or timezone.utc
+    tz_offset = -int(tz.utcoffset(None).total_seconds() / 60)
+    custom_time_range = None
+    if time_range is None:
+        # Both dates of a custom time range are included
+        custom_time_range = (start_dt, end_dt - timedelta(days=1))
+
+    async with session_scope(session) as session:
+        @_rate_limit_retry(retries, timeout, session)
+        async def _get():
+            widgets = await _api.get_widgets(
+                keyword,
+                timezone_offset=tz_offset,
+                cookies=cookies,
+                time_range=time_range,
+                custom_time_range=custom_time_range,
+                frequency=constants.Frequency.DAILY,
+                geo=geo,
+                host_language=host_language,
+                session=session,
+            )
+            return await _api.interest_over_time_timeline(
+                cookies=cookies,
+                widgets=widgets,
+                timezone_offset=tz_offset,
+                host_language=host_language,
+                session=session,
+            )
+
+        timeline = await _get()
+
+    series = TrendSeries.from_items((t, values[0]) for t, values in timeline.rows())
+    if len(series) and series.max() > 0:
+        series.normalize()
+    return series if as_series else series.to_list()
+
+
+async def interest_by_region(
+        keyword: str,
+        start_dt: datetime = None,
+        end_dt: datetime = None,
+        tz: timezone = None,
+        *,
+        time_range: str = None,
+        resolution: str = None,
+        include_low_volume: bool = False,
+        widgets: List[dict] = None,
+        cookies: dict = None,
+        geo: str = "",
+        host_language: str = "en-US",
+        retries: int = -1,
+        timeout: int = 600,
+        session: TrendsSession = None,
+) -> Dict[str, int]:
+    """
+    Get the interest of a keyword in every sub-region of geo over a range, from the GEO_MAP widget
+    of its explore response. Values are relative to the region of max interest, which is 100.
+    Costs an explore and a comparedgeo request, or only the comparedgeo request given widgets.
+
+    :param start_dt: The start datetime to get data for. Ranges up to 7 days are hourly, longer ones daily.
+    :param end_dt: The end datetime to get data for, excluded.
+    :param time_range: constants.TimeRange, e.g. constants.TimeRange.PAST_12M, instead of start_dt and end_dt.
+    :param resolution: constants.Resolution of sub-regions, e.g. constants.Resolution.CITY.
+        Countries worldwide and regions within a country if not specified.
+    :param include_low_volume: Include regions with low search volume, reported as 0.
+    :param widgets: Widgets returned by explore, whose GEO_MAP widget is fetched without exploring again.
+        start_dt, end_dt, time_range and geo are then the ones given to explore, pass the same tz.
+
+    Other params are the same as hourly_data.
+
+    @return: {geo code: value}, e.g. {'US-CA': 100, 'US-NY': 87}
+    """
+    js = await _from_widgets(
+        keyword, start_dt, end_dt, tz,
+        lambda widgets, tz_offset, _session: _api.interest_by_region(
             cookies=cookies,
-            geo=geo,
+            widgets=widgets,
+            timezone_offset=tz_offset,
+            resolution=resolution,
+            include_low_volume=include_low_volume,
             host_language=host_language,
-        ))
+            session=_session,
+        ),
+        time_range=time_range, widgets=widgets, cookies=cookies, geo=geo, host_language=host_language,
+        retries=retries, timeout=timeout, session=session,
+    )
+    return _regions(js, include_low_volume)
 
-    def _get_last_dt(_result_item_lst) -> datetime:
-        return datetime.fromtimestamp(_result_item_lst[-1][0], tz=tz)
 
-    # ==================== Above is util ====================
-    current_dt = start_dt
-    result_item_lst = []
-
-    # First
-    current_group = await _get_7days_hourly_data(_start_dt=current_dt)
-    ratio = 1
-    result_item_lst.extend(
-        [(t, v * ratio) for t, v in current_group]
+async def explore(
+        keyword: str,
+        start_dt: datetime = None,
+        end_dt: datetime = None,
+        tz: timezone = None,
+        *,
+        time_range: str = None,
+        cookies: dict = None,
+        geo: str = "",
+        host_language: str = "en-US",
+        retries: int = -1,
+        timeout: int = 600,
+        session: TrendsSession = None,
+) -> List[dict]:
+    """
+    Get the widgets of a keyword over a range by one explore request, to pass to interest_by_region
+    and hourly_data_geos so that they skip their own explore request. Widget tokens expire after a few minutes.
+
+    Params are the same as interest_by_region.
+
+    @return: widgets of the explore response
+    """
+    async def _widgets(widgets, tz_offset, _session):
+        return widgets
+
+    return await _from_widgets(
+        keyword, start_dt, end_dt, tz, _widgets,
+        time_range=time_range, cookies=cookies, geo=geo, host_language=host_language,
+        retries=retries, timeout=timeout, session=session,
     )
 
-    while True:
-        current_dt = _get_last_dt(result_item_lst)
-        # Round down end_dt to hour
-        if current_dt >= end_dt.replace(microsecond=0, second=0, minute=0):
-            break
 
-        current_group = await _get_7days_hourly_data(_start_dt=current_dt)
-        overlaped_item = result_item_lst[-1]
-        if overlaped_item[0] != current_group[0][0]:
-            raise ValueError(f"Expected timestamp {overlaped_item[0]} to be equal to {current_group[0][0]}")
+async def _from_widgets(
+        keyword: str,
+        start_dt: datetime,
+        end_dt: datetime,
+        tz: timezone,
+        fetch,
+        *,
+        time_range: str,
+        widgets: List[dict] = None,
+        cookies: dict,
+        geo: str,
+        host_language: str,
+        retries: int,
+        timeout: int,
+        session: TrendsSession,
+):
+    """
+    Get the widgets of a keyword over a range by one explore request, then fetch widget data from them.
+    Ranges up to 7 days are hourly, longer ones daily. Both requests are retried together on RateLimit,
+    because widget tokens are bound to their explore request.
 
-        ratio = overlaped_item[1] / current_group[0][1]
-        result_item_lst.extend(
-            [(t, v * ratio) for t, v in current_group]
+    :param fetch: Coroutine function (widgets, timezone offset, session) -> widget data.
+    :param widgets: Widgets of an explore request already made, only fetch is then retried.
+
+    @return: result of fetch
+    """
+    tz = tz or timezone.utc
+    tz_offset = -int(tz.utcoffset(None).total_seconds() / 60)
+    custom_time_range = None
+    frequency = constants.Frequency.DAILY
+    if time_range is None and widgets is None:
+        start_dt, end_dt = start_dt.replace(tzinfo=tz), end_dt.replace(tzinfo=tz)
+        if end_dt - start_dt <= timedelta(days=7):
+            frequency = constants.Frequency.HOURLY
+            # Google reads hourly time range as UTC, both hours included
+            custom_time_range = (start_dt.astimezone(timezone.utc), (end_dt - timedelta(hours=1)).astimezone(timezone.utc))
+        else:
+            # Both dates of a custom time range are included
+            custom_time_range = (start_dt, end_dt - timedelta(days=1))
+
+    async with session_scope(session) as session:
+        @_rate_limit_retry(retries, timeout, session)
+        async def _get():
+            if widgets is not None:
+                return await fetch(widgets, tz_offset, session)
+            explored = await _api.get_widgets(
+                keyword,
+                timezone_offset=tz_offset,
+                cookies=cookies,
+                time_range=time_range,
+                custom_time_range=custom_time_range,
+                frequency=frequency,
+                geo=geo,
+                host_language=host_language,
+                session=session,
+            )
+            return await fetch(explored, tz_offset, session)
+
+        return await _get()
+
+
+def _regions(js: dict, include_low_volume: bool) -> Dict[str, int]:
+    return {
+        region['geoCode']: region['value'][0]
+        for region in js['default']['geoMapData']
+        if include_low_volume or region['hasData'][0]
+    }
+
+
+def _ranked(js: dict, widget_id: str) -> Dict[str, list]:
+    """
+    @return: {'top': [...], 'rising': [...]} of a related searches response,
+        [(query, value)] for related queries and [{'mid', 'title', 'type', 'value'}] for related topics.
+    """
+    ranked_lists = [ranked['rankedKeyword'] for ranked in js['default']['rankedList']]
+    # Google omits both lists when the keyword has too little search volume
+    ranked_lists += [[]] * (2 - len(ranked_lists))
+    if widget_id == constants.WidgetId.RELATED_QUERIES:
+        top, rising = ([(entry['query'], entry['value']) for entry in entries] for entries in ranked_lists)
+    else:
+        top, rising = (
+            [
+                {'mid': entry['topic']['mid'], 'title': entry['topic']['title'], 'type': entry['topic']['type'],
+                 'value': entry['value']}
+                for entry in entries
+            ]
+            for entries in ranked_lists
         )
+    return {'top': top, 'rising': rising}
 
-    end_dt = end_dt.replace(tzinfo=tz)
-    index = utils.find_index(result_item_lst, lambda item: item[0] >= int(end_dt.timestamp()))
-    result_item_lst = result_item_lst[:index]
 
-    # Normalize to [0, 100]
-    max_value = max(v for _, v in result_item_lst)
-    return [(t, v / max_value * 100) for t, v in result_item_lst]
+def _related_fetch(widget_id: str, cookies: dict, host_language: str):
+    return lambda widgets, tz_offset, session: _api.related_searches(
+        cookies=cookies,
+        widgets=widgets,
+        timezone_offset=tz_offset,
+        widget_id=widget_id,
+        host_language=host_language,
+        session=session,
+    )
+
+
+async def related_queries(
+        keyword: str,
+        start_dt: datetime = None,
+        end_dt: datetime = None,
+        tz: timezone = None,
+        *,
+        time_range: str = None,
+        cookies: dict = None,
+        geo: str = "",
+        host_language: str = "en-US",
+        retries: int = -1,
+        timeout: int = 600,
+        session: TrendsSession = None,
+) -> Dict[str, List[tuple]]:
+    """
+    Get the top and rising searches of people who searched a keyword over a range.
+    Top values are relative to the most searched query, which is 100.
+    Rising values are the percent increase of the query over the previous period, 5000 or more meaning "Breakout".
+
+    Params are the same as interest_by_region.
+
+    @return: {'top': [(query, value)], 'rising': [(query, value)]}
+    """
+    js = await _from_widgets(
+        keyword, start_dt, end_dt, tz, _related_fetch(constants.WidgetId.RELATED_QUERIES, cookies, host_language),
+        time_range=time_range, cookies=cookies, geo=geo, host_language=host_language,
+        retries=retries, timeout=timeout, session=session,
+    )
+    return _ranked(js, constants.WidgetId.RELATED_QUERIES)
+
+
+async def related_topics(
+        keyword: str,
+        start_dt: datetime = None,
+        end_dt: datetime = None,
+        tz: timezone = None,
+        *,
+        time_range: str = None,
+        cookies: dict = None,
+        geo: str = "",
+        host_language: str = "en-US",
+        retries: int = -1,
+        timeout: int = 600,
+        session: TrendsSession = None,
+) -> Dict[str, List[dict]]:
+    """
+    Same as related_queries, for topics (entities of the Knowledge Graph) instead of queries.
+
+    @return: {'top': [{'mid', 'title', 'type', 'value'}], 'rising': [...]}
+    """
+    js = await _from_widgets(
+        keyword, start_dt, end_dt, tz, _related_fetch(constants.WidgetId.RELATED_TOPICS, cookies, host_language),
+        time_range=time_range, cookies=cookies, geo=geo, host_language=host_language,
+        retries=retries, timeout=timeout, session=session,
+    )
+    return _ranked(js, constants.WidgetId.RELATED_TOPICS)
+
+
+async def keyword_report(
+        keyword: str,
+        start_dt: datetime = None,
+        end_dt: datetime = None,
+        tz: timezone = None,
+        *,
+        time_range: str = None,
+        resolution: str = None,
+        include_low_volume: bool = False,
+        cookies: dict = None,
+        geo: str = "",
+        host_language: str = "en-US",
+        retries: int = -1,
+        timeout: int = 600,
+        session: TrendsSession = None,
+) -> dict:
+    """
+    Get the full profile of a keyword over a range: interest over time, interest by region,
+    related queries and related topics. All four widgets come from one explore request
+    and are fetched concurrently through the same session, for 5 requests in 2 round trips.
+
+    Params are the same as interest_by_region.
+
+    @return: {
+        'interest_over_time': [(timestamp, value)] at the resolution Google picks for the range,
+        'interest_by_region': same as interest_by_region,
+        'related_queries': same as related_queries,
+        'related_topics': same as related_topics,
+    }
+    """
+    async def _fetch(widgets, tz_offset, _session):
+        kwargs = dict(
+            cookies=cookies, widgets=widgets, timezone_offset=tz_offset, host_language=host_language, session=_session,
+        )
+        return await asyncio.gather(
+            _api.interest_over_time_timeline(**kwargs),
+            _api.interest_by_region(**kwargs, resolution=resolution, include_low_volume=include_low_volume),
+            _api.related_searches(**kwargs, widget_id=constants.WidgetId.RELATED_QUERIES),
+            _api.related_searches(**kwargs, widget_id=constants.WidgetId.RELATED_TOPICS),
+        )
+
+    timeline, regions, queries, topics = await _from_widgets(
+        keyword, start_dt, end_dt, tz, _fetch,
+        time_range=time_range, cookies=cookies, geo=geo, host_language=host_language,
+        retries=retries, timeout=timeout, session=session,
+    )
+    return {
+        'interest_over_time': [(t, values[0]) for t, values in timeline.rows()],
+        'interest_by_region': _regions(regions, include_low_volume),
+        'related_queries': _ranked(queries, constants.WidgetId.RELATED_QUERIES),
+        'related_topics': _ranked(topics, constants.WidgetId.RELATED_TOPICS),
+    }
+
+
+async def hourly_data_geos(
+        keyword: str,
+        geos: List[str],
+        start_dt: datetime,
+        end_dt: datetime,
+        tz: timezone = None,
+        *,
+        comparable: bool = False,
+        widgets: List[dict] = None,
+        geo_concurrency: int = 4,
+        cookies: dict = None,
+        host_language: str = "en-US",
+        retries: int = -1,
+        timeout: int = 600,
+        max_concurrency: int = 1,
+        stitcher: Stitcher = None,
+        session: TrendsSession = None,
+) -> TrendMatrix:
+    """
+    Get hourly google trends data of a keyword in many geos, e.g. dozens of countries or US states,
+    fetching geos concurrently through one session so that they share its connections, cookies and rate limiter.
+
+    :param geos: Geo codes, e.g. ['US-CA', 'US-NY'] or ['US', 'GB'].
+    :param comparable: Scale geos against each other by their interest_by_region over the range,
+        so that the mean of every row is proportional to the interest of its geo. Geos must then share
+        a parent: all countries, or regions of the same country. Otherwise every row is normalized to its own max.
+        This costs an explore and a comparedgeo request in the parent geo, fetched along with the geos.
+    :param widgets: Widgets returned by explore(keyword, start_dt, end_dt, tz, geo=parent geo), so that comparable
+        geos are scaled by a single comparedgeo request without exploring again.
+    :param geo_concurrency: Maximum number of geos fetched at the same time.
+    :param max_concurrency: Maximum number of 7 days windows of a geo fetched at the same time.
+
+    Other params are the same as hourly_data.
+
+    @return: TrendMatrix with a row per geo, in the order of geos.
+    """
+    geos = list(dict.fromkeys(geos))
+    parents = {g.split('-')[0] if '-' in g else '' for g in geos}
+    if comparable and len(parents) != 1:
+        raise ValueError('comparable geos must all be countries or regions of the same country')
+
+    start_dt = start_dt.replace(tzinfo=tz).replace(microsecond=0, second=0, minute=0)
+    end_dt = min(datetime.now(tz=tz), end_dt.replace(tzinfo=tz)).replace(microsecond=0, second=0, minute=0)
+    semaphore = asyncio.Semaphore(geo_concurrency)
+
+    async with session_scope(session) as session:
+        async def _geo_series(geo):
+            async with semaphore:
+                series, = await _stitched_series(
+                    [keyword], start_dt, end_dt, tz,
+                    cookies=cookies, geo=geo, host_language=host_language,
+                    retries=retries, timeout=timeout, max_concurrency=max_concurrency, session=session,
+                    stitcher=stitcher,
+                )
+                return series
+
+        async def _interest():
+            if not comparable:
+                return None
+            return await interest_by_region(
+                keyword, start_dt, end_dt, tz,
+                include_low_volume=True,
+                resolution=constants.Resolution.REGION if parents != {''} else constants.Resolution.COUNTRY,
+                widgets=widgets, cookies=cookies, geo=parents.pop(), host_language=host_language,
+                retries=retries, timeout=timeout, session=session,
+            )
+
+        interest, *geo_series_list = await asyncio.gather(_interest(), *(_geo_series(geo) for geo in geos))
+        series = dict(zip(geos, geo_series_list))
+
+    for geo, geo_series in series.items():
+        if comparable:
+            mean = sum(geo_series.values) / len(geo_series) if len(geo_series) else 0
+            geo_series.scale(interest.get(geo, 0) / mean if mean > 0 else 0)
+        elif len(geo_series) and geo_series.max() > 0:
+            geo_series.normalize()
+    if comparable:
+        max_value = max((s.max() for s in series.values() if len(s)), default=0)
+        for geo_series in series.values():
+            if max_value > 0:
+                geo_series.normalize(max_value)
+    return TrendMatrix.from_series(series)
@@ -1,78 +1,105 @@
 """
 Simple wrapper of google trends web api
 """
-import json
+import time
 from datetime import datetime, timedelta
-from typing import Tuple, List
+from typing import Tuple, List, Union
 
-import httpx
-from google_trends_api import constants
+from google_trends_api import constants, parsing
+from google_trends_api.cache import token_key
+from google_trends_api.hooks import ParseEvent
+from google_trends_api.proxies import Proxy
+from google_trends_api.ratelimit import parse_retry_after
+from google_trends_api.session import TrendsSession, session_scope
+
+
+class TokenExpired(Exception):
+    """
+    A widget data endpoint rejected the token of cached widgets, which have been invalidated.
+    Exploring the request again gets a fresh token.
+    """
 
 
 class RateLimit(Exception):
-    pass
+    def __init__(self, message: str = '', retry_after: float = None):
+        """
+        :param retry_after: Seconds requested by the Retry-After header, None if not given.
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
 
 
-async def get_cookies(geo='US'):
+async def get_cookies(geo='US', *, session: TrendsSession = None, proxy: Proxy = None):
     """
     Get cookies for Google Trends API.
 
     :param geo: Ther is no need to modify this param.
+    :param session: Session used to send the request. A temporary session is used if not specified.
+    :param proxy: Proxy of session.proxy_pool to fetch cookies through. Cookies seem bound to the ip requesting them.
     """
-    async with httpx.AsyncClient(follow_redirects=True, verify=False, timeout=30) as client:
-        resp = await client.get(
+    async with session_scope(session) as session:
+        resp = await session.get(
             url='https://trends.google.com/',
-            params={'geo': geo})
+            params={'geo': geo},
+            proxy=proxy,
+            endpoint='cookies')
         return {k: v for k, v in resp.cookies.items() if k == 'NID'}
 
 
 async def get_widgets(
-        keyword: str,
+        keyword: Union[str, List[str]],
         timezone_offset: int,
         cookies: dict,
         time_range: constants.TimeRange = None,
         custom_time_range: Tuple[datetime, datetime] = None,
         *,
+        custom_time_ranges: List[Tuple[datetime, datetime]] = None,
         frequency: constants.Frequency = constants.Frequency.HOURLY,
         geo: str = "",
         host_language: str = "en-US",
+        session: TrendsSession = None,
 ) -> List[dict]:
     """
-    :param keyword: Keyword to search for.
+    :param keyword: Keyword to search for, or a list of up to 5 keywords compared in the same request.
     :param timezone_offset: timezone offset in minutes.
     :param time_range: Time range to search for. if both time_range nad custom_time_range are specified, use time_range.
-    :param cookies: cookies returned by _api.get_cookies.
+    :param cookies: cookies returned by _api.get_cookies. None means cookies of session.cookie_pool.
     :param custom_time_range: Custom time range to search for. Range must be less than 8 days.
+    :param custom_time_ranges: Up to 5 custom time ranges of a single keyword compared in the same request,
+        one comparisonItem per range, instead of custom_time_range.
     :param frequency: Frequency of data. Only avaible for custom_time_range.
     :param geo: Country abbreviation. empty string means worldwide. This param determines search region.
     :param host_language: Language of the host page. This param is useless. Normally, there is no nesscessarity to modify it
+    :param session: Session used to send the request. A temporary session is used if not specified.
 
     Notice that if you are in the China (UTC+8), the timezone_offset should be -480 (note NOT 480, Google uses timezone this way...)
     """
-    async with httpx.AsyncClient(cookies=cookies, verify=False, timeout=30) as client:
-        if time_range is None and custom_time_range is None:
+    keywords = [keyword] if isinstance(keyword, str) else list(keyword)
+    if not 1 <= len(keywords) <= 5:
+        raise ValueError('Google Trends compares 1 to 5 keywords in one request')
+    if custom_time_ranges is not None and (len(keywords) != 1 or not 1 <= len(custom_time_ranges) <= 5):
+        raise ValueError('custom_time_ranges compares 1 to 5 time ranges of a single keyword')
+
+    async with session_scope(session) as session:
+        if time_range is None and custom_time_range is None and custom_time_ranges is None:
             raise ValueError('time_range or custom_time_range must be specified')
 
         if time_range:
             param_req = {
-                'comparisonItem': [{"keyword": keyword, "geo": geo, "time": time_range}],
+                'comparisonItem': [{"keyword": k, "geo": geo, "time": time_range} for k in keywords],
                 "category": 0,
                 "property": "",
             }
         else:
-            if frequency == constants.Frequency.DAILY:
-                start_datetime_str, end_datetime_str = (
-                    custom_time_range[0].strftime('%Y-%m-%d'),
-                    custom_time_range[1].strftime('%Y-%m-%d')
-                )
-            elif frequency == constants.Frequency.HOURLY:
-                start_datetime_str, end_datetime_str = (
-                    custom_time_range[0].strftime('%Y-%m-%dT%H'),
-                    custom_time_range[1].strftime('%Y-%m-%dT%H')
-                )
+            time_format = '%Y-%m-%d' if frequency == constants.Frequency.DAILY else '%Y-%m-%dT%H'
+            if custom_time_ranges is not None:
+                items = [(keywords[0], r) for r in custom_time_ranges]
+            else:
+                items = [(k, custom_time_range) for k in keywords]
             param_req = {
                 "comparisonItem": [
-                    {"keyword": keyword, "geo": geo, "time": "{} {}".format(start_datetime_str, end_datetime_str)}
+                    {"keyword": k, "geo": geo, "time": "{} {}".format(r[0].strftime(time_format), r[1].strftime(time_format))}
+                    for k, r in items
                 ],
                 "category": 0,
                 "property": ""}
@@ -83,12 +110,23 @@ async def get_widgets(
             'req': param_req,
         }
 
-        resp = await client.get(constants.API.EXPLORE, params=query)
+        token_cache = session.token_cache
+        if token_cache is not None:
+            key = token_key(param_req, timezone_offset, host_language)
+            widgets = token_cache.get(key)
+            if widgets is not None:
+                return widgets
+
+        resp = await session.get(
+            constants.API.EXPLORE, params=query, cookies=cookies, pooled_cookies=True, endpoint='explore',
+        )
         if resp.status_code == 200:
-            js = json.loads(resp.text[5:])
+            js = _parse(resp, 'explore', session)
+            if token_cache is not None:
+                token_cache.set(key, js['widgets'])
             return js['widgets']
         elif resp.status_code == 429:
-            raise RateLimit(resp.text)
+            raise RateLimit(resp.text, retry_after=parse_retry_after(resp.headers.get('Retry-After')))
 
 
 async def interest_over_time(
@@ -97,24 +135,178 @@ async def interest_over_time(
     timezone_offset: int,
     *,
     host_language: str = "en-US",
+    session: TrendsSession = None,
 ) -> dict:
     """
     :param widgets: widgets returned by _api.get_widgets
     :param timezone_offset: timezone offset in minutes
-    :param cookies: Cookies for Google Trends API
+    :param cookies: Cookies for Google Trends API. None means cookies of session.cookie_pool.
     :param host_language: Language of the host page. This param is useless. Normally, there is no nesscessarity to modify it
+    :param session: Session used to send the request. A temporary session is used if not specified.
 
     Notice that if you are in the China (UTC+8), the timezone_offset should be -480 (note NOT 480, Google uses timezone this way...)
     """
-    async with httpx.AsyncClient(cookies=cookies, verify=False, timeout=30) as client:
-        time_series_widget = [w for w in widgets if w['id'] == constants.WidgetId.TIME_SERIES][0]
+    async with session_scope(session) as session:
+        resp = await _interest_over_time_response(cookies, widgets, timezone_offset, host_language, session)
+        return _parse(resp, 'multiline', session)
 
-        query = {
-            'hl': host_language,
-            'tz': timezone_offset,
-            'token': time_series_widget['token'],
-            'req': time_series_widget['request'],
-        }
-        resp = await client.get(constants.API.TRENDS_OVER_TIME, params=query)
-        js = json.loads(resp.text[5:])
-        return js
+
+async def interest_over_time_timeline(
+    cookies: dict,
+    widgets: dict,
+    timezone_offset: int,
+    *,
+    host_language: str = "en-US",
+    session: TrendsSession = None,
+) -> parsing.Timeline:
+    """
+    Same as interest_over_time, but decode only time, value and hasData of points, into compact arrays.
+    Points without data for the first keyword are dropped.
+    """
+    async with session_scope(session) as session:
+        resp = await _interest_over_time_response(cookies, widgets, timezone_offset, host_language, session)
+        return _parse(resp, 'multiline', session, decode=parsing.parse_timeline)
+
+
+async def interest_over_time_windows(
+    cookies: dict,
+    widgets: dict,
+    timezone_offset: int,
+    starts: List[int],
+    step: int,
+    *,
+    host_language: str = "en-US",
+    session: TrendsSession = None,
+) -> List[parsing.Timeline]:
+    """
+    Same as interest_over_time, for widgets of get_widgets(custom_time_ranges=...), split into a Timeline per range.
+    Values of all ranges share the same scale.
+
+    :param starts: Timestamp of the first point of every range.
+    :param step: Seconds between points, 3600 for hourly ranges and 86400 for daily ranges.
+    """
+    async with session_scope(session) as session:
+        resp = await _interest_over_time_response(cookies, widgets, timezone_offset, host_language, session)
+        return _parse(
+            resp, 'multiline', session, decode=lambda content: parsing.parse_windows(content, starts, step),
+        )
+
+
+async def interest_by_region(
+    cookies: dict,
+    widgets: dict,
+    timezone_offset: int,
+    *,
+    resolution: str = None,
+    include_low_volume: bool = False,
+    host_language: str = "en-US",
+    session: TrendsSession = None,
+) -> dict:
+    """
+    Interest of every sub-region of the geo of widgets, from their GEO_MAP widget.
+    The widgets of a single get_widgets call feed both interest_over_time and interest_by_region.
+
+    :param widgets: widgets returned by _api.get_widgets
+    :param resolution: constants.Resolution of sub-regions. Google picks it from geo if not specified:
+        countries for worldwide, regions (e.g. states) within a country.
+    :param include_low_volume: Include regions with low search volume, reported as 0.
+    :param session: Session used to send the request. A temporary session is used if not specified.
+
+    @return: {'default': {'geoMapData': [{'geoCode', 'geoName', 'value': [...], 'hasData': [...]}]}}
+    """
+    async with session_scope(session) as session:
+        geo_map_widget = [w for w in widgets if w['id'] == constants.WidgetId.GEO_MAP][0]
+        request = dict(geo_map_widget['request'])
+        if resolution is not None:
+            request['resolution'] = resolution
+        request['includeLowSearchVolumeGeos'] = include_low_volume
+
+        resp = await _widget_data_response(
+            constants.API.COMPARED_GEO, geo_map_widget, cookies, timezone_offset, host_language, session,
+            endpoint='comparedgeo', request=request,
+        )
+        return _parse(resp, 'comparedgeo', session)
+
+
+async def related_searches(
+    cookies: dict,
+    widgets: dict,
+    timezone_offset: int,
+    widget_id: str = constants.WidgetId.RELATED_QUERIES,
+    *,
+    host_language: str = "en-US",
+    session: TrendsSession = None,
+) -> dict:
+    """
+    Top and rising related queries or topics of the keyword of widgets.
+
+    :param widgets: widgets returned by _api.get_widgets
+    :param widget_id: constants.WidgetId.RELATED_QUERIES or constants.WidgetId.RELATED_TOPICS
+    :param session: Session used to send the request. A temporary session is used if not specified.
+
+    @return: {'default': {'rankedList': [{'rankedKeyword': [top...]}, {'rankedKeyword': [rising...]}]}}
+        Entries of related queries have a 'query', entries of related topics a 'topic' {'mid', 'title', 'type'}.
+    """
+    async with session_scope(session) as session:
+        related_widget = [w for w in widgets if w['id'] == widget_id][0]
+        resp = await _widget_data_response(
+            constants.API.RELATED_SEARCHES, related_widget, cookies, timezone_offset, host_language, session,
+            endpoint='relatedsearches',
+        )
+        return _parse(resp, 'relatedsearches', session)
+
+
+async def _interest_over_time_response(
+    cookies: dict,
+    widgets: dict,
+    timezone_offset: int,
+    host_language: str,
+    session: TrendsSession,
+):
+    time_series_widget = [w for w in widgets if w['id'] == constants.WidgetId.TIME_SERIES][0]
+    return await _widget_data_response(
+        constants.API.TRENDS_OVER_TIME, time_series_widget, cookies, timezone_offset, host_language, session,
+        endpoint='multiline',
+    )
+
+
+async def _widget_data_response(
+    url: str,
+    widget: dict,
+    cookies: dict,
+    timezone_offset: int,
+    host_language: str,
+    session: TrendsSession,
+    *,
+    endpoint: str,
+    request: dict = None,
+):
+    """
+    Request the data of a widget with its token.
+
+    :param request: Request of the widget, widget['request'] if not specified.
+    """
+    query = {
+        'hl': host_language,
+        'tz': timezone_offset,
+        'token': widget['token'],
+        'req': request if request is not None else widget['request'],
+    }
+    resp = await session.get(url, params=query, cookies=cookies, pooled_cookies=True, endpoint=endpoint)
+    if resp.status_code == 429:
+        raise RateLimit(resp.text, retry_after=parse_retry_after(resp.headers.get('Retry-After')))
+    # Tokens of cached widgets may have expired, or be bound to other cookies
+    if resp.status_code in (400, 401, 403) and session.token_cache is not None \
+            and session.token_cache.invalidate(widget['token']):
+        raise TokenExpired(f'{endpoint} rejected a cached token: {resp.status_code}')
+    return resp
+
+
+def _parse(resp, endpoint: str, session: TrendsSession, decode=parsing.loads):
+    """
+    Decode the bytes of a response prefixed by ")]}'," against JSON hijacking, timed for session hooks.
+    """
+    started = time.perf_counter()
+    js = decode(resp.content)
+    session.emit(ParseEvent(endpoint, time.perf_counter() - started))
+    return js
@@ -0,0 +1,384 @@
+"""
+Bulk backfill of keyword x geo x range jobs, checkpointing every fetched window to SQLite
+
+store = CheckpointStore('backfill.db')
+async with TrendsSession() as session:
+    backfill = Backfill(store, session=session, max_concurrency=8)
+    await backfill.run(load_manifest('manifest.csv'))
+    series = backfill.series(job)
+
+Or from the command line, resuming where a previous run stopped:
+
+python -m google_trends_api.backfill manifest.csv --db backfill.db --output result.parquet
+"""
+import argparse
+import asyncio
+import bisect
+import csv
+import functools
+import hashlib
+import json
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from loguru import logger
+
+from google_trends_api import constants, utils
+from google_trends_api import _window_rows, _rate_limit_retry, _StitchedWindows, _WINDOWS
+from google_trends_api.export import open_sink, last_timestamps
+from google_trends_api.series import TrendSeries
+from google_trends_api.session import TrendsSession, session_scope
+from google_trends_api.stitching import Stitcher
+
+
+class BackfillJob:
+    """
+    Data of a keyword in a geo over [start_dt, end_dt), at hourly or daily frequency.
+    start_dt and end_dt are read in tz, and rounded down to the hour (hourly) or the day (daily).
+    """
+
+    __slots__ = ('keyword', 'geo', 'start_dt', 'end_dt', 'frequency', 'tz')
+
+    def __init__(
+            self,
+            keyword: str,
+            start_dt: datetime,
+            end_dt: datetime,
+            *,
+            geo: str = "",
+            frequency: str = constants.Frequency.HOURLY,
+            tz: timezone = timezone.utc,
+    ):
+        if frequency not in _WINDOWS:
+            raise ValueError(f'Unknown frequency {frequency}')
+        self.keyword = keyword
+        self.geo = geo
+        self.frequency = frequency
+        self.tz = tz
+        if frequency == constants.Frequency.HOURLY:
+            self.start_dt = start_dt.replace(tzinfo=tz).replace(microsecond=0, second=0, minute=0)
+            self.end_dt = end_dt.replace(tzinfo=tz).replace(microsecond=0, second=0, minute=0)
+        else:
+            # Daily windows only use dates, and their timestamps are midnight UTC
+            self.start_dt = datetime(start_dt.year, start_dt.month, start_dt.day, tzinfo=timezone.utc)
+            self.end_dt = datetime(end_dt.year, end_dt.month, end_dt.day, tzinfo=timezone.utc)
+
+    @property
+    def id(self) -> str:
+        """
+        Stable id of the job, the same across runs.
+        """
+        params = [
+            self.keyword, self.geo, self.start_dt.isoformat(), self.end_dt.isoformat(), self.frequency,
+            int(self.tz.utcoffset(None).total_seconds()),
+        ]
+        return hashlib.sha1(json.dumps(params).encode()).hexdigest()[:16]
+
+    def __repr__(self):
+        return (
+            f'BackfillJob({self.keyword!r}, {self.start_dt.isoformat()}, {self.end_dt.isoformat()}, '
+            f'geo={self.geo!r}, frequency={self.frequency!r})'
+        )
+
+
+def load_manifest(path: str) -> List[BackfillJob]:
+    """
+    Read jobs from a csv file with a header, or a json lines file, with fields:
+    keyword, start and end (ISO dates or datetimes), and optionally geo, frequency (hourly or daily)
+    and utc_offset (hours, 0 by default).
+    """
+    with open(path, newline='') as f:
+        if path.endswith('.csv'):
+            records = list(csv.DictReader(f))
+        else:
+            records = [json.loads(line) for line in f if line.strip()]
+
+    return [
+        BackfillJob(
+            record['keyword'],
+            datetime.fromisoformat(record['start']),
+            datetime.fromisoformat(record['end']),
+            geo=record.get('geo') or "",
+            frequency=record.get('frequency') or constants.Frequency.HOURLY,
+            tz=timezone(timedelta(hours=float(record.get('utc_offset') or 0))),
+        )
+        for record in records
+    ]
+
+
+class CheckpointStore:
+    """
+    SQLite database of jobs and of the rows of every window fetched for them.
+    A window is saved as soon as it is fetched, so that an interrupted backfill resumes without refetching it.
+    """
+
+    def __init__(self, path: str):
+        # Processes of a sharded backfill write to the same database
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            'id TEXT PRIMARY KEY, keyword TEXT NOT NULL, geo TEXT NOT NULL, frequency TEXT NOT NULL, '
+            'start_ts INTEGER NOT NULL, end_ts INTEGER NOT NULL, created_at REAL NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS windows ('
+            'job_id TEXT NOT NULL, start_ts INTEGER NOT NULL, rows TEXT NOT NULL, PRIMARY KEY (job_id, start_ts))'
+        )
+        self._conn.commit()
+
+    def add_job(self, job: BackfillJob) -> int:
+        """
+        Register job if it is new. Its end is capped to now the first time, so that later runs plan the same windows.
+
+        @return: end timestamp of the job
+        """
+        row = self._conn.execute('SELECT end_ts FROM jobs WHERE id = ?', (job.id,)).fetchone()
+        if row is not None:
+            return row[0]
+
+        unit = int(_WINDOWS[job.frequency][1].total_seconds())
+        end_ts = min(int(job.end_dt.timestamp()), int(time.time()) // unit * unit)
+        self._conn.execute(
+            'INSERT INTO jobs (id, keyword, geo, frequency, start_ts, end_ts, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (job.id, job.keyword, job.geo, job.frequency, int(job.start_dt.timestamp()), end_ts, time.time()),
+        )
+        self._conn.commit()
+        return end_ts
+
+    def saved_windows(self, job_id: str) -> set:
+        """
+        @return: start timestamps of the windows saved for job_id
+        """
+        return {row[0] for row in self._conn.execute('SELECT start_ts FROM windows WHERE job_id = ?', (job_id,))}
+
+    def save_window(self, job_id: str, start_ts: int, rows: list):
+        self._conn.execute(
+            'INSERT OR REPLACE INTO windows (job_id, start_ts, rows) VALUES (?, ?, ?)',
+            (job_id, start_ts, json.dumps(rows)),
+        )
+        self._conn.commit()
+
+    def windows(self, job_id: str) -> Dict[int, list]:
+        """
+        @return: {start timestamp: rows} of every window saved for job_id, in order
+        """
+        return {
+            row[0]: json.loads(row[1])
+            for row in self._conn.execute(
+                'SELECT start_ts, rows FROM windows WHERE job_id = ? ORDER BY start_ts', (job_id,),
+            )
+        }
+
+    def close(self):
+        self._conn.close()
+
+
+class Backfill:
+    """
+    Split jobs into windows, and fetch the windows not saved yet concurrently through one session.
+    Every window is planned up front, so windows of all jobs are fetched in any order and saved independently.
+    """
+
+    def __init__(
+            self,
+            store: CheckpointStore,
+            *,
+            session: TrendsSession = None,
+            max_concurrency: int = 8,
+            overlap: int = 1,
+            host_language: str = "en-US",
+            retries: int = -1,
+            timeout: int = 600,
+    ):
+        """
+        :param store: Where windows are checkpointed.
+        :param session: Session shared by all requests. A session is created by every run if not specified.
+        :param max_concurrency: Maximum number of windows fetched at the same time.
+        :param overlap: Number of points shared by consecutive windows, see Stitcher.
+        :param retries: Retries of every window on rate limit. -1 means infinite retries.
+        :param timeout: Seconds after which a window stops being retried. It is fetched again by the next run.
+        """
+        self.store = store
+        self.session = session
+        self.max_concurrency = max_concurrency
+        self.overlap = overlap
+        self.host_language = host_language
+        self.retries = retries
+        self.timeout = timeout
+
+    def plan(self, job: BackfillJob) -> List[datetime]:
+        """
+        @return: start datetime of every window of job, the ones already saved included
+        """
+        end_ts = self.store.add_job(job)
+        end_dt = datetime.fromtimestamp(end_ts, tz=job.start_dt.tzinfo)
+        window_size, unit = _WINDOWS[job.frequency]
+        return utils.plan_windows(job.start_dt, end_dt, window_size, overlap=unit * self.overlap)
+
+    async def run(self, jobs: List[BackfillJob]) -> Dict[str, int]:
+        """
+        Fetch every window of jobs which is not saved yet.
+        Windows failing after retries are logged and left for the next run.
+
+        @return: {'windows': planned windows, 'saved': windows saved before this run, 'fetched': n, 'failed': n}
+        """
+        tasks = []
+        stats = {'windows': 0, 'saved': 0, 'fetched': 0, 'failed': 0}
+        for job in jobs:
+            saved = self.store.saved_windows(job.id)
+            for window_dt in self.plan(job):
+                stats['windows'] += 1
+                if int(window_dt.timestamp()) in saved:
+                    stats['saved'] += 1
+                else:
+                    tasks.append((job, window_dt))
+        logger.info(f"Backfill of {len(jobs)} jobs: {stats['windows']} windows, {len(tasks)} to fetch")
+
+        queue = asyncio.Queue()
+        for task in tasks:
+            queue.put_nowait(task)
+
+        async with session_scope(self.session) as session:
+            async def _worker():
+                while not queue.empty():
+                    job, window_dt = queue.get_nowait()
+                    try:
+                        rows = await self._fetch(job, window_dt, session)
+                    except Exception as e:
+                        stats['failed'] += 1
+                        logger.error(f'Failed to fetch window {window_dt.isoformat()} of {job}: {e!r}')
+                        continue
+                    self.store.save_window(job.id, int(window_dt.timestamp()), rows)
+                    stats['fetched'] += 1
+
+            await asyncio.gather(*(_worker() for _ in range(min(self.max_concurrency, len(tasks)))))
+        return stats
+
+    async def _fetch(self, job: BackfillJob, window_dt: datetime, session: TrendsSession) -> list:
+        window_size, _ = _WINDOWS[job.frequency]
+
+        @_rate_limit_retry(self.retries, self.timeout, session)
+        async def _get_window():
+            return await utils.alist(_window_rows(
+                [job.keyword], window_dt, window_dt + window_size, job.tz, job.frequency,
+                geo=job.geo, host_language=self.host_language, session=session,
+            ))
+
+        return await _get_window()
+
+    def series(self, job: BackfillJob, *, as_series: bool = False, stitcher: Stitcher = None):
+        """
+        Stitch the saved windows of job, normalized to [0, 100] like hourly_data and daily_data.
+
+        :param stitcher: Fits the ratio of every window, Stitcher(overlap) if not specified.
+        """
+        planned = [int(window_dt.timestamp()) for window_dt in self.plan(job)]
+        # Windows saved by runs with another overlap are not part of the plan
+        windows = self.store.windows(job.id)
+        missing = sum(start_ts not in windows for start_ts in planned)
+        if missing:
+            raise ValueError(f'{job} has {missing} windows left to fetch, run the backfill again')
+
+        stitched = _StitchedWindows(1, self.store.add_job(job), stitcher or Stitcher(self.overlap))
+        series = TrendSeries()
+        for start_ts in planned:
+            rows = windows[start_ts]
+            if rows:
+                series.extend(stitched.add([(t, values) for t, values in rows])[0])
+
+        if len(series) and series.max() > 0:
+            series.normalize()
+        return series if as_series else series.to_list()
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m google_trends_api.backfill',
+        description='Backfill the jobs of a manifest, resuming from the windows saved in --db by previous runs.',
+    )
+    parser.add_argument('manifest', help='csv or json lines file of keyword, start, end[, geo, frequency, utc_offset]')
+    parser.add_argument('--db', default='backfill.db', help='SQLite checkpoint database')
+    parser.add_argument('--concurrency', type=int, default=8, help='Maximum number of windows fetched at once')
+    parser.add_argument('--overlap', type=int, default=1, help='Number of points shared by consecutive windows')
+    parser.add_argument('--proxy', help='Proxy url of every request')
+    parser.add_argument(
+        '--output',
+        help='Write the stitched series of complete jobs to this csv file, or .parquet or .arrow directory',
+    )
+    parser.add_argument(
+        '--append', action='store_true',
+        help='Append to --output instead of overwriting it, only the points of every series after the last one '
+             'already in --output',
+    )
+    parser.add_argument('--shard', help='Only backfill shard INDEX/COUNT of the jobs, e.g. 0/4 on the first of 4 hosts')
+    parser.add_argument('--processes', type=int, default=1, help='Number of processes sharing the jobs')
+    parser.add_argument(
+        '--state',
+        help='Rate limit and cookies shared by workers: a SQLite file for processes of one host, '
+             'or redis://host:port/db for several hosts. Defaults to DB.state with --processes',
+    )
+    args = parser.parse_args(argv)
+
+    from google_trends_api import sharding
+
+    jobs = load_manifest(args.manifest)
+    if args.shard:
+        index, count = map(int, args.shard.split('/'))
+        jobs = sharding.shard(jobs, index, count)
+
+    backend = None
+    if args.state and args.state.startswith(('redis://', 'rediss://')):
+        backend = sharding.RedisBackend.from_url(args.state)
+    elif args.state or args.processes > 1:
+        backend = sharding.SQLiteBackend(args.state or args.db + '.state')
+
+    async def _run():
+        session = TrendsSession(proxy=args.proxy) if backend is None else sharding.shared_session(
+            backend, proxy=args.proxy,
+        )
+        async with session:
+            return await Backfill(
+                store, session=session, max_concurrency=args.concurrency, overlap=args.overlap,
+            ).run(jobs)
+
+    if args.processes > 1:
+        stats = sharding.run_sharded(
+            jobs, args.db, backend,
+            processes=args.processes,
+            session_factory=functools.partial(sharding.shared_session, proxy=args.proxy),
+            max_concurrency=args.concurrency,
+            overlap=args.overlap,
+        )
+    store = CheckpointStore(args.db)
+    try:
+        if args.processes <= 1:
+            stats = asyncio.run(_run())
+        logger.info(f'Backfill done: {stats}')
+
+        backfill = Backfill(store, overlap=args.overlap)
+        if args.output:
+            # Points written by previous runs are not written again
+            exported = last_timestamps(args.output) if args.append else {}
+            with open_sink(args.output, append=args.append) as sink:
+                for job in jobs:
+                    try:
+                        series = backfill.series(job, as_series=True)
+                    except ValueError as e:
+                        logger.warning(str(e))
+                        continue
+                    last_ts = exported.get((job.keyword, job.geo, job.frequency))
+                    if last_ts is not None:
+                        series = series[bisect.bisect_right(series.timestamps, last_ts):]
+                    sink.write(job.keyword, series, geo=job.geo, frequency=job.frequency)
+    finally:
+        store.close()
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == '__main__':
+    # Run the main of the imported module, whose jobs can be pickled for the processes of run_sharded
+    from google_trends_api.backfill import main as _main
+
+    raise SystemExit(_main())
@@ -0,0 +1,207 @@
+"""
+Caches of decoded Google Trends responses
+"""
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+
+# Version of the format of cached values, parsing.Timeline.to_json()
+CACHE_FORMAT = 2
+
+
+def window_key(
+        keyword: str,
+        geo: str,
+        timezone_offset: int,
+        start_dt: datetime,
+        end_dt: datetime,
+        frequency: str,
+        host_language: str,
+) -> str:
+    """
+    Cache key of a custom time range request. It includes the format of cached values, so that values cached in an
+    older format are never read, and get evicted.
+    """
+    return json.dumps([
+        CACHE_FORMAT, keyword, geo, timezone_offset, start_dt.isoformat(), end_dt.isoformat(), frequency, host_language,
+    ])
+
+
+class ResponseCache:
+    """
+    Base class of response caches. Values must be json serializable.
+
+    :param max_entries: Least recently used entries are evicted once there are more entries than this.
+    :param recent_ttl: Seconds to keep a response whose time range is not entirely in the past.
+        Responses of closed time ranges never change, so they are kept until evicted.
+    """
+
+    def __init__(self, max_entries: int = 100_000, recent_ttl: float = 600):
+        self.max_entries = max_entries
+        self.recent_ttl = recent_ttl
+
+    def get(self, key: str):
+        """
+        @return: cached value, None if key is missing or expired.
+        """
+        raise NotImplementedError
+
+    def set(self, key: str, value, ttl: float = None):
+        """
+        :param ttl: Seconds before the entry expires. None means never.
+        """
+        raise NotImplementedError
+
+    def ttl_for(self, end_dt: datetime):
+        """
+        TTL of a response whose time range ends at end_dt.
+        """
+        return None if end_dt <= datetime.now(tz=end_dt.tzinfo) else self.recent_ttl
+
+
+class MemoryCache(ResponseCache):
+    """
+    In process LRU cache.
+    """
+
+    def __init__(self, max_entries: int = 10_000, recent_ttl: float = 600):
+        super().__init__(max_entries, recent_ttl)
+        self._entries = OrderedDict()
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value, ttl: float = None):
+        self._entries[key] = (value, None if ttl is None else time.time() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class SQLiteCache(ResponseCache):
+    """
+    On-disk LRU cache backed by a SQLite database, shared between runs.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000, recent_ttl: float = 600):
+        super().__init__(max_entries, recent_ttl)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL, accessed_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+        self._conn.commit()
+
+    def get(self, key: str):
+        now = time.time()
+        row = self._conn.execute('SELECT value, expires_at FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= now:
+            self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            self._conn.commit()
+            return None
+        self._conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+        self._conn.commit()
+        return json.loads(value)
+
+    def set(self, key: str, value, ttl: float = None):
+        now = time.time()
+        self._conn.execute(
+            'INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+            (key, json.dumps(value), None if ttl is None else now + ttl, now),
+        )
+        self._conn.execute(
+            'DELETE FROM responses WHERE key IN '
+            '(SELECT key FROM responses ORDER BY accessed_at DESC, rowid DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,),
+        )
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+def token_key(request: dict, timezone_offset: int, host_language: str) -> str:
+    """
+    Key of the widgets of an explore request: its comparisonItem (keywords, geos and time ranges), tz and hl.
+    """
+    return json.dumps([request, timezone_offset, host_language], sort_keys=True)
+
+
+class TokenCache:
+    """
+    In process cache of the widgets returned by explore requests, with their tokens.
+    Widget data of a recently explored request, e.g. a repeated or retried window, is then fetched
+    without exploring it again, halving requests and sparing the explore endpoint, which is the most rate limited.
+
+    Google expires tokens after a while, so entries expire after ttl.
+    The entry of a token rejected by a widget data endpoint is invalidated, and the request explored again.
+    """
+
+    def __init__(self, ttl: float = 300, max_entries: int = 10_000):
+        """
+        :param ttl: Seconds widgets are reused, less than the lifetime of tokens.
+        :param max_entries: Least recently used entries are evicted once there are more entries than this.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (widgets, expires_at)
+        self._keys = {}  # token -> key
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str):
+        """
+        @return: cached widgets, None if key is missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        widgets, expires_at = entry
+        if expires_at <= time.time():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return widgets
+
+    def set(self, key: str, widgets: list):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (widgets, time.time() + self.ttl)
+        for widget in widgets:
+            self._keys[widget['token']] = key
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, token: str) -> bool:
+        """
+        Remove the widgets a token belongs to.
+
+        @return: whether the token was cached.
+        """
+        key = self._keys.get(token)
+        if key is None:
+            return False
+        self._remove(key)
+        return True
+
+    def _remove(self, key: str):
+        widgets, _ = self._entries.pop(key)
+        for widget in widgets:
+            if self._keys.get(widget['token']) == key:
+                del self._keys[widget['token']]
@@ -4,6 +4,8 @@ import datetime
 class API:
     EXPLORE = 'https://trends.google.com/trends/api/explore'
     TRENDS_OVER_TIME = 'https://trends.google.com/trends/api/widgetdata/multiline'
+    COMPARED_GEO = 'https://trends.google.com/trends/api/widgetdata/comparedgeo'
+    RELATED_SEARCHES = 'https://trends.google.com/trends/api/widgetdata/relatedsearches'
 
 
 class WidgetId:
@@ -13,6 +15,13 @@ class WidgetId:
     RELATED_QUERIES = 'RELATED_QUERIES'
 
 
+class Resolution:
+    COUNTRY = 'COUNTRY'
+    REGION = 'REGION'
+    CITY = 'CITY'
+    DMA = 'DMA'
+
+
 class Frequency:
     DAILY = 'daily'
     HOURLY = 'hourly'
@@ -0,0 +1,52 @@
+"""
+Pool of Google NID cookies reused across requests
+"""
+import asyncio
+import time
+from collections import defaultdict
+from typing import Awaitable, Callable
+
+
+class CookiePool:
+    """
+    Keep up to `size` NID cookies per key (e.g. per proxy) and hand them out round robin.
+    Cookies are fetched lazily, refreshed once older than max_age, and dropped on 429 by discard.
+    """
+
+    def __init__(self, size: int = 1, max_age: float = 6 * 3600):
+        """
+        :param size: Number of cookies kept per key.
+        :param max_age: Seconds before a cookie is replaced by a fresh one.
+        """
+        self.size = size
+        self.max_age = max_age
+        self._entries = defaultdict(list)  # key -> [(cookies, created_at)]
+        self._next = defaultdict(int)
+        self._locks = {}
+
+    async def get(self, fetch: Callable[[], Awaitable[dict]], key=None) -> dict:
+        """
+        :param fetch: Coroutine function fetching new cookies, e.g. _api.get_cookies.
+        :param key: Pool to use, e.g. the proxy cookies are fetched through.
+        """
+        entries = self._entries[key]
+        now = time.monotonic()
+        entries[:] = [e for e in entries if now - e[1] < self.max_age]
+
+        if len(entries) < self.size:
+            async with self._locks.setdefault(key, asyncio.Lock()):
+                # Someone else may have filled the pool while waiting for the lock
+                if len(entries) < self.size:
+                    cookies = await fetch()
+                    entries.append((cookies, time.monotonic()))
+                    return cookies
+
+        index = self._next[key] % len(entries)
+        self._next[key] += 1
+        return entries[index][0]
+
+    def discard(self, cookies: dict, key=None):
+        """
+        Drop cookies from the pool, so that a fresh one is fetched by the next get.
+        """
+        self._entries[key][:] = [e for e in self._entries[key] if e[0] != cookies]
@@ -0,0 +1,303 @@
+"""
+Streaming export of trends series to CSV, Arrow or Parquet, a bounded row group at a time
+
+with open_sink('trends.parquet') as sink:
+    for job in jobs:
+        sink.write(job.keyword, backfill.series(job, as_series=True), geo=job.geo)
+
+table = read_table('trends.parquet')  # Memory mapped pyarrow.Table
+
+Every file has the columns keyword, geo, frequency, timestamp and value. Arrow and Parquet outputs are directories
+of part files, one per run, so that incremental runs append a part instead of rewriting the previous ones.
+They require `pip install pyarrow`, CSV has no dependency.
+"""
+import csv
+import os
+import re
+from array import array
+from typing import Dict, Iterator, Tuple
+
+from google_trends_api import constants
+from google_trends_api.series import TrendSeries
+
+COLUMNS = ('keyword', 'geo', 'frequency', 'timestamp', 'value')
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('Arrow and Parquet export requires pyarrow, `pip install pyarrow`') from None
+    return pyarrow
+
+
+class Sink:
+    """
+    Base class of sinks. Rows are buffered in compact arrays and written once row_group_size rows are buffered,
+    so memory stays bounded whatever the number of series written.
+    """
+
+    def __init__(self, row_group_size: int = 65_536):
+        """
+        :param row_group_size: Number of rows written at once, the size of Parquet row groups and Arrow batches.
+        """
+        if row_group_size < 1:
+            raise ValueError('row_group_size must be positive')
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._reset()
+
+    def _reset(self):
+        self._labels = {}  # (keyword, geo, frequency) -> index
+        self._label_rows = array('i')
+        self._timestamps = array('q')
+        self._values = array('d')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, keyword: str, series, *, geo: str = "", frequency: str = constants.Frequency.HOURLY):
+        """
+        :param series: TrendSeries or [(timestamp, value)], e.g. returned by hourly_data.
+        """
+        if not isinstance(series, TrendSeries):
+            series = TrendSeries.from_items(series)
+        label = self._labels.setdefault((keyword, geo, frequency), len(self._labels))
+
+        start = 0
+        while start < len(series):
+            stop = min(len(series), start + self.row_group_size - len(self._timestamps))
+            self._label_rows.extend(array('i', [label]) * (stop - start))
+            self._timestamps.extend(series.timestamps[start:stop])
+            self._values.extend(series.values[start:stop])
+            start = stop
+            if len(self._timestamps) >= self.row_group_size:
+                self.flush()
+                label = self._labels.setdefault((keyword, geo, frequency), len(self._labels))
+
+    def write_many(self, series: Dict[str, object], *, geo: str = "", frequency: str = constants.Frequency.HOURLY):
+        """
+        :param series: {keyword: series}, e.g. returned by hourly_data_many.
+        """
+        for keyword, keyword_series in series.items():
+            self.write(keyword, keyword_series, geo=geo, frequency=frequency)
+
+    def flush(self):
+        """
+        Write buffered rows.
+        """
+        if len(self._timestamps):
+            self._write_rows(list(self._labels), self._label_rows, self._timestamps, self._values)
+            self.rows_written += len(self._timestamps)
+            self._reset()
+
+    def _write_rows(self, labels: list, label_rows: array, timestamps: array, values: array):
+        """
+        :param labels: [(keyword, geo, frequency)] indexed by label_rows.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+
+
+class CSVSink(Sink):
+    """
+    CSV file with a header, appended to by later runs.
+    """
+
+    def __init__(self, path: str, *, append: bool = True, row_group_size: int = 65_536):
+        """
+        :param append: Append to the rows of an existing file, otherwise overwrite it.
+        """
+        super().__init__(row_group_size)
+        self.path = path
+        exists = append and os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, 'a' if exists else 'w', newline='')
+        self._writer = csv.writer(self._file)
+        if not exists:
+            self._writer.writerow(COLUMNS)
+
+    def _write_rows(self, labels, label_rows, timestamps, values):
+        self._writer.writerows((*labels[i], t, v) for i, t, v in zip(label_rows, timestamps, values))
+        self._file.flush()
+
+    def close(self):
+        super().close()
+        self._file.close()
+
+
+class _PartSink(Sink):
+    """
+    Directory of part files, a new part per sink.
+    """
+
+    suffix = None
+
+    def __init__(self, path: str, *, append: bool = True, row_group_size: int = 65_536):
+        """
+        :param path: Directory of the part files, created if missing.
+        :param append: Add a part to the existing ones, otherwise remove them.
+        """
+        pa = _pyarrow()
+        super().__init__(row_group_size)
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        parts = _parts(path, self.suffix)
+        if not append:
+            for part in parts:
+                os.remove(part)
+            parts = []
+        # Parts are numbered after the last one, so that they sort in the order they were written
+        number = int(re.search(r'(\d+)', os.path.basename(parts[-1])).group(1)) + 1 if parts else 0
+        self.part_path = os.path.join(path, f'part-{number:05d}{self.suffix}')
+        self.schema = pa.schema([
+            ('keyword', pa.string()),
+            ('geo', pa.string()),
+            ('frequency', pa.string()),
+            ('timestamp', pa.int64()),
+            ('value', pa.float64()),
+        ])
+        self._part_writer = None
+
+    def _batch(self, labels, label_rows, timestamps, values):
+        pa = _pyarrow()
+        indices = pa.Array.from_buffers(pa.int32(), len(label_rows), [None, pa.py_buffer(label_rows)])
+        # Plain strings, Arrow files can't change dictionaries between batches and Parquet dictionary encodes anyway
+        return pa.record_batch(
+            [
+                pa.array([label[column] for label in labels], pa.string()).take(indices)
+                for column in range(3)
+            ] + [
+                pa.Array.from_buffers(pa.int64(), len(timestamps), [None, pa.py_buffer(timestamps)]),
+                pa.Array.from_buffers(pa.float64(), len(values), [None, pa.py_buffer(values)]),
+            ],
+            schema=self.schema,
+        )
+
+    def close(self):
+        super().close()
+        if self._part_writer is not None:
+            self._part_writer.close()
+            self._part_writer = None
+
+
+class ArrowSink(_PartSink):
+    """
+    Directory of Arrow IPC (Feather v2) files, a record batch per row group. Read back memory mapped, without copy.
+    """
+
+    suffix = '.arrow'
+
+    def _write_rows(self, labels, label_rows, timestamps, values):
+        pa = _pyarrow()
+        if self._part_writer is None:
+            self._part_writer = pa.ipc.new_file(self.part_path, self.schema)
+        self._part_writer.write_batch(self._batch(labels, label_rows, timestamps, values))
+
+
+class ParquetSink(_PartSink):
+    """
+    Directory of Parquet files, compressed, a row group per flush.
+    """
+
+    suffix = '.parquet'
+
+    def __init__(self, path: str, *, append: bool = True, row_group_size: int = 65_536, compression: str = 'zstd'):
+        """
+        :param compression: Parquet codec, e.g. 'zstd', 'snappy' or 'none'.
+        """
+        super().__init__(path, append=append, row_group_size=row_group_size)
+        self.compression = compression
+
+    def _write_rows(self, labels, label_rows, timestamps, values):
+        pa = _pyarrow()
+        if self._part_writer is None:
+            self._part_writer = pa.parquet.ParquetWriter(self.part_path, self.schema, compression=self.compression)
+        self._part_writer.write_batch(self._batch(labels, label_rows, timestamps, values))
+
+
+def open_sink(path: str, *, append: bool = True, row_group_size: int = 65_536) -> Sink:
+    """
+    Sink of the format of path: a .parquet or .arrow directory, CSV otherwise.
+    """
+    if path.rstrip('/').endswith('.parquet'):
+        return ParquetSink(path, append=append, row_group_size=row_group_size)
+    if path.rstrip('/').endswith(('.arrow', '.feather')):
+        return ArrowSink(path, append=append, row_group_size=row_group_size)
+    return CSVSink(path, append=append, row_group_size=row_group_size)
+
+
+def _parts(path: str, suffix: str) -> list:
+    return sorted(
+        os.path.join(path, name) for name in os.listdir(path) if name.startswith('part-') and name.endswith(suffix)
+    )
+
+
+def read_table(path: str):
+    """
+    Read an export as a pyarrow.Table. Arrow parts are memory mapped without copy and Parquet parts are read
+    through memory maps, so the page cache holds the data instead of the heap.
+    """
+    pa = _pyarrow()
+    if os.path.isdir(path):
+        if _parts(path, '.parquet'):
+            return pa.concat_tables(pa.parquet.read_table(part, memory_map=True) for part in _parts(path, '.parquet'))
+        return pa.concat_tables(
+            pa.ipc.open_file(pa.memory_map(part)).read_all() for part in _parts(path, '.arrow')
+        )
+    import pyarrow.csv
+    return pyarrow.csv.read_csv(path)
+
+
+def last_timestamps(path: str) -> Dict[Tuple[str, str, str], int]:
+    """
+    Last timestamp of every series of an export, so that incremental runs only append newer points.
+
+    @return: {(keyword, geo, frequency): timestamp}, empty if path does not exist
+    """
+    last = {}
+    if not os.path.exists(path):
+        return last
+    for keyword, geo, frequency, timestamp, _ in _rows(path):
+        label = (keyword, geo, frequency)
+        last[label] = max(last.get(label, timestamp), timestamp)
+    return last
+
+
+def iter_series(path: str) -> Iterator[Tuple[str, str, str, TrendSeries]]:
+    """
+    Read an export back series by series, streaming rows. CSV exports don't require pyarrow.
+
+    @return: yield (keyword, geo, frequency, TrendSeries) of every run of consecutive rows of the same series.
+        A series appended to by an incremental run is yielded once more if other series were written in between.
+    """
+    label, series = None, None
+    for keyword, geo, frequency, timestamp, value in _rows(path):
+        if (keyword, geo, frequency) != label:
+            if label is not None:
+                yield (*label, series)
+            label, series = (keyword, geo, frequency), TrendSeries()
+        series.append(timestamp, value)
+    if label is not None:
+        yield (*label, series)
+
+
+def _rows(path: str):
+    if not os.path.isdir(path):
+        with open(path, newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for keyword, geo, frequency, timestamp, value in reader:
+                yield keyword, geo, frequency, int(timestamp), float(value)
+        return
+
+    if not (_parts(path, '.parquet') or _parts(path, '.arrow')):
+        return
+    for batch in read_table(path).to_batches():
+        yield from zip(*(batch.column(name).to_pylist() for name in COLUMNS))
@@ -0,0 +1,252 @@
+"""
+Instrumentation of Google Trends requests
+
+Every TrendsSession emits events to its hooks: one RequestEvent per http request, one ParseEvent per parsed response,
+one CacheEvent per window looked up in the cache and one RetryEvent per retry after a 429 or a rejected cached token.
+
+stats = StatsHooks()
+async with TrendsSession(hooks=[stats, PrometheusHooks()]) as session:
+    await hourly_data('nft', start_dt, end_dt, session=session)
+print(stats.summary())
+"""
+from collections import defaultdict
+from typing import List
+
+
+class RequestEvent:
+    """
+    :ivar endpoint: 'cookies', 'explore', 'multiline', 'comparedgeo' or 'relatedsearches'.
+    :ivar status: http status code, None if the request failed before getting a response.
+    :ivar latency: Seconds between sending the request and receiving the whole response.
+    :ivar bytes: Size of the response body.
+    :ivar rate_limit_wait: Seconds the request waited for the rate limiter before being sent.
+    :ivar proxy: Url of the proxy the request went through, None without proxy pool.
+    """
+
+    hook = 'on_request'
+    __slots__ = ('endpoint', 'status', 'latency', 'bytes', 'rate_limit_wait', 'proxy')
+
+    def __init__(self, endpoint: str, status: int, latency: float, bytes: int, rate_limit_wait: float, proxy: str):
+        self.endpoint = endpoint
+        self.status = status
+        self.latency = latency
+        self.bytes = bytes
+        self.rate_limit_wait = rate_limit_wait
+        self.proxy = proxy
+
+
+class ParseEvent:
+    """
+    :ivar endpoint: 'explore', 'multiline', 'comparedgeo' or 'relatedsearches'.
+    :ivar seconds: Seconds spent decoding the response.
+    """
+
+    hook = 'on_parse'
+    __slots__ = ('endpoint', 'seconds')
+
+    def __init__(self, endpoint: str, seconds: float):
+        self.endpoint = endpoint
+        self.seconds = seconds
+
+
+class CacheEvent:
+    """
+    :ivar key: Cache key of the window.
+    :ivar hit: Whether the window was found in the cache.
+    """
+
+    hook = 'on_cache'
+    __slots__ = ('key', 'hit')
+
+    def __init__(self, key: str, hit: bool):
+        self.key = key
+        self.hit = hit
+
+
+class RetryEvent:
+    """
+    :ivar fn: Name of the retried function.
+    :ivar attempt: Number of attempts so far.
+    :ivar retry_after: Seconds requested by the Retry-After header of the 429, None if not given.
+    :ivar elapsed: Seconds since the first attempt.
+    """
+
+    hook = 'on_retry'
+    __slots__ = ('fn', 'attempt', 'retry_after', 'elapsed')
+
+    def __init__(self, fn: str, attempt: int, retry_after: float, elapsed: float):
+        self.fn = fn
+        self.attempt = attempt
+        self.retry_after = retry_after
+        self.elapsed = elapsed
+
+
+class Hooks:
+    """
+    Base class of hooks, every method does nothing. Override the ones you need.
+    Hooks are called synchronously from the event loop, so they must be fast and never block.
+    """
+
+    def on_request(self, event: RequestEvent):
+        pass
+
+    def on_parse(self, event: ParseEvent):
+        pass
+
+    def on_cache(self, event: CacheEvent):
+        pass
+
+    def on_retry(self, event: RetryEvent):
+        pass
+
+
+def emit(hooks: List[Hooks], event):
+    for hook in hooks:
+        getattr(hook, event.hook)(event)
+
+
+class StatsHooks(Hooks):
+    """
+    Aggregate events in memory, without any dependency.
+    """
+
+    def __init__(self):
+        self.requests = defaultdict(int)  # (endpoint, status) -> count
+        self.latency = defaultdict(float)  # endpoint -> seconds
+        self.bytes = defaultdict(int)  # endpoint -> bytes
+        self.parse_seconds = defaultdict(float)  # endpoint -> seconds
+        self.rate_limit_wait = 0.0
+        self.retries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def on_request(self, event: RequestEvent):
+        self.requests[event.endpoint, event.status] += 1
+        self.latency[event.endpoint] += event.latency
+        self.bytes[event.endpoint] += event.bytes
+        self.rate_limit_wait += event.rate_limit_wait
+
+    def on_parse(self, event: ParseEvent):
+        self.parse_seconds[event.endpoint] += event.seconds
+
+    def on_cache(self, event: CacheEvent):
+        if event.hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+
+    def on_retry(self, event: RetryEvent):
+        self.retries += 1
+
+    def summary(self) -> dict:
+        """
+        @return: totals of where time went: network, rate limit waits and parsing.
+        """
+        return {
+            'requests': sum(self.requests.values()),
+            'rate_limited': sum(n for (_, status), n in self.requests.items() if status == 429),
+            'network_seconds': sum(self.latency.values()),
+            'rate_limit_wait_seconds': self.rate_limit_wait,
+            'parse_seconds': sum(self.parse_seconds.values()),
+            'bytes': sum(self.bytes.values()),
+            'retries': self.retries,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+class PrometheusHooks(Hooks):
+    """
+    Export events as prometheus_client metrics. Requires `pip install prometheus_client`.
+    """
+
+    def __init__(self, registry=None, prefix: str = 'google_trends'):
+        """
+        :param registry: prometheus_client.CollectorRegistry, the default registry if not specified.
+        :param prefix: Prefix of metric names.
+        """
+        try:
+            import prometheus_client as prom
+        except ImportError:
+            raise ImportError('PrometheusHooks requires prometheus_client, `pip install prometheus_client`') from None
+        registry = registry or prom.REGISTRY
+
+        self._requests = prom.Counter(
+            f'{prefix}_requests', 'Requests to Google Trends', ['endpoint', 'status'], registry=registry,
+        )
+        self._latency = prom.Histogram(
+            f'{prefix}_request_seconds', 'Latency of requests', ['endpoint'], registry=registry,
+        )
+        self._bytes = prom.Counter(
+            f'{prefix}_response_bytes', 'Size of response bodies', ['endpoint'], registry=registry,
+        )
+        self._rate_limit_wait = prom.Counter(
+            f'{prefix}_rate_limit_wait_seconds', 'Seconds waited for the rate limiter', registry=registry,
+        )
+        self._parse = prom.Counter(
+            f'{prefix}_parse_seconds', 'Seconds spent decoding responses', ['endpoint'], registry=registry,
+        )
+        self._cache = prom.Counter(
+            f'{prefix}_cache_lookups', 'Window cache lookups', ['result'], registry=registry,
+        )
+        self._retries = prom.Counter(
+            f'{prefix}_retries', 'Retries after a 429', ['fn'], registry=registry,
+        )
+
+    def on_request(self, event: RequestEvent):
+        self._requests.labels(event.endpoint, str(event.status)).inc()
+        self._latency.labels(event.endpoint).observe(event.latency)
+        self._bytes.labels(event.endpoint).inc(event.bytes)
+        self._rate_limit_wait.inc(event.rate_limit_wait)
+
+    def on_parse(self, event: ParseEvent):
+        self._parse.labels(event.endpoint).inc(event.seconds)
+
+    def on_cache(self, event: CacheEvent):
+        self._cache.labels('hit' if event.hit else 'miss').inc()
+
+    def on_retry(self, event: RetryEvent):
+        self._retries.labels(event.fn).inc()
+
+
+class OpenTelemetryHooks(Hooks):
+    """
+    Export events as OpenTelemetry metrics. Requires `pip install opentelemetry-api` and a configured MeterProvider.
+    """
+
+    def __init__(self, meter=None, prefix: str = 'google_trends'):
+        """
+        :param meter: opentelemetry.metrics.Meter, a meter of the global MeterProvider if not specified.
+        :param prefix: Prefix of instrument names.
+        """
+        try:
+            from opentelemetry import metrics
+        except ImportError:
+            raise ImportError('OpenTelemetryHooks requires opentelemetry-api, `pip install opentelemetry-api`') from None
+        meter = meter or metrics.get_meter('google_trends_api')
+
+        self._requests = meter.create_counter(f'{prefix}.requests', description='Requests to Google Trends')
+        self._latency = meter.create_histogram(f'{prefix}.request.duration', unit='s', description='Latency of requests')
+        self._bytes = meter.create_counter(f'{prefix}.response.size', unit='By', description='Size of response bodies')
+        self._rate_limit_wait = meter.create_counter(
+            f'{prefix}.rate_limit.wait', unit='s', description='Seconds waited for the rate limiter',
+        )
+        self._parse = meter.create_counter(f'{prefix}.parse.duration', unit='s', description='Seconds spent decoding')
+        self._cache = meter.create_counter(f'{prefix}.cache.lookups', description='Window cache lookups')
+        self._retries = meter.create_counter(f'{prefix}.retries', description='Retries after a 429')
+
+    def on_request(self, event: RequestEvent):
+        attributes = {'endpoint': event.endpoint, 'status': str(event.status)}
+        self._requests.add(1, attributes)
+        self._latency.record(event.latency, {'endpoint': event.endpoint})
+        self._bytes.add(event.bytes, {'endpoint': event.endpoint})
+        self._rate_limit_wait.add(event.rate_limit_wait)
+
+    def on_parse(self, event: ParseEvent):
+        self._parse.add(event.seconds, {'endpoint': event.endpoint})
+
+    def on_cache(self, event: CacheEvent):
+        self._cache.add(1, {'result': 'hit' if event.hit else 'miss'})
+
+    def on_retry(self, event: RetryEvent):
+        self._retries.add(1, {'fn': event.fn})
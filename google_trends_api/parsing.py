@@ -0,0 +1,139 @@
+"""
+Decoding of Google Trends responses straight from bytes
+"""
+import bisect
+import json
+from array import array
+from typing import List
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, msgspec or the json module decode then
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def strip_xssi(content: bytes) -> memoryview:
+    """
+    View of content without the ")]}'," line Google prefixes json with against JSON hijacking, without copying.
+    """
+    view = memoryview(content)
+    if view[:1] == b')':
+        newline = content.find(b'\n', 0, 8)
+        if newline != -1:
+            return view[newline + 1:]
+    return view
+
+
+def loads(content: bytes):
+    """
+    Decode a json response, with its XSSI prefix, by the fastest decoder installed.
+    """
+    data = strip_xssi(content)
+    if orjson is not None:
+        return orjson.loads(data)
+    if msgspec is not None:
+        return msgspec.json.decode(data)
+    return json.loads(bytes(data))
+
+
+class Timeline:
+    """
+    Points of a multiline response, only where the first keyword has data.
+    Timestamps are stored as int64 and values of every keyword as float64, row major.
+    """
+
+    __slots__ = ('timestamps', 'values', 'width')
+
+    def __init__(self, timestamps=(), values=(), width: int = 1):
+        """
+        :param width: Number of keywords compared by the response.
+        """
+        self.timestamps = array('q', timestamps)
+        self.values = array('d', values)
+        self.width = width
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def rows(self, end_ts: int = None):
+        """
+        @return: yield (timestamp, [value of every keyword]) of points before end_ts.
+        """
+        end = len(self.timestamps) if end_ts is None else bisect.bisect_left(self.timestamps, end_ts)
+        width = self.width
+        for i in range(end):
+            yield self.timestamps[i], self.values[i * width:(i + 1) * width].tolist()
+
+    def to_json(self) -> dict:
+        """
+        Json serializable form, e.g. to be cached.
+        """
+        return {'timestamps': self.timestamps.tolist(), 'values': self.values.tolist(), 'width': self.width}
+
+    @classmethod
+    def from_json(cls, js: dict) -> 'Timeline':
+        return cls(js['timestamps'], js['values'], js['width'])
+
+
+if msgspec is not None:
+    class _Point(msgspec.Struct):
+        time: str
+        value: list
+        hasData: list
+
+    class _Default(msgspec.Struct):
+        timelineData: List[_Point]
+
+    class _Multiline(msgspec.Struct):
+        default: _Default
+
+    _multiline_decoder = msgspec.json.Decoder(_Multiline)
+
+
+def _points(content: bytes) -> list:
+    """
+    @return: [(time, value, hasData)] of the points of a multiline response, other fields are skipped.
+    """
+    data = strip_xssi(content)
+    if msgspec is not None:
+        # Only decodes the fields of the structs above
+        return [(p.time, p.value, p.hasData) for p in _multiline_decoder.decode(data).default.timelineData]
+    js = orjson.loads(data) if orjson is not None else json.loads(bytes(data))
+    return [(p['time'], p['value'], p['hasData']) for p in js['default']['timelineData']]
+
+
+def parse_timeline(content: bytes) -> Timeline:
+    """
+    Decode a multiline response into a Timeline. Fields other than time, value and hasData are skipped.
+    """
+    points = _points(content)
+    timeline = Timeline(width=len(points[0][1]) if points else 1)
+    timestamps, values = timeline.timestamps, timeline.values
+    for time, value, has_data in points:
+        if has_data[0]:
+            timestamps.append(int(time))
+            values.extend(value)
+    return timeline
+
+
+def parse_windows(content: bytes, starts: List[int], step: int) -> List[Timeline]:
+    """
+    Decode a multiline response comparing several time ranges of one keyword into a Timeline per range.
+    Points of the ranges are aligned by index and only carry the time of the first range,
+    so timestamps of every range are rebuilt from its start.
+
+    :param starts: Timestamp of the first point of every range.
+    :param step: Seconds between points.
+    """
+    timelines = [Timeline() for _ in starts]
+    for i, (_, value, has_data) in enumerate(_points(content)):
+        for timeline, start, v, has in zip(timelines, starts, value, has_data):
+            if has:
+                timeline.timestamps.append(start + i * step)
+                timeline.values.append(v)
+    return timelines
@@ -0,0 +1,259 @@
+"""
+Near real time minute data of a watch list of keywords, from the 'now 1-H' and 'now 4-H' time ranges
+
+poller = Poller(['bitcoin', 'nft'], interval=60, budget=60)
+async for update in poller:
+    dashboard.upsert(update.keyword, update.points)
+
+Every poll of a keyword is rescaled onto its previous poll through their overlapped minutes,
+so that points of a keyword stay comparable across polls.
+"""
+import asyncio
+import inspect
+import time
+from datetime import timezone
+from typing import Callable, Dict, List
+
+from loguru import logger
+
+from google_trends_api import _api, constants
+from google_trends_api import _from_widgets
+from google_trends_api.session import TrendsSession, session_scope
+from google_trends_api.stitching import Stitcher
+
+# Explore and multiline
+REQUESTS_PER_POLL = 2
+
+
+class PollUpdate:
+    """
+    :ivar keyword: Polled keyword.
+    :ivar points: [(timestamp, value)] new or changed since the previous poll, on the scale of the first poll.
+        Timestamps are the start of every minute.
+    :ivar ratio: Factor the values of this poll have been scaled by.
+    :ivar continuous: False if this poll does not overlap the previous one, e.g. after a long outage.
+        Its values then start a new scale.
+    """
+
+    __slots__ = ('keyword', 'points', 'ratio', 'continuous')
+
+    def __init__(self, keyword: str, points: List[tuple], ratio: float, continuous: bool):
+        self.keyword = keyword
+        self.points = points
+        self.ratio = ratio
+        self.continuous = continuous
+
+    def __repr__(self):
+        return f'PollUpdate({self.keyword!r}, <{len(self.points)} points>, ratio={self.ratio:.3f})'
+
+
+class _KeywordState:
+    __slots__ = ('group', 'ratio', 'due')
+
+    def __init__(self, due: float):
+        self.group = []  # (timestamp, [value]) of the last poll, not scaled
+        self.ratio = 1.0
+        self.due = due
+
+
+class Poller:
+    """
+    Poll a watch list of keywords forever, spreading polls so that they never exceed a request budget.
+    Every keyword is polled every refresh_interval seconds: interval, or longer if the budget can't afford it.
+
+    Updates are passed to on_update if given, otherwise iterate the poller to get them.
+    """
+
+    def __init__(
+            self,
+            keywords: List[str] = (),
+            *,
+            interval: float = 60,
+            budget: float = 60,
+            time_range: str = None,
+            max_concurrency: int = 4,
+            on_update: Callable[[PollUpdate], None] = None,
+            geo: str = "",
+            tz: timezone = None,
+            host_language: str = "en-US",
+            retries: int = 2,
+            timeout: int = 60,
+            session: TrendsSession = None,
+    ):
+        """
+        :param keywords: Initial watch list, see watch and unwatch.
+        :param interval: Seconds between polls of a keyword.
+        :param budget: Maximum number of requests per minute, REQUESTS_PER_POLL per poll.
+        :param time_range: constants.TimeRange.PAST_1H or PAST_4H. Defaults to PAST_1H if keywords are polled
+            at least every 30 minutes, so that consecutive polls overlap by half of it, PAST_4H otherwise.
+        :param max_concurrency: Maximum number of polls in flight.
+        :param on_update: Function or coroutine function receiving every update.
+        :param retries: Retries of a poll hitting the rate limit. A poll still failing is logged and skipped.
+        :param session: Session shared by all polls. A session is created and closed by run if not specified.
+
+        Other params are the same as hourly_data.
+        """
+        self.interval = interval
+        self.budget = budget
+        self.time_range = time_range
+        self.on_update = on_update
+        self.geo = geo
+        self.tz = tz or timezone.utc
+        self.host_language = host_language
+        self.retries = retries
+        self.timeout = timeout
+        self.session = session
+        self._states: Dict[str, _KeywordState] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._next_slot = 0.0
+        self._wakeup = asyncio.Event()
+        self._updates = asyncio.Queue()
+        self._stopped = False
+        for keyword in keywords:
+            self.watch(keyword)
+
+    @property
+    def keywords(self) -> List[str]:
+        return list(self._states)
+
+    @property
+    def spacing(self) -> float:
+        """
+        Minimum seconds between the starts of two polls, to stay within budget.
+        """
+        return 60 * REQUESTS_PER_POLL / self.budget
+
+    @property
+    def refresh_interval(self) -> float:
+        """
+        Seconds between polls of a keyword, given the number of watched keywords and the budget.
+        """
+        return max(self.interval, len(self._states) * self.spacing)
+
+    def _time_range(self) -> str:
+        if self.time_range is not None:
+            return self.time_range
+        return constants.TimeRange.PAST_1H if self.refresh_interval <= 30 * 60 else constants.TimeRange.PAST_4H
+
+    def watch(self, keyword: str):
+        """
+        Add keyword to the watch list, polled as soon as the budget allows.
+        """
+        if keyword not in self._states:
+            self._states[keyword] = _KeywordState(due=time.monotonic())
+            self._wakeup.set()
+
+    def unwatch(self, keyword: str):
+        self._states.pop(keyword, None)
+
+    def stop(self):
+        """
+        Stop run after the polls in flight, and end iterations.
+        """
+        self._stopped = True
+        self._wakeup.set()
+
+    async def poll(self, keyword: str, session: TrendsSession = None) -> PollUpdate:
+        """
+        Poll keyword once, now, and rescale it onto its previous poll.
+        """
+        state = self._states.get(keyword) or _KeywordState(due=time.monotonic())
+        timeline = await _from_widgets(
+            keyword, None, None, self.tz,
+            lambda widgets, tz_offset, _session: _api.interest_over_time_timeline(
+                cookies=None,
+                widgets=widgets,
+                timezone_offset=tz_offset,
+                host_language=self.host_language,
+                session=_session,
+            ),
+            time_range=self._time_range(), cookies=None, geo=self.geo, host_language=self.host_language,
+            retries=self.retries, timeout=self.timeout, session=session or self.session,
+        )
+        group = list(timeline.rows())
+        return self._update(keyword, state, group)
+
+    def _update(self, keyword: str, state: _KeywordState, group: list) -> PollUpdate:
+        previous = {t: values[0] for t, values in state.group}
+        continuous = True
+        if not group:
+            return PollUpdate(keyword, [], state.ratio, continuous)
+        try:
+            ratio = Stitcher().fit(state.group, state.ratio, group).ratio
+        except ValueError:
+            logger.warning(f'Poll of {keyword!r} does not overlap its previous poll, starting a new scale')
+            ratio, continuous, previous = 1.0, False, {}
+
+        points = []
+        for t, values in group:
+            value = values[0]
+            # A point changed if it differs by a rounding unit of this poll from its previous value.
+            # Stitcher never fits a ratio of 0, the guard only keeps a bad fit from failing every later poll
+            if t not in previous or ratio <= 0 or abs(previous[t] * state.ratio / ratio - value) >= 1:
+                points.append((t, value * ratio))
+        if keyword in self._states:
+            state.group, state.ratio = group, ratio
+        return PollUpdate(keyword, points, ratio, continuous)
+
+    async def run(self):
+        """
+        Poll watched keywords until stop is called.
+        """
+        async with session_scope(self.session) as session:
+            tasks = set()
+            while not self._stopped:
+                keyword = min(self._states, key=lambda k: self._states[k].due, default=None)
+                now = time.monotonic()
+                start = max(self._states[keyword].due, self._next_slot) if keyword is not None else now + self.interval
+                if start > now:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), start - now)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue  # The watch list may have changed meanwhile
+
+                await self._semaphore.acquire()
+                if keyword not in self._states:
+                    self._semaphore.release()
+                    continue
+                self._next_slot = start + self.spacing
+                self._states[keyword].due = start + self.refresh_interval
+                task = asyncio.ensure_future(self._poll(keyword, session))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks)
+        self._updates.put_nowait(None)
+
+    async def _poll(self, keyword: str, session: TrendsSession):
+        try:
+            update = await self.poll(keyword, session)
+        except Exception as e:
+            logger.error(f'Failed to poll {keyword!r}: {e!r}')
+            return
+        finally:
+            self._semaphore.release()
+
+        if self.on_update is None:
+            self._updates.put_nowait(update)
+        else:
+            result = self.on_update(update)
+            if inspect.isawaitable(result):
+                await result
+
+    async def __aiter__(self):
+        """
+        Run the poller and yield every PollUpdate, until stop is called.
+        """
+        runner = asyncio.ensure_future(self.run())
+        try:
+            while True:
+                update = await self._updates.get()
+                if update is None:
+                    break
+                yield update
+        finally:
+            self.stop()
+            await runner
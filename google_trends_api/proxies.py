@@ -0,0 +1,101 @@
+"""
+Pool of proxies spreading requests over several egress IPs
+"""
+import random
+import time
+from typing import Callable, List
+
+from google_trends_api.ratelimit import RateLimiter
+
+
+class Proxy:
+    """
+    A proxy of ProxyPool with its own rate limiter and health.
+
+    :ivar score: Exponential moving average of request outcomes, 1 healthy and 0 always failing.
+    :ivar cooldown_until: time.monotonic() before which the proxy is only used if every proxy cools down.
+    """
+
+    def __init__(self, url: str, rate_limiter: RateLimiter):
+        self.url = url
+        self.rate_limiter = rate_limiter
+        self.score = 1.0
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+
+    def __repr__(self):
+        return f'Proxy({self.url!r}, score={self.score:.2f}, rate={self.rate_limiter.rate:.2f}/s)'
+
+
+class ProxyPool:
+    """
+    Round robin or health weighted selection of proxies.
+    A proxy cools down after a 429 or a network error, and is skipped while other proxies are available.
+    """
+
+    ROUND_ROBIN = 'round_robin'
+    WEIGHTED = 'weighted'
+
+    def __init__(
+            self,
+            proxies: List[str],
+            *,
+            strategy: str = ROUND_ROBIN,
+            cooldown: float = 60,
+            smoothing: float = 0.1,
+            rate_limiter_factory: Callable[[], RateLimiter] = RateLimiter,
+    ):
+        """
+        :param proxies: Proxy urls, e.g. ['http://localhost:1234', 'socks5://localhost:1235']
+        :param strategy: ProxyPool.ROUND_ROBIN or ProxyPool.WEIGHTED (by health score).
+        :param cooldown: Minimum seconds a proxy is skipped after a 429 or a network error.
+        :param smoothing: Weight of the latest outcome in the health score.
+        :param rate_limiter_factory: Creates the rate limiter of every proxy.
+        """
+        if not proxies:
+            raise ValueError('proxies must not be empty')
+        if strategy not in (self.ROUND_ROBIN, self.WEIGHTED):
+            raise ValueError(f'Unknown strategy {strategy}')
+
+        self.proxies = [Proxy(url, rate_limiter_factory()) for url in proxies]
+        self.strategy = strategy
+        self.cooldown = cooldown
+        self.smoothing = smoothing
+        self._next = 0
+
+    def acquire(self) -> Proxy:
+        """
+        Choose the proxy of the next request.
+        """
+        now = time.monotonic()
+        available = [p for p in self.proxies if p.cooldown_until <= now]
+        if not available:
+            return min(self.proxies, key=lambda p: p.cooldown_until)
+
+        if self.strategy == self.WEIGHTED:
+            return random.choices(available, weights=[max(p.score, 0.01) for p in available])[0]
+
+        while True:
+            proxy = self.proxies[self._next % len(self.proxies)]
+            self._next += 1
+            if proxy.cooldown_until <= now:
+                return proxy
+
+    def _record(self, proxy: Proxy, outcome: float):
+        proxy.requests += 1
+        proxy.score += (outcome - proxy.score) * self.smoothing
+
+    def on_success(self, proxy: Proxy):
+        self._record(proxy, 1)
+
+    def on_rate_limit(self, proxy: Proxy, retry_after: float = None):
+        self._record(proxy, 0)
+        proxy.rate_limited += 1
+        proxy.cooldown_until = time.monotonic() + max(self.cooldown, retry_after or 0)
+
+    def on_error(self, proxy: Proxy):
+        self._record(proxy, 0)
+        proxy.errors += 1
+        proxy.cooldown_until = time.monotonic() + self.cooldown
@@ -0,0 +1,114 @@
+"""
+Adaptive rate limiting of Google Trends requests
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class RateLimiter:
+    """
+    Token bucket whose rate adapts to Google Trends by AIMD:
+    every successful request adds `increase` to the rate, every 429 multiplies it by `decrease`
+    and pauses all requests for Retry-After seconds (or one interval of the new rate).
+
+    A single process-wide instance, `default_rate_limiter`, is shared by every session unless one is given.
+    """
+
+    # Clock of the bucket. Buckets shared between processes or hosts use time.time instead
+    _clock = staticmethod(time.monotonic)
+
+    def __init__(
+            self,
+            rate: float = 1,
+            *,
+            burst: int = 5,
+            min_rate: float = 0.05,
+            max_rate: float = 10,
+            increase: float = 0.05,
+            decrease: float = 0.5,
+    ):
+        """
+        :param rate: Initial number of requests per second.
+        :param burst: Maximum number of requests sent back to back after being idle.
+        :param min_rate: Rate never shrinks below this.
+        :param max_rate: Rate never grows above this.
+        :param increase: Requests per second added to rate after every successful request.
+        :param decrease: Factor applied to rate after every 429.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.waited = 0.0  # Total seconds spent waiting in acquire
+
+        self._tokens = float(burst)
+        self._updated = self._clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """
+        Take a token.
+
+        @return: seconds to wait before the request may be sent.
+        """
+        self._refill()
+        self._tokens -= 1
+        return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    async def acquire(self) -> float:
+        """
+        Wait until a request may be sent.
+
+        @return: seconds waited.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            self.waited += wait
+            await asyncio.sleep(wait)
+        return wait
+
+    def on_success(self):
+        self._refill()
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_rate_limit(self, retry_after: float = None):
+        """
+        :param retry_after: Seconds requested by the Retry-After header, if any.
+        """
+        self._refill()
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        pause = retry_after if retry_after is not None else 1 / self.rate
+        # Requests already waiting keep their turn, new ones queue up after the pause
+        self._tokens = min(self._tokens, 0) - pause * self.rate
+
+
+default_rate_limiter = RateLimiter()
+
+
+def parse_retry_after(value: str):
+    """
+    Parse Retry-After header, which is either seconds or a http date.
+
+    @return: seconds, None if value is missing or malformed.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return max(0.0, (dt - datetime.now(tz=timezone.utc)).total_seconds())
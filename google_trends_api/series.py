@@ -0,0 +1,233 @@
+"""
+Compact array backed trends series
+"""
+import bisect
+import math
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, arrays are scaled in python then
+    np = None
+
+
+class TrendSeries:
+    """
+    Trends values stored as two arrays: timestamps (int64) and values (float64), 16 bytes per point.
+    Iterating yields (timestamp, value) like the lists returned by hourly_data.
+
+    Scaling and normalization run in place, vectorized by numpy when it is installed.
+    """
+
+    __slots__ = ('timestamps', 'values')
+
+    def __init__(self, timestamps: Iterable[int] = (), values: Iterable[float] = ()):
+        self.timestamps = array('q', timestamps)
+        self.values = array('d', values)
+        if len(self.timestamps) != len(self.values):
+            raise ValueError('timestamps and values must have the same length')
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple[int, float]]) -> 'TrendSeries':
+        series = cls()
+        series.extend(items)
+        return series
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __iter__(self):
+        return zip(self.timestamps, self.values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return TrendSeries(self.timestamps[index], self.values[index])
+        return self.timestamps[index], self.values[index]
+
+    def __eq__(self, other):
+        if isinstance(other, TrendSeries):
+            return self.timestamps == other.timestamps and self.values == other.values
+        return NotImplemented
+
+    def __repr__(self):
+        return f'TrendSeries(<{len(self)} points>)'
+
+    def append(self, timestamp: int, value: float):
+        self.timestamps.append(timestamp)
+        self.values.append(value)
+
+    def extend(self, items: Iterable[Tuple[int, float]], ratio: float = 1):
+        """
+        Append items, every value multiplied by ratio.
+        """
+        for timestamp, value in items:
+            self.timestamps.append(timestamp)
+            self.values.append(value * ratio)
+
+    def scale(self, ratio: float):
+        """
+        Multiply every value by ratio in place.
+        """
+        if np is not None:
+            if len(self.values):
+                np.frombuffer(self.values, dtype=np.float64)[:] *= ratio
+        else:
+            self.values = array('d', (v * ratio for v in self.values))
+
+    def max(self) -> float:
+        return max(self.values)
+
+    def normalize(self, maximum: float = None):
+        """
+        Scale values in place so that maximum becomes 100.
+
+        :param maximum: Value mapped to 100. Defaults to the max value of this series.
+        """
+        self.scale(100 / (maximum if maximum is not None else self.max()))
+
+    def truncate(self, end_ts: int):
+        """
+        Drop points at or after end_ts in place.
+        """
+        index = bisect.bisect_left(self.timestamps, end_ts)
+        del self.timestamps[index:]
+        del self.values[index:]
+
+    def between(self, start_ts: int, end_ts: int) -> 'TrendSeries':
+        """
+        @return: copy of the points in [start_ts, end_ts)
+        """
+        return self[bisect.bisect_left(self.timestamps, start_ts):bisect.bisect_left(self.timestamps, end_ts)]
+
+    def to_list(self) -> list:
+        """
+        @return: [(timestamp, value)]
+        """
+        return list(self)
+
+    def to_numpy(self):
+        """
+        @return: (timestamps, values) numpy arrays sharing memory with this series.
+        """
+        if np is None:
+            raise ImportError('to_numpy requires numpy, `pip install numpy`')
+        return np.frombuffer(self.timestamps, dtype=np.int64), np.frombuffer(self.values, dtype=np.float64)
+
+    def to_pandas(self, name: str = None):
+        """
+        @return: pandas.Series indexed by UTC datetime.
+        """
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError('to_pandas requires pandas, `pip install pandas`') from None
+        timestamps, values = self.to_numpy()
+        return pd.Series(values, index=pd.to_datetime(timestamps, unit='s', utc=True), name=name)
+
+
+class TrendMatrix:
+    """
+    Series of several labels (e.g. geos) over shared timestamps, stored as one float64 array, row major:
+    a row per label and a column per timestamp. Points missing in a series are NaN.
+    """
+
+    __slots__ = ('labels', 'timestamps', 'values')
+
+    def __init__(self, labels: List[str], timestamps: Iterable[int] = (), values: Iterable[float] = ()):
+        self.labels = list(labels)
+        self.timestamps = array('q', timestamps)
+        self.values = array('d', values)
+        if len(self.values) != len(self.labels) * len(self.timestamps):
+            raise ValueError('values must have a value per label and timestamp')
+
+    @classmethod
+    def from_series(cls, series: Dict[str, TrendSeries]) -> 'TrendMatrix':
+        """
+        Align series on the union of their timestamps.
+        """
+        timestamps = sorted(set().union(*(s.timestamps for s in series.values())))
+        columns = {t: i for i, t in enumerate(timestamps)}
+        values = array('d', [math.nan]) * (len(series) * len(timestamps))
+        for row, s in enumerate(series.values()):
+            offset = row * len(timestamps)
+            for timestamp, value in s:
+                values[offset + columns[timestamp]] = value
+        return cls(list(series), timestamps, values)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __repr__(self):
+        return f'TrendMatrix(<{len(self.labels)} labels x {len(self.timestamps)} timestamps>)'
+
+    def __getitem__(self, label: str) -> TrendSeries:
+        """
+        @return: copy of the series of label, without its missing points.
+        """
+        offset = self.labels.index(label) * len(self.timestamps)
+        row = self.values[offset:offset + len(self.timestamps)]
+        return TrendSeries.from_items((t, v) for t, v in zip(self.timestamps, row) if not math.isnan(v))
+
+    def to_numpy(self):
+        """
+        @return: (timestamps, values) numpy arrays sharing memory with this matrix, values of shape (labels, timestamps).
+        """
+        if np is None:
+            raise ImportError('to_numpy requires numpy, `pip install numpy`')
+        return (
+            np.frombuffer(self.timestamps, dtype=np.int64),
+            np.frombuffer(self.values, dtype=np.float64).reshape(len(self.labels), len(self.timestamps)),
+        )
+
+    def to_pandas(self):
+        """
+        @return: pandas.DataFrame indexed by UTC datetime, with a column per label.
+        """
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError('to_pandas requires pandas, `pip install pandas`') from None
+        timestamps, values = self.to_numpy()
+        return pd.DataFrame(values.T, index=pd.to_datetime(timestamps, unit='s', utc=True), columns=self.labels)
+
+
+def anchor(fine: TrendSeries, coarse: TrendSeries) -> TrendSeries:
+    """
+    Rescale fine (e.g. hourly) so that the mean of its points within every coarse (e.g. daily) interval
+    is proportional to the coarse value. This removes the drift accumulated by stitching many fine windows.
+
+    An interval starts at a coarse timestamp and ends at the next one.
+    Partially covered intervals, at both ends usually, take the factor of the nearest fully covered interval.
+
+    @return: rescaled copy of fine, not normalized.
+    """
+    sums = [0.0] * len(coarse)
+    counts = [0] * len(coarse)
+    indexes = []
+    for timestamp, value in fine:
+        index = bisect.bisect_right(coarse.timestamps, timestamp) - 1
+        indexes.append(max(index, 0))
+        if index >= 0:  # Points before the first interval take its factor, without counting in it
+            sums[index] += value
+            counts[index] += 1
+
+    full_count = max(counts, default=0)
+    factors = [
+        coarse.values[i] * counts[i] / sums[i] if counts[i] == full_count and sums[i] > 0 else None
+        for i in range(len(coarse))
+    ]
+    # Fill intervals without factor with the nearest one, forward then backward
+    for order in (range(len(factors)), reversed(range(len(factors)))):
+        nearest = None
+        for i in order:
+            if factors[i] is None:
+                factors[i] = nearest
+            else:
+                nearest = factors[i]
+
+    result = TrendSeries()
+    for (timestamp, value), index in zip(fine, indexes):
+        factor = factors[index]
+        result.append(timestamp, value * factor if factor is not None else value)
+    return result
@@ -0,0 +1,191 @@
+"""
+Pooled http session shared by every Google Trends request
+"""
+import contextlib
+import time
+from typing import List
+
+import httpx
+
+from google_trends_api.cache import ResponseCache, TokenCache
+from google_trends_api.cookies import CookiePool
+from google_trends_api.hooks import Hooks, RequestEvent, emit
+from google_trends_api.proxies import Proxy, ProxyPool
+from google_trends_api.ratelimit import RateLimiter, default_rate_limiter, parse_retry_after
+from google_trends_api.singleflight import SingleFlight
+
+
+class TrendsSession:
+    """
+    Own one keep-alive httpx.AsyncClient so that consecutive requests reuse the same connections.
+    Concurrent calls sharing a session fetch every identical window only once, through single_flight.
+
+    async with TrendsSession() as session:
+        await hourly_data('nft', start_dt, end_dt, session=session)
+    """
+
+    def __init__(
+            self,
+            *,
+            http2: bool = False,
+            max_connections: int = 10,
+            max_keepalive_connections: int = 10,
+            keepalive_expiry: float = 30,
+            timeout: float = 30,
+            proxy: str = None,
+            transport: httpx.AsyncBaseTransport = None,
+            cache: ResponseCache = None,
+            token_cache: TokenCache = None,
+            rate_limiter: RateLimiter = None,
+            cookie_pool: CookiePool = None,
+            proxy_pool: ProxyPool = None,
+            hooks: List[Hooks] = None,
+    ):
+        """
+        :param http2: Use HTTP/2 if the server supports it. Requires `pip install httpx[http2]`.
+        :param max_connections: Maximum number of concurrent connections in the pool.
+        :param max_keepalive_connections: Maximum number of idle connections kept alive in the pool.
+        :param keepalive_expiry: Seconds an idle connection is kept alive.
+        :param timeout: Timeout of every request in seconds.
+        :param proxy: Proxy url used by every request, e.g. http://localhost:1234
+        :param transport: Custom httpx transport used instead of the network, proxies included. Mainly used by tests.
+        :param cache: Cache of window responses, e.g. SQLiteCache('trends.db'). Nothing is cached if not specified.
+        :param token_cache: Cache of explore responses, e.g. TokenCache(), so that widget data of a recently explored
+            request is fetched without exploring it again. Every request is explored if not specified.
+        :param rate_limiter: Rate limiter every request goes through. Defaults to the process-wide default_rate_limiter.
+        :param cookie_pool: Pool of NID cookies used when no cookies are given. Defaults to a pool of one cookie.
+        :param proxy_pool: Spread requests over several proxies, each with its own rate limiter and cookies.
+            Replaces proxy and rate_limiter.
+        :param hooks: Receive an event for every request, parsed response, cache lookup and retry,
+            e.g. [StatsHooks(), PrometheusHooks()].
+        """
+        self.cache = cache
+        self.token_cache = token_cache
+        self.rate_limiter = rate_limiter or default_rate_limiter
+        self.cookie_pool = cookie_pool or CookiePool()
+        self.proxy_pool = proxy_pool
+        self.single_flight = SingleFlight()
+        self.hooks = list(hooks or [])
+        self._client_kwargs = dict(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=timeout,
+            transport=transport,
+            follow_redirects=True,
+            verify=False,
+        )
+        self.client = self._make_client(proxy)
+        self._proxy_clients = {}
+
+    def _make_client(self, proxy_url: str = None) -> httpx.AsyncClient:
+        if self._client_kwargs['transport'] is not None:
+            proxy_url = None
+        return httpx.AsyncClient(proxy=proxy_url, **self._client_kwargs)
+
+    def _client_for(self, proxy: Proxy = None) -> httpx.AsyncClient:
+        if proxy is None:
+            return self.client
+        if proxy.url not in self._proxy_clients:
+            self._proxy_clients[proxy.url] = self._make_client(proxy.url)
+        return self._proxy_clients[proxy.url]
+
+    async def get(
+            self,
+            url: str,
+            *,
+            params: dict = None,
+            cookies: dict = None,
+            pooled_cookies: bool = False,
+            proxy: Proxy = None,
+            endpoint: str = None,
+    ) -> httpx.Response:
+        """
+        :param url: Url to request.
+        :param params: Query params.
+        :param cookies: Cookies sent with this request only. They are not stored in the shared cookie jar.
+        :param pooled_cookies: Send cookies of cookie_pool, fetched through the same proxy, if cookies is None.
+        :param proxy: Proxy of proxy_pool to send the request through. Chosen by proxy_pool if not specified.
+        :param endpoint: Name of the endpoint reported to hooks. Defaults to the url path.
+        """
+        if proxy is None and self.proxy_pool is not None:
+            proxy = self.proxy_pool.acquire()
+        rate_limiter = proxy.rate_limiter if proxy is not None else self.rate_limiter
+        if cookies is None and pooled_cookies:
+            cookies = await self.cookies(proxy)
+
+        headers = {}
+        if cookies:
+            headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in cookies.items())
+        rate_limit_wait = await rate_limiter.acquire()
+        started = time.perf_counter()
+        try:
+            resp = await self._client_for(proxy).get(url, params=params, headers=headers)
+        except httpx.TransportError:
+            if proxy is not None:
+                self.proxy_pool.on_error(proxy)
+            self.emit(RequestEvent(
+                endpoint or httpx.URL(url).path, None, time.perf_counter() - started, 0, rate_limit_wait,
+                proxy and proxy.url,
+            ))
+            raise
+        self.emit(RequestEvent(
+            endpoint or httpx.URL(url).path, resp.status_code, time.perf_counter() - started, len(resp.content),
+            rate_limit_wait, proxy and proxy.url,
+        ))
+
+        if resp.status_code == 429:
+            retry_after = parse_retry_after(resp.headers.get('Retry-After'))
+            rate_limiter.on_rate_limit(retry_after)
+            if proxy is not None:
+                self.proxy_pool.on_rate_limit(proxy, retry_after)
+            if cookies:
+                self.cookie_pool.discard(cookies, key=proxy and proxy.url)
+        elif resp.is_success:
+            rate_limiter.on_success()
+            if proxy is not None:
+                self.proxy_pool.on_success(proxy)
+        return resp
+
+    def emit(self, event):
+        """
+        Send event to every hook.
+        """
+        emit(self.hooks, event)
+
+    async def cookies(self, proxy: Proxy = None) -> dict:
+        """
+        NID cookies of proxy from the cookie pool, fetched only when the pool has no fresh one.
+        """
+        from google_trends_api import _api
+
+        return await self.cookie_pool.get(
+            lambda: _api.get_cookies(session=self, proxy=proxy),
+            key=proxy and proxy.url,
+        )
+
+    async def aclose(self):
+        await self.client.aclose()
+        for client in self._proxy_clients.values():
+            await client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+
+@contextlib.asynccontextmanager
+async def session_scope(session: TrendsSession = None, **kwargs):
+    """
+    Yield session if given, otherwise a temporary session created with kwargs which is closed on exit.
+    """
+    if session is not None:
+        yield session
+    else:
+        async with TrendsSession(**kwargs) as session:
+            yield session
@@ -0,0 +1,313 @@
+"""
+Sharding of backfill jobs over processes and hosts, sharing rate limit and cookie state through a backend
+
+Workers sharing a backend draw from one token bucket and back off together on 429, instead of each sending
+at full rate and causing each other's 429s.
+
+backend = SQLiteBackend('state.db')  # RedisBackend.from_url('redis://host:6379/0') for workers on several hosts
+stats = run_sharded(jobs, 'backfill.db', backend, processes=4)
+"""
+import asyncio
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable, Dict, List
+
+from google_trends_api.backfill import Backfill, BackfillJob, CheckpointStore
+from google_trends_api.cookies import CookiePool
+from google_trends_api.ratelimit import RateLimiter
+from google_trends_api.session import TrendsSession
+
+
+class StateBackend:
+    """
+    Json values shared by workers, updated atomically.
+    Calls are synchronous and short, they briefly block the event loop of the caller.
+    """
+
+    def get(self, key: str):
+        """
+        @return: value of key, None if missing.
+        """
+        raise NotImplementedError
+
+    def update(self, key: str, fn: Callable):
+        """
+        Atomically replace the value of key by fn(value), value being None if missing.
+
+        @return: the new value
+        """
+        raise NotImplementedError
+
+
+class MemoryBackend(StateBackend):
+    """
+    State shared by the threads and sessions of one process.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            value = self._values.get(key)
+            return None if value is None else json.loads(value)
+
+    def update(self, key: str, fn: Callable):
+        with self._lock:
+            value = self._values.get(key)
+            value = fn(None if value is None else json.loads(value))
+            self._values[key] = json.dumps(value)
+            return value
+
+
+class SQLiteBackend(StateBackend):
+    """
+    State shared by the processes of one host through a SQLite file, updated within exclusive transactions.
+    Picklable, every process opens its own connection.
+    """
+
+    def __init__(self, path: str, timeout: float = 30):
+        """
+        :param timeout: Seconds to wait for the lock held by another process.
+        """
+        self.path = path
+        self.timeout = timeout
+        self._conn = None
+        self._pid = None
+
+    def __getstate__(self):
+        return {'path': self.path, 'timeout': self.timeout, '_conn': None, '_pid': None}
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self._conn.execute('CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key: str):
+        row = self._connection().execute('SELECT value FROM state WHERE key = ?', (key,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def update(self, key: str, fn: Callable):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT value FROM state WHERE key = ?', (key,)).fetchone()
+            value = fn(None if row is None else json.loads(row[0]))
+            conn.execute('INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)', (key, json.dumps(value)))
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return value
+
+
+class RedisBackend(StateBackend):
+    """
+    State shared by workers on several hosts through a Redis compatible store, e.g. redis.Redis().
+    Only get, set(nx=, px=) and delete are used. Updates hold a short lock, released after lock_timeout
+    if its holder dies.
+    """
+
+    def __init__(self, client, *, prefix: str = 'google_trends:', lock_timeout: float = 5):
+        self.client = client
+        self.prefix = prefix
+        self.lock_timeout = lock_timeout
+        self.url = None
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RedisBackend':
+        """
+        Backend connected to url by redis.Redis.from_url. Picklable, every process opens its own connection.
+        Requires `pip install redis`.
+        """
+        backend = cls(None, **kwargs)
+        backend.url = url
+        return backend
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.url is not None:
+            state['client'] = None
+        return state
+
+    def _client(self):
+        if self.client is None:
+            try:
+                import redis
+            except ImportError:
+                raise ImportError('RedisBackend.from_url requires redis, `pip install redis`') from None
+            self.client = redis.Redis.from_url(self.url)
+        return self.client
+
+    def get(self, key: str):
+        value = self._client().get(self.prefix + key)
+        return None if value is None else json.loads(value)
+
+    def update(self, key: str, fn: Callable):
+        client = self._client()
+        lock, token = f'{self.prefix}{key}:lock', uuid.uuid4().hex
+        while not client.set(lock, token, nx=True, px=int(self.lock_timeout * 1000)):
+            time.sleep(0.001)
+        try:
+            value = fn(self.get(key))
+            client.set(self.prefix + key, json.dumps(value))
+            return value
+        finally:
+            held = client.get(lock)
+            if held is not None and (held.decode() if isinstance(held, bytes) else held) == token:
+                client.delete(lock)
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    RateLimiter whose token bucket and rate live in a StateBackend, so that a 429 seen by any worker
+    slows every worker down. Its clock is time.time, which hosts must keep in sync (e.g. by NTP).
+    """
+
+    _clock = staticmethod(time.time)
+
+    def __init__(self, backend: StateBackend, key: str = 'rate_limiter', **kwargs):
+        """
+        :param key: Key of the bucket in backend. Workers using the same egress ip should share it.
+
+        Other params are the same as RateLimiter.
+        """
+        super().__init__(**kwargs)
+        self.backend = backend
+        self.key = key
+
+    def _shared(self, op: Callable):
+        result = []
+
+        def _update(state):
+            if state is not None:
+                self._tokens, self._updated, self.rate = state['tokens'], state['updated'], state['rate']
+            result.append(op())
+            return {'tokens': self._tokens, 'updated': self._updated, 'rate': self.rate}
+
+        self.backend.update(self.key, _update)
+        return result[0]
+
+    def reserve(self) -> float:
+        return self._shared(super().reserve)
+
+    def on_success(self):
+        self._shared(super().on_success)
+
+    def on_rate_limit(self, retry_after: float = None):
+        self._shared(functools.partial(RateLimiter.on_rate_limit, self, retry_after))
+
+
+class SharedCookiePool(CookiePool):
+    """
+    CookiePool whose cookies live in a StateBackend, so that workers reuse the cookies fetched by any of them.
+    """
+
+    def __init__(self, backend: StateBackend, size: int = 1, max_age: float = 6 * 3600, key: str = 'cookies'):
+        """
+        :param key: Prefix of the keys of cookies in backend.
+
+        Other params are the same as CookiePool.
+        """
+        super().__init__(size, max_age)
+        self.backend = backend
+        self.key = key
+
+    def _fresh(self, entries) -> list:
+        now = time.time()
+        return [e for e in entries or [] if now - e[1] < self.max_age]
+
+    async def get(self, fetch: Callable[[], Awaitable[dict]], key=None) -> dict:
+        state_key = f'{self.key}:{key}'
+        entries = self._fresh(self.backend.get(state_key))
+
+        if len(entries) < self.size:
+            async with self._locks.setdefault(key, asyncio.Lock()):
+                # Another worker may have filled the pool while waiting for the lock
+                entries = self._fresh(self.backend.get(state_key))
+                if len(entries) < self.size:
+                    cookies = await fetch()
+                    # Keep the newest ones if several workers fetched cookies at the same time
+                    self.backend.update(
+                        state_key, lambda e: (self._fresh(e) + [[cookies, time.time()]])[-self.size:],
+                    )
+                    return cookies
+
+        index = self._next[key] % len(entries)
+        self._next[key] += 1
+        return entries[index][0]
+
+    def discard(self, cookies: dict, key=None):
+        self.backend.update(f'{self.key}:{key}', lambda entries: [e for e in entries or [] if e[0] != cookies])
+
+
+def shared_session(backend: StateBackend, **kwargs) -> TrendsSession:
+    """
+    Session whose rate limiter and cookies are shared through backend. kwargs are passed to TrendsSession.
+    """
+    return TrendsSession(rate_limiter=SharedRateLimiter(backend), cookie_pool=SharedCookiePool(backend), **kwargs)
+
+
+def shard(jobs: List[BackfillJob], index: int, count: int) -> List[BackfillJob]:
+    """
+    Jobs of shard index out of count, by hash of their id, so that every host computes the same split
+    from the same manifest.
+    """
+    if not 0 <= index < count:
+        raise ValueError(f'Shard index must be in [0, {count})')
+    return [job for job in jobs if int(job.id, 16) % count == index]
+
+
+def run_sharded(
+        jobs: List[BackfillJob],
+        store_path: str,
+        backend: StateBackend,
+        *,
+        processes: int = 4,
+        session_factory: Callable[[StateBackend], TrendsSession] = shared_session,
+        max_concurrency: int = 8,
+        overlap: int = 1,
+) -> Dict[str, int]:
+    """
+    Backfill jobs with a pool of processes, each fetching its shard of jobs into the same checkpoint store.
+
+    :param store_path: Path of the CheckpointStore SQLite database.
+    :param backend: State shared by the processes, which must be picklable: SQLiteBackend or RedisBackend.from_url.
+    :param session_factory: Picklable function creating the session of a process from backend.
+
+    @return: stats of Backfill.run summed over processes
+    """
+    with ProcessPoolExecutor(processes) as pool:
+        futures = [
+            pool.submit(_run_shard, process_jobs, store_path, backend, session_factory, max_concurrency, overlap)
+            for process_jobs in _split(jobs, processes)
+        ]
+        results = [future.result() for future in futures]
+    return {key: sum(r[key] for r in results) for key in results[0]}
+
+
+def _split(jobs: List[BackfillJob], processes: int) -> List[List[BackfillJob]]:
+    # Round robin rather than by hash, jobs may already be the shard of a host and share their hash modulo processes
+    return [jobs[i::processes] for i in range(processes)]
+
+
+def _run_shard(jobs, store_path, backend, session_factory, max_concurrency, overlap) -> Dict[str, int]:
+    async def _run():
+        async with session_factory(backend) as session:
+            backfill = Backfill(store, session=session, max_concurrency=max_concurrency, overlap=overlap)
+            return await backfill.run(jobs)
+
+    store = CheckpointStore(store_path)
+    try:
+        return asyncio.run(_run())
+    finally:
+        store.close()
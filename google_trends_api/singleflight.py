@@ -0,0 +1,59 @@
+"""
+Coalescing of identical in-flight requests
+"""
+import asyncio
+from typing import Awaitable, Callable, Hashable
+
+
+class _Call:
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time: callers asking for a key already in flight await the same result.
+    Exceptions are shared as well, so callers retrying on them coalesce again.
+
+    The call keeps running while any caller waits for it, and is cancelled once all of them are cancelled.
+
+    :ivar shared: Number of calls served by a call already in flight.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.shared = 0
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        """
+        :param key: Normalized params of the call, e.g. cache.window_key(...).
+        :param fn: Coroutine function called if key is not in flight.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = _Call(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(lambda task: self._done(key, call))
+        else:
+            self.shared += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1:
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _done(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.task.cancelled():
+            call.task.exception()  # Retrieved by waiters, if any is left
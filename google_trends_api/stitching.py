@@ -0,0 +1,99 @@
+"""
+Scaling consecutive windows of google trends data onto each other
+"""
+import math
+from typing import List
+
+from loguru import logger
+
+
+class WindowScale:
+    """
+    How a window has been scaled onto the previous ones.
+
+    :ivar start: Timestamp of the first point of the window.
+    :ivar ratio: Factor applied to every value of the window.
+    :ivar points: Number of overlapped points the ratio is fitted on. 0 means it is a guess.
+    :ivar stderr: Standard error of log(ratio), inf when it can not be estimated.
+        Errors of consecutive windows add up, so the scale of the n-th window is off by about sqrt(n) * stderr.
+    """
+
+    __slots__ = ('start', 'ratio', 'points', 'stderr')
+
+    def __init__(self, start: int, ratio: float, points: int, stderr: float):
+        self.start = start
+        self.ratio = ratio
+        self.points = points
+        self.stderr = stderr
+
+    def __repr__(self):
+        return f'WindowScale(start={self.start}, ratio={self.ratio:.4f}, points={self.points}, stderr={self.stderr:.4f})'
+
+
+class Stitcher:
+    """
+    Fit the ratio between consecutive windows on their `overlap` shared points,
+    by weighted least squares in log space, skipping points that are zero in either window.
+
+    Google rounds values to integers, so a value v has a relative error of about 0.5 / v.
+    Each point is weighted by the inverse variance of its log ratio, so that small values, amplifying
+    rounding errors, hardly count.
+
+    The scale of every window is appended to `reports`.
+    """
+
+    def __init__(self, overlap: int = 1):
+        """
+        :param overlap: Number of points (hours of hourly data, days of daily data) shared by consecutive windows.
+            More overlap makes ratios robust to zero and small values, for slightly more windows.
+        """
+        if overlap < 1:
+            raise ValueError('overlap must be at least 1')
+        self.overlap = overlap
+        self.reports: List[WindowScale] = []
+
+    def fit(self, previous_group: list, previous_ratio: float, current_group: list) -> WindowScale:
+        """
+        :param previous_group: Items of the previous window, (timestamp, [value of every keyword]), not scaled.
+            Empty for the first window.
+        :param previous_ratio: Ratio the previous window has been scaled by.
+        :param current_group: Items of the next window, same format.
+            Values of all keywords of a window share the same scale, so they are summed.
+        """
+        if not previous_group:
+            return self._report(WindowScale(current_group[0][0], 1.0, 0, 0.0))
+
+        previous = {t: sum(values) for t, values in previous_group}
+        pairs = [(previous[t], sum(values)) for t, values in current_group if t in previous]
+        if not pairs:
+            raise ValueError(
+                f"Expected window starting at {current_group[0][0]} to overlap the previous window "
+                f"ending at {previous_group[-1][0]}"
+            )
+
+        weights, log_ratios = [], []
+        for previous_value, value in pairs:
+            if previous_value > 0 and value > 0:
+                weights.append(1 / (1 / previous_value ** 2 + 1 / value ** 2))
+                log_ratios.append(math.log(previous_value) - math.log(value))
+
+        if not weights:
+            previous_total = sum(previous_value for previous_value, _ in pairs)
+            total = sum(value for _, value in pairs)
+            # A zero sum on either side would make the ratio 0 or inf, and collapse every later window
+            ratio = previous_total / total if previous_total and total else 1.0
+            logger.warning(
+                f"No overlapped point of window starting at {current_group[0][0]} is positive in both windows. "
+                f"Its scale is a guess: ratio={ratio * previous_ratio}"
+            )
+            return self._report(WindowScale(current_group[0][0], ratio * previous_ratio, 0, math.inf))
+
+        total_weight = sum(weights)
+        log_ratio = sum(w * r for w, r in zip(weights, log_ratios)) / total_weight
+        # Rounding to integers has a variance of 1/12 on values of both windows
+        stderr = math.sqrt(1 / 12 / total_weight)
+        return self._report(WindowScale(current_group[0][0], math.exp(log_ratio) * previous_ratio, len(weights), stderr))
+
+    def _report(self, scale: WindowScale) -> WindowScale:
+        self.reports.append(scale)
+        return scale
@@ -0,0 +1,286 @@
+"""
+Offline stand-in of trends.google.com, used by tests and benchmarks
+
+fake = FakeTrends(latency=0.05, rate_limit_every=20)
+async with fake.session() as session:
+    await hourly_data('nft', start_dt, end_dt, session=session)
+print(len(fake.requests))
+"""
+import ast
+import asyncio
+import json
+import math
+import threading
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from google_trends_api import constants
+from google_trends_api.ratelimit import RateLimiter
+from google_trends_api.session import TrendsSession
+
+
+def default_series(keyword: str, timestamp: int) -> float:
+    """
+    Deterministic positive search volume of keyword at timestamp.
+    """
+    phase = sum(map(ord, keyword)) % 24
+    return 1000 + 800 * math.sin((timestamp / 3600 + phase) / 24 * 2 * math.pi) + timestamp / 3600 % 7 * 10
+
+
+# Sub-regions served by the GEO_MAP widget of a geo, other geos have 3 made up sub-regions
+REGIONS = {
+    '': ['US', 'GB', 'DE', 'FR', 'JP', 'IN'],
+    'US': ['US-CA', 'US-NY', 'US-TX', 'US-FL', 'US-WA'],
+}
+
+
+# Suffixes of the related searches of a keyword, with their value
+RELATED = {
+    'top': [('price', 100), ('news', 60), ('chart', 35)],
+    'rising': [('etf', 5000), ('crash', 250)],
+}
+
+
+def _series_key(keyword: str, geo: str) -> str:
+    """
+    Key of the search volume of keyword in geo: series(keyword, ts) worldwide, series('keyword@geo', ts) in geo.
+    """
+    return f'{keyword}@{geo}' if geo else keyword
+
+
+class FakeTrends:
+    """
+    httpx.MockTransport handler serving explore and widget data endpoints.
+    Values of one response are normalized to [0, 100] and rounded like Google does.
+    """
+
+    def __init__(
+            self,
+            series=default_series,
+            *,
+            rate_limited: int = 0,
+            rate_limit_every: int = 0,
+            latency: float = 0,
+            clock=time.time,
+    ):
+        """
+        :param series: Function (keyword, timestamp) -> search volume of the hour starting at timestamp.
+            Volume in a geo is series('keyword@geo', timestamp).
+        :param rate_limited: Number of explore requests answered by 429 before serving data.
+        :param rate_limit_every: Answer every n-th explore request by 429, 0 never does.
+        :param latency: Seconds every response is delayed by.
+        :param clock: Function returning the current timestamp, which relative time ranges like 'now 1-H' end at.
+        """
+        self.series = series
+        self.rate_limited = rate_limited
+        self.rate_limit_every = rate_limit_every
+        self.latency = latency
+        self.clock = clock
+        self.requests = []
+        self._explore_count = 0
+        self._token_generation = 0
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self)
+
+    def session(self, **kwargs) -> TrendsSession:
+        """
+        Session served by this fake, without being slowed down by rate limiting.
+        """
+        kwargs.setdefault('rate_limiter', RateLimiter(rate=10_000, burst=10_000, max_rate=10_000))
+        return TrendsSession(transport=self.transport(), **kwargs)
+
+    def count(self, path: str) -> int:
+        return sum(1 for r in self.requests if r.url.path == path)
+
+    def expire_tokens(self):
+        """
+        Reject every widget token issued so far with 401, like Google does once tokens expire.
+        """
+        self._token_generation += 1
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if request.url.path == '/trends/api/explore':
+            return self._explore(request)
+        if request.url.path.startswith('/trends/api/widgetdata/') \
+                and request.url.params['token'].split(':')[0] != str(self._token_generation):
+            return httpx.Response(401, text='Unauthorized')
+        if request.url.path == '/trends/api/widgetdata/multiline':
+            return self._multiline(request)
+        if request.url.path == '/trends/api/widgetdata/comparedgeo':
+            return self._compared_geo(request)
+        if request.url.path == '/trends/api/widgetdata/relatedsearches':
+            return self._related_searches(request)
+        return httpx.Response(200, headers={'Set-Cookie': 'NID=fake; Path=/'})
+
+    def _explore(self, request):
+        self._explore_count += 1
+        if self.rate_limit_every and self._explore_count % self.rate_limit_every == 0:
+            return httpx.Response(429, headers={'Retry-After': '0'}, text='Too Many Requests')
+        if self.rate_limited > 0:
+            self.rate_limited -= 1
+            return httpx.Response(429, headers={'Retry-After': '0'}, text='Too Many Requests')
+        req = ast.literal_eval(request.url.params['req'])
+        geo = req['comparisonItem'][0]['geo']
+        token = f'{self._token_generation}:{self._explore_count}'
+        widgets = [
+            {
+                'id': constants.WidgetId.TIME_SERIES,
+                'token': f'{token}:{constants.WidgetId.TIME_SERIES}',
+                'request': {'comparisonItem': req['comparisonItem']},
+            },
+            {
+                'id': constants.WidgetId.GEO_MAP,
+                'token': f'{token}:{constants.WidgetId.GEO_MAP}',
+                'request': {
+                    'comparisonItem': req['comparisonItem'],
+                    'resolution': constants.Resolution.REGION if geo else constants.Resolution.COUNTRY,
+                },
+            },
+        ] + [
+            {
+                'id': widget_id,
+                'token': f'{token}:{widget_id}',
+                'request': {'restriction': {'complexKeywordsRestriction': {'keyword': [
+                    {'type': 'BROAD', 'value': req['comparisonItem'][0]['keyword']},
+                ]}}},
+            }
+            for widget_id in (constants.WidgetId.RELATED_TOPICS, constants.WidgetId.RELATED_QUERIES)
+        ]
+        return _xssi_response({'widgets': widgets})
+
+    def _multiline(self, request):
+        req = ast.literal_eval(request.url.params['req'])
+        columns = []
+        for item in req['comparisonItem']:
+            start, end, step = _parse_time(item['time'], self.clock())
+            columns.append([
+                (ts, self._mean(_series_key(item['keyword'], item['geo']), ts, step))
+                for ts in range(start, end + 1, step)
+            ])
+
+        # Like Google, a request without any volume is all zeros
+        max_value = max(v for column in columns for _, v in column) or 1
+        timeline_data = []
+        for i, (ts, _) in enumerate(columns[0]):
+            values = [round(column[i][1] / max_value * 100) if i < len(column) else 0 for column in columns]
+            timeline_data.append({
+                'time': str(ts),
+                'value': values,
+                'hasData': [i < len(column) for column in columns],
+            })
+        return _xssi_response({'default': {'timelineData': timeline_data}})
+
+    def _compared_geo(self, request):
+        req = ast.literal_eval(request.url.params['req'])
+        items = req['comparisonItem']
+        start, end, step = _parse_time(items[0]['time'], self.clock())
+        regions = REGIONS.get(items[0]['geo']) or [f"{items[0]['geo']}-{i}" for i in range(1, 4)]
+
+        # Mean search volume of every keyword in every region over the time range
+        means = [
+            [self._mean(_series_key(item['keyword'], region), start, end + step - start) for item in items]
+            for region in regions
+        ]
+        max_value = max(v for row in means for v in row) or 1
+        return _xssi_response({'default': {'geoMapData': [
+            {
+                'geoCode': region,
+                'geoName': region,
+                'value': [round(v / max_value * 100) for v in row],
+                'hasData': [True for _ in row],
+            }
+            for region, row in zip(regions, means)
+        ]}})
+
+    def _related_searches(self, request):
+        req = ast.literal_eval(request.url.params['req'])
+        keyword = req['restriction']['complexKeywordsRestriction']['keyword'][0]['value']
+        top = [(f'{keyword} {suffix}', value) for suffix, value in RELATED['top']]
+        rising = [(f'{keyword} {suffix}', value) for suffix, value in RELATED['rising']]
+        # Related topics and queries of the fake only differ by the shape of their entries
+        return _xssi_response({'default': {'rankedList': [
+            {'rankedKeyword': [
+                {
+                    'query': query,
+                    'topic': {'mid': f'/m/{sum(map(ord, query))}', 'title': query, 'type': 'Topic'},
+                    'value': value,
+                    'formattedValue': 'Breakout' if value >= 5000 else str(value),
+                    'hasData': True,
+                }
+                for query, value in ranked
+            ]}
+            for ranked in (top, rising)
+        ]}})
+
+    def _mean(self, keyword: str, ts: int, step: int) -> float:
+        if step < 3600:
+            return self.series(keyword, ts)
+        return sum(self.series(keyword, t) for t in range(ts, ts + step, 3600)) / (step // 3600)
+
+
+class FakeRedis:
+    """
+    In memory stand-in of the few redis.Redis methods used by sharding.RedisBackend, safe across threads.
+    """
+
+    def __init__(self):
+        self._values = {}  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def _alive(self, key):
+        entry = self._values.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._values[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._alive(key)
+            return None if entry is None else entry[0]
+
+    def set(self, key, value, nx: bool = False, px: int = None):
+        with self._lock:
+            if nx and self._alive(key) is not None:
+                return None
+            value = value if isinstance(value, bytes) else str(value).encode()
+            self._values[key] = (value, None if px is None else time.monotonic() + px / 1000)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(self._values.pop(key, None) is not None for key in keys)
+
+
+def _parse_time(time: str, now: float):
+    """
+    @return: (first timestamp, last timestamp, step) of a custom time range, or of 'now 1-H' and 'now 4-H'
+        which are minutely up to the last full minute before now.
+        Like Google: hourly for hours, then daily up to 270 days, weekly up to 5 years and monthly (30 days) beyond.
+    """
+    if time.startswith('now ') and time.endswith('-H'):
+        end = int(now) // 60 * 60 - 60
+        return end - (int(time[4:-2]) * 60 - 1) * 60, end, 60
+
+    if 'T' in time:
+        start, end = (
+            int(datetime.strptime(s, '%Y-%m-%dT%H').replace(tzinfo=timezone.utc).timestamp()) for s in time.split(' ')
+        )
+        return start, end, 3600
+
+    start, end = (
+        int(datetime.strptime(s, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp()) for s in time.split(' ')
+    )
+    days = (end - start) // 86400 + 1
+    step = 86400 if days <= 270 else 7 * 86400 if days <= 5 * 365 else 30 * 86400
+    return start, end, step
+
+
+def _xssi_response(js: dict) -> httpx.Response:
+    return httpx.Response(200, text=")]}',\n" + json.dumps(js))
@@ -19,6 +19,44 @@ def datetime_range(
         yield current
 
 
+def plan_windows(
+        start: datetime.datetime,
+        end: datetime.datetime,
+        size: datetime.timedelta,
+        overlap: datetime.timedelta,
+):
+    """
+    Returns start datetime of every window of length size needed to cover [start, end).
+    Each window starts at the last `overlap` of the previous one, so there is always one window at least.
+    A window is only added while the previous one ends before end.
+    """
+    windows = [start]
+    current = start + size - overlap
+    while current + overlap < end:
+        windows.append(current)
+        current += size - overlap
+    return windows
+
+
+def merge_ranges(ranges: list):
+    """
+    Merge overlapping or adjacent [start, end) ranges, so that their common part is only fetched once.
+
+    @return: (merged ranges sorted by start, index of the merged range containing every given range)
+    """
+    order = sorted(range(len(ranges)), key=lambda i: ranges[i][0])
+    merged = []
+    owners = [0] * len(ranges)
+    for i in order:
+        start, end = ranges[i]
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+        owners[i] = len(merged) - 1
+    return merged, owners
+
+
 def parse_timezone_in_google_way(dt: datetime.datetime) -> int:
     """
     Returns the timezone offset in minutes from UTC.
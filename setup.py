@@ -10,5 +10,19 @@ setup(
     author='Magicalbomb',
     author_email='17826800084g@gmail.com',
     description='Async python wrapper for google trends api',
-    install_requires=['httpx', 'tenacity', 'loguru']
+    install_requires=['httpx', 'tenacity', 'loguru'],
+    entry_points={
+        'console_scripts': ['google-trends-backfill=google_trends_api.backfill:main'],
+    },
+    extras_require={
+        'http2': ['httpx[http2]'],
+        'numpy': ['numpy'],
+        'pandas': ['pandas'],
+        'orjson': ['orjson'],
+        'msgspec': ['msgspec'],
+        'redis': ['redis'],
+        'prometheus': ['prometheus_client'],
+        'opentelemetry': ['opentelemetry-api'],
+        'arrow': ['pyarrow'],
+    },
 )
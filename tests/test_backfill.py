@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from google_trends_api import hourly_data, daily_data
+from google_trends_api.backfill import Backfill, BackfillJob, CheckpointStore, load_manifest, main
+from google_trends_api.export import iter_series
+from google_trends_api.testing import FakeTrends
+
+TZ = timezone(timedelta(hours=8))
+JOBS = [
+    BackfillJob('nft', datetime(2021, 1, 1), datetime(2021, 1, 30), tz=TZ),
+    BackfillJob('eth', datetime(2021, 1, 1), datetime(2021, 1, 30), geo='US', tz=TZ),
+    BackfillJob('nft', datetime(2019, 1, 1), datetime(2021, 1, 1), frequency='daily'),
+]
+
+
+@pytest.mark.asyncio
+async def test_backfill_resumes(tmp_path):
+    store = CheckpointStore(str(tmp_path / 'backfill.db'))
+
+    # Every third explore request is rate limited, and windows are not retried
+    fake = FakeTrends(rate_limit_every=3)
+    async with fake.session() as session:
+        stats = await Backfill(store, session=session, retries=0).run(JOBS)
+    assert stats['windows'] == 5 + 5 + 3
+    assert stats['failed'] > 0
+    assert stats['fetched'] + stats['failed'] == stats['windows']
+    with pytest.raises(ValueError):
+        Backfill(store).series(JOBS[0])
+
+    fake = FakeTrends()
+    async with fake.session() as session:
+        backfill = Backfill(store, session=session)
+        stats = await backfill.run(JOBS)
+        assert stats['fetched'] == stats['windows'] - stats['saved'] > 0
+        assert fake.count('/trends/api/explore') == stats['fetched']
+
+        for job in JOBS[:2]:
+            expected = await hourly_data(
+                job.keyword, job.start_dt, job.end_dt, TZ, geo=job.geo, max_concurrency=2, session=session,
+            )
+            assert backfill.series(job) == expected
+        expected = await daily_data('nft', datetime(2019, 1, 1), datetime(2021, 1, 1), max_concurrency=2, session=session)
+        assert backfill.series(JOBS[2]) == expected
+
+    # Everything is saved
+    async with fake.session() as session:
+        stats = await Backfill(store, session=session).run(JOBS)
+    assert stats['saved'] == stats['windows']
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_backfill_other_overlap(tmp_path):
+    store = CheckpointStore(str(tmp_path / 'backfill.db'))
+    job = JOBS[0]
+
+    async with FakeTrends().session() as session:
+        await Backfill(store, session=session).run([job])
+        backfill = Backfill(store, session=session, overlap=3)
+        # Windows of the first run don't complete the plan of another overlap
+        with pytest.raises(ValueError):
+            backfill.series(job)
+
+        await backfill.run([job])
+        reference_store = CheckpointStore(str(tmp_path / 'reference.db'))
+        await Backfill(reference_store, session=session, overlap=3).run([job])
+
+    assert backfill.series(job) == Backfill(reference_store, overlap=3).series(job)
+    store.close()
+    reference_store.close()
+
+
+def test_load_manifest(tmp_path):
+    path = tmp_path / 'manifest.csv'
+    path.write_text(
+        'keyword,geo,start,end,frequency,utc_offset\n'
+        'nft,US,2021-01-01,2021-02-01,,8\n'
+        'eth,,2019-01-01,2021-01-01,daily,\n'
+    )
+    jobs = load_manifest(str(path))
+
+    assert [(j.keyword, j.geo, j.frequency) for j in jobs] == [('nft', 'US', 'hourly'), ('eth', '', 'daily')]
+    assert jobs[0].start_dt == datetime(2021, 1, 1, tzinfo=TZ)
+    assert jobs[0].id == BackfillJob('nft', datetime(2021, 1, 1), datetime(2021, 2, 1), geo='US', tz=TZ).id
+
+
+def test_main_append_only_new_points(tmp_path):
+    db, output = str(tmp_path / 'backfill.db'), str(tmp_path / 'result.csv')
+    manifest = tmp_path / 'manifest.csv'
+    manifest.write_text('keyword,start,end\nnft,2021-01-01,2021-01-20\n')
+    later = tmp_path / 'later.csv'
+    later.write_text('keyword,start,end\nnft,2021-01-01,2021-01-20\nnft,2021-01-10,2021-01-30\n')
+
+    # Windows are saved beforehand, so that main doesn't send any request
+    store = CheckpointStore(db)
+
+    async def _prefill():
+        async with FakeTrends().session() as session:
+            await Backfill(store, session=session).run(load_manifest(str(later)))
+
+    asyncio.run(_prefill())
+    store.close()
+
+    assert main([str(manifest), '--db', db, '--output', output, '--append']) == 0
+    (_, _, _, first), = iter_series(output)
+    assert main([str(later), '--db', db, '--output', output, '--append']) == 0
+
+    # The first job is not written again, the second one only after the last exported point
+    (_, _, _, series), = iter_series(output)
+    assert len(series) == len(set(series.timestamps))
+    assert series.timestamps[:len(first)] == first.timestamps
+    assert series.timestamps[-1] == int(datetime(2021, 1, 30, tzinfo=timezone.utc).timestamp()) - 3600
@@ -0,0 +1,99 @@
+import time
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from google_trends_api import hourly_data, keyword_report
+from google_trends_api.cache import MemoryCache, SQLiteCache, TokenCache
+from google_trends_api.testing import FakeTrends
+
+
+@pytest.mark.parametrize('make_cache', [
+    lambda tmp_path: MemoryCache(max_entries=2),
+    lambda tmp_path: SQLiteCache(str(tmp_path / 'cache.db'), max_entries=2),
+])
+def test_lru_and_ttl(tmp_path, make_cache):
+    cache = make_cache(tmp_path)
+    cache.set('a', {'v': 1})
+    cache.set('b', {'v': 2})
+    assert cache.get('a') == {'v': 1}
+
+    cache.set('c', {'v': 3})  # b is the least recently used one
+    assert cache.get('b') is None
+    assert cache.get('a') == {'v': 1}
+    assert cache.get('c') == {'v': 3}
+
+    cache.set('d', {'v': 4}, ttl=-1)
+    assert cache.get('d') is None
+
+
+def test_ttl_for():
+    cache = MemoryCache(recent_ttl=60)
+    assert cache.ttl_for(datetime(2020, 1, 1, tzinfo=timezone.utc)) is None
+    assert cache.ttl_for(datetime.now(tz=timezone.utc) + timedelta(hours=1)) == 60
+
+
+@pytest.mark.asyncio
+async def test_hourly_data_reuses_cached_windows():
+    fake = FakeTrends()
+    tz = timezone(timedelta(hours=8))
+    start_dt, end_dt = datetime(2021, 1, 1, 1), datetime(2021, 1, 20, 1)
+
+    async with fake.session(cache=MemoryCache()) as session:
+        first = await hourly_data('nft', start_dt, end_dt, tz, session=session)
+        explore_count = fake.count('/trends/api/explore')
+        fake.requests.clear()
+        second = await hourly_data('nft', start_dt, end_dt, tz, session=session)
+
+    assert first == second
+    assert explore_count == 3
+    assert fake.requests == []
+
+
+def test_token_cache(monkeypatch):
+    cache = TokenCache(ttl=60, max_entries=2)
+    cache.set('a', [{'token': 'a1'}, {'token': 'a2'}])
+    cache.set('b', [{'token': 'b1'}])
+    assert cache.get('a') == [{'token': 'a1'}, {'token': 'a2'}]
+
+    assert cache.invalidate('a2')
+    assert cache.get('a') is None
+    assert not cache.invalidate('a1')
+
+    cache.set('c', [{'token': 'c1'}])
+    cache.set('d', [{'token': 'd1'}])  # b is the least recently used one
+    assert cache.get('b') is None and len(cache) == 2
+
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 61)
+    assert cache.get('c') is None
+
+
+@pytest.mark.asyncio
+async def test_token_cache_skips_explore():
+    fake = FakeTrends()
+    tz = timezone.utc
+    start_dt, end_dt = datetime(2021, 1, 1), datetime(2021, 1, 10)
+
+    async with fake.session(token_cache=TokenCache()) as session:
+        first = await hourly_data('nft', start_dt, end_dt, tz, session=session)
+        assert fake.count('/trends/api/explore') == 2
+
+        # Windows are fetched again without exploring them again
+        fake.requests.clear()
+        assert await hourly_data('nft', start_dt, end_dt, tz, session=session) == first
+        assert fake.count('/trends/api/explore') == 0
+        assert fake.count('/trends/api/widgetdata/multiline') == 2
+
+        # Rejected tokens are invalidated and their requests explored again
+        fake.expire_tokens()
+        fake.requests.clear()
+        assert await hourly_data('nft', start_dt, end_dt, tz, session=session) == first
+        assert fake.count('/trends/api/explore') == 2
+        assert fake.count('/trends/api/widgetdata/multiline') == 4
+
+        # Widgets of the report share its explore response
+        fake.requests.clear()
+        await keyword_report('nft', start_dt, end_dt, session=session)
+        await keyword_report('nft', start_dt, end_dt, session=session)
+        assert fake.count('/trends/api/explore') == 1
@@ -0,0 +1,38 @@
+import itertools
+from datetime import datetime, timezone
+
+import pytest
+
+from google_trends_api import hourly_data
+from google_trends_api.cookies import CookiePool
+from google_trends_api.testing import FakeTrends
+
+
+@pytest.mark.asyncio
+async def test_cookie_pool():
+    counter = itertools.count()
+
+    async def fetch():
+        return {'NID': str(next(counter))}
+
+    pool = CookiePool(size=2)
+    assert await pool.get(fetch) == {'NID': '0'}
+    assert await pool.get(fetch) == {'NID': '1'}
+    assert [await pool.get(fetch) for _ in range(3)] == [{'NID': '0'}, {'NID': '1'}, {'NID': '0'}]
+    assert await pool.get(fetch, key='http://proxy') == {'NID': '2'}
+
+    pool.discard({'NID': '0'})
+    assert await pool.get(fetch) == {'NID': '3'}
+
+    pool.max_age = 0
+    assert await pool.get(fetch) == {'NID': '4'}
+
+
+@pytest.mark.asyncio
+async def test_hourly_data_reuses_and_rotates_cookies():
+    fake = FakeTrends(rate_limited=1)
+    async with fake.session() as session:
+        await hourly_data('nft', datetime(2021, 1, 1), datetime(2021, 1, 20), timezone.utc, session=session)
+
+    # One cookie at first, and a new one after it got rate limited
+    assert fake.count('/') == 2
@@ -0,0 +1,88 @@
+import csv
+from datetime import datetime, timezone
+
+import pytest
+
+from google_trends_api import hourly_data
+from google_trends_api.export import CSVSink, open_sink, iter_series, read_table, last_timestamps
+from google_trends_api.series import TrendSeries
+from google_trends_api.testing import FakeTrends
+
+
+def test_csv_sink_row_groups(tmp_path):
+    path = str(tmp_path / 'trends.csv')
+    flushed = []
+
+    class _Sink(CSVSink):
+        def _write_rows(self, labels, label_rows, timestamps, values):
+            flushed.append(len(timestamps))
+            super()._write_rows(labels, label_rows, timestamps, values)
+
+    with _Sink(path, row_group_size=4) as sink:
+        sink.write('nft', TrendSeries(range(0, 6 * 3600, 3600), range(6)))
+        sink.write('eth', [(0, 1.5), (3600, 2.5)], geo='US')
+        assert flushed == [4, 4]  # Rows are buffered up to row_group_size
+
+    assert flushed == [4, 4]  # Nothing left to write on close
+    with open(path, newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['keyword', 'geo', 'frequency', 'timestamp', 'value']
+    assert rows[1] == ['nft', '', 'hourly', '0', '0.0']
+    assert rows[-1] == ['eth', 'US', 'hourly', '3600', '2.5']
+    assert len(rows) == 9
+
+
+def test_csv_sink_append(tmp_path):
+    path = str(tmp_path / 'trends.csv')
+    with open_sink(path) as sink:
+        sink.write('nft', [(0, 1), (3600, 2)])
+    with open_sink(path) as sink:
+        sink.write('nft', [(7200, 3)])
+        sink.write('eth', [(0, 4)])
+
+    assert [(k, s.to_list()) for k, _, _, s in iter_series(path)] == [
+        ('nft', [(0, 1), (3600, 2), (7200, 3)]), ('eth', [(0, 4)]),
+    ]
+
+    assert last_timestamps(path) == {('nft', '', 'hourly'): 7200, ('eth', '', 'hourly'): 0}
+    assert last_timestamps(str(tmp_path / 'missing.csv')) == {}
+
+    with open_sink(path, append=False) as sink:
+        sink.write('eth', [(0, 1)])
+    assert [k for k, _, _, _ in iter_series(path)] == ['eth']
+
+
+@pytest.mark.parametrize('suffix', ['.arrow', '.parquet'])
+def test_columnar_sink(tmp_path, suffix):
+    pytest.importorskip('pyarrow')
+    path = str(tmp_path / f'trends{suffix}')
+
+    with open_sink(path, row_group_size=3) as sink:
+        sink.write('nft', TrendSeries(range(0, 5 * 3600, 3600), range(5)))
+        sink.write('eth', [(0, 1.5)], geo='US', frequency='daily')
+    with open_sink(path) as sink:
+        sink.write('nft', [(5 * 3600, 5)])
+
+    table = read_table(path)
+    assert table.num_rows == 7
+    assert table.column('keyword').to_pylist() == ['nft'] * 5 + ['eth', 'nft']
+    assert table.column('value').to_pylist() == [0, 1, 2, 3, 4, 1.5, 5]
+    assert [(k, g, f, len(s)) for k, g, f, s in iter_series(path)] == [
+        ('nft', '', 'hourly', 5), ('eth', 'US', 'daily', 1), ('nft', '', 'hourly', 1),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_export_hourly_data(tmp_path):
+    fake = FakeTrends()
+    path = str(tmp_path / 'trends.csv')
+
+    async with fake.session() as session:
+        series = await hourly_data(
+            'nft', datetime(2021, 1, 1), datetime(2021, 1, 20), timezone.utc, as_series=True, session=session,
+        )
+    with open_sink(path, row_group_size=100) as sink:
+        sink.write('nft', series)
+
+    (keyword, geo, frequency, restored), = iter_series(path)
+    assert restored == series
@@ -1,10 +1,16 @@
+import ast
 import time
 from datetime import datetime, timezone, timedelta
 
 import pytest
 
-from google_trends_api import _hourly_data, hourly_data, _seven_days_hourly_data
+from google_trends_api import _hourly_data, hourly_data, _seven_days_hourly_data, hourly_data_many, hourly_data_stream, \
+    hourly_data_since, daily_data, coarse_data, hourly_data_ranges, interest_by_region, hourly_data_geos, \
+    related_queries, related_topics, keyword_report, explore
+from google_trends_api import constants
+from google_trends_api.cache import MemoryCache
 from google_trends_api.utils import alist
+from google_trends_api.testing import FakeTrends, default_series
 
 
 @pytest.mark.asyncio
@@ -86,3 +92,379 @@ async def test_hourly_data():
 
     ratio = lst_1[-1][1] / lst_2[0][1]
     assert abs(ratio * lst_2[-1][1] - lst_3[-1][1]) < 0.1
+
+
+@pytest.mark.asyncio
+async def test_hourly_data_max_concurrency():
+    fake = FakeTrends()
+    tz = timezone(timedelta(hours=8))
+    start_dt, end_dt = datetime(2021, 1, 1, 1), datetime(2021, 2, 1, 1)
+
+    async with fake.session() as session:
+        sequential = await hourly_data('nft', start_dt, end_dt, tz, session=session)
+        concurrent = await hourly_data('nft', start_dt, end_dt, tz, max_concurrency=4, session=session)
+
+    assert concurrent == sequential
+    assert sequential[0][0] == int(start_dt.replace(tzinfo=tz).timestamp())
+    assert sequential[-1][0] == int(end_dt.replace(tzinfo=tz).timestamp()) - 3600
+    assert max(v for _, v in sequential) == 100
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('max_concurrency', [1, 4])
+async def test_hourly_data_final_window(max_concurrency):
+    fake = FakeTrends()
+    tz = timezone.utc
+    start_dt = datetime(2021, 1, 1)
+
+    async with fake.session() as session:
+        # A range covered exactly by one window takes one window
+        items = await hourly_data(
+            'nft', start_dt, start_dt + timedelta(days=7), tz, max_concurrency=max_concurrency, session=session,
+        )
+        assert fake.count('/trends/api/explore') == 1
+        assert len(items) == 168
+        assert items[-1][0] == int((start_dt + timedelta(days=7, hours=-1)).replace(tzinfo=tz).timestamp())
+
+        fake.requests.clear()
+        items = await hourly_data(
+            'nft', start_dt, start_dt + timedelta(days=7, hours=1), tz, max_concurrency=max_concurrency,
+            session=session,
+        )
+        assert fake.count('/trends/api/explore') == 2
+        assert len(items) == 169
+        assert items[-1][0] == int((start_dt + timedelta(days=7)).replace(tzinfo=tz).timestamp())
+
+
+@pytest.mark.asyncio
+async def test_hourly_data_many():
+    fake = FakeTrends()
+    tz = timezone.utc
+    keywords = ['bitcoin', 'nft', 'eth', 'doge', 'sol', 'ada']
+    start_dt, end_dt = datetime(2021, 1, 1), datetime(2021, 1, 10)
+
+    async with fake.session() as session:
+        result = await hourly_data_many(keywords, start_dt, end_dt, tz, session=session)
+
+    # 2 batches of 2 windows: [bitcoin, nft, eth, doge, sol], [bitcoin, ada]
+    assert fake.count('/trends/api/explore') == 4
+    assert list(result) == keywords
+
+    truth = {k: [default_series(k, t) for t, _ in result[k]] for k in keywords}
+    max_truth = max(max(values) for values in truth.values())
+    for keyword in keywords:
+        for (_, value), expected in zip(result[keyword], truth[keyword]):
+            assert abs(value - expected / max_truth * 100) < 1.5
+
+
+@pytest.mark.asyncio
+async def test_hourly_data_many_zero_reference():
+    fake = FakeTrends(series=lambda keyword, ts: 0 if keyword == 'zero' else default_series(keyword, ts))
+    tz = timezone.utc
+    start_dt, end_dt = datetime(2021, 1, 1), datetime(2021, 1, 5)
+
+    async with fake.session() as session:
+        with pytest.raises(ValueError, match="'zero'"):
+            await hourly_data_many(['zero', 'nft', 'eth', 'doge', 'sol', 'ada'], start_dt, end_dt, tz, session=session)
+
+        # A single batch needs no scaling
+        result = await hourly_data_many(['zero', 'nft'], start_dt, end_dt, tz, session=session)
+        assert all(value == 0 for _, value in result['zero'])
+        assert max(value for _, value in result['nft']) == 100
+
+        result = await hourly_data_many(['zero'], start_dt, end_dt, tz, session=session)
+        assert result['zero'] and all(value == 0 for _, value in result['zero'])
+
+
+@pytest.mark.asyncio
+async def test_hourly_data_ranges():
+    fake = FakeTrends()
+    tz = timezone.utc
+    ranges = [
+        (datetime(2021, 1, 1), datetime(2021, 1, 10)),
+        (datetime(2021, 1, 5), datetime(2021, 1, 12)),
+        (datetime(2021, 3, 1), datetime(2021, 3, 3)),
+    ]
+
+    async with fake.session() as session:
+        result = await hourly_data_ranges('nft', ranges, tz, session=session)
+
+    # [01-01, 01-12) takes 2 windows, [03-01, 03-03) 1 window
+    assert fake.count('/trends/api/explore') == 3
+    for (start_dt, end_dt), items in zip(ranges, result):
+        assert items[0][0] == int(start_dt.replace(tzinfo=tz).timestamp())
+        assert items[-1][0] == int(end_dt.replace(tzinfo=tz).timestamp()) - 3600
+        assert max(v for _, v in items) == 100
+
+        truth = [default_series('nft', t) for t, _ in items]
+        for (_, value), expected in zip(items, truth):
+            assert abs(value - expected / max(truth) * 100) < 1.5
+
+
+@pytest.mark.asyncio
+async def test_hourly_data_ranges_without_volume():
+    fake = FakeTrends(series=lambda keyword, ts: 0)
+    ranges = [(datetime(2021, 1, 1), datetime(2021, 1, 10)), (datetime(2021, 3, 1), datetime(2021, 3, 3))]
+
+    async with fake.session() as session:
+        result = await hourly_data_ranges('nft', ranges, timezone.utc, session=session)
+
+    assert [len(items) for items in result] == [9 * 24, 2 * 24]
+    assert all(v == 0 for items in result for _, v in items)
+
+
+@pytest.mark.asyncio
+async def test_hourly_data_stream():
+    fake = FakeTrends()
+    tz = timezone.utc
+    start_dt, end_dt = datetime(2021, 1, 1), datetime(2021, 1, 30)
+
+    async with fake.session() as session:
+        expected = await hourly_data('nft', start_dt, end_dt, tz, session=session)
+        for max_concurrency in (1, 3):
+            stream = hourly_data_stream('nft', start_dt, end_dt, tz, max_concurrency=max_concurrency, session=session)
+            chunks = [items async for items in stream]
+
+            assert len(chunks) == 5
+            streamed = [(t, v * stream.rescale_factor) for items in chunks for t, v in items]
+            assert [t for t, _ in streamed] == [t for t, _ in expected]
+            assert all(abs(v - e) < 1e-9 for (_, v), (_, e) in zip(streamed, expected))
+
+
+@pytest.mark.asyncio
+async def test_hourly_data_since():
+    fake = FakeTrends()
+    tz = timezone.utc
+    start_dt, stored_end_dt, end_dt = datetime(2021, 1, 1), datetime(2021, 1, 10), datetime(2021, 1, 12)
+
+    async with fake.session() as session:
+        stored = await hourly_data('nft', start_dt, stored_end_dt, tz, session=session)
+        expected = dict(await hourly_data('nft', start_dt, end_dt, tz, session=session))
+
+        fake.requests.clear()
+        tail, rescale_factor = await hourly_data_since('nft', stored, end_dt, tz, session=session)
+
+    assert len(fake.requests) == 2  # explore and multiline of a single window, cookies are pooled
+    assert tail[0][0] == stored[-1][0] + 3600
+    assert tail[-1][0] == int(end_dt.replace(tzinfo=tz).timestamp()) - 3600
+    for t, v in stored + tail:
+        assert abs(v * rescale_factor - expected[t]) < 1.5
+
+
+@pytest.mark.asyncio
+async def test_hourly_data_since_without_volume():
+    fake = FakeTrends(series=lambda keyword, ts: 0)
+    tz = timezone.utc
+    end_dt = datetime(2021, 1, 12)
+    stored = [(int(datetime(2021, 1, 9, tzinfo=tz).timestamp()) + i * 3600, 0.0) for i in range(24)]
+
+    async with fake.session() as session:
+        tail, rescale_factor = await hourly_data_since('nft', stored, end_dt, tz, session=session)
+        assert rescale_factor == 1.0
+        assert tail and all(v == 0 for _, v in tail)
+
+        with pytest.raises(ValueError):
+            await hourly_data_since('nft', [], end_dt, tz, session=session)
+
+
+@pytest.mark.asyncio
+async def test_daily_and_coarse_data():
+    fake = FakeTrends()
+    day = 86400
+
+    def daily_truth(t):
+        return fake._mean('nft', t, day)
+
+    async with fake.session() as session:
+        daily = await daily_data('nft', datetime(2019, 1, 1), datetime(2020, 7, 1), session=session)
+        assert fake.count('/trends/api/explore') == 3
+        assert daily[0][0] == int(datetime(2019, 1, 1, tzinfo=timezone.utc).timestamp())
+        assert daily[-1][0] == int(datetime(2020, 6, 30, tzinfo=timezone.utc).timestamp())
+        assert len(daily) == len({t for t, _ in daily}) == 547
+
+        max_truth = max(daily_truth(t) for t, _ in daily)
+        assert all(abs(v - daily_truth(t) / max_truth * 100) < 1.5 for t, v in daily)
+
+        weekly = await coarse_data('nft', datetime(2018, 1, 1), datetime(2020, 1, 1), session=session)
+        assert weekly[1][0] - weekly[0][0] == 7 * day
+        assert max(v for _, v in weekly) == 100
+
+
+@pytest.mark.asyncio
+async def test_daily_data_without_volume():
+    fake = FakeTrends(series=lambda keyword, ts: 0)
+
+    async with fake.session() as session:
+        daily = await daily_data('nft', datetime(2019, 1, 1), datetime(2020, 7, 1), session=session)
+
+    assert len(daily) == 547
+    assert all(v == 0 for _, v in daily)
+
+
+@pytest.mark.asyncio
+async def test_hourly_data_anchor_daily():
+    fake = FakeTrends()
+    tz = timezone.utc
+    start_dt, end_dt = datetime(2021, 1, 1), datetime(2021, 3, 1)
+
+    async with fake.session() as session:
+        anchored = await hourly_data('nft', start_dt, end_dt, tz, anchor_daily=True, session=session)
+
+    truth = [default_series('nft', t) for t, _ in anchored]
+    max_truth = max(truth)
+    assert all(abs(v - e / max_truth * 100) < 2 for (_, v), e in zip(anchored, truth))
+
+
+@pytest.mark.asyncio
+async def test_interest_by_region():
+    fake = FakeTrends()
+
+    async with fake.session() as session:
+        # Hourly range, then daily range
+        ranges = [(datetime(2021, 1, 1), datetime(2021, 1, 1, 10)), (datetime(2021, 1, 1), datetime(2021, 1, 20))]
+        for start_dt, end_dt in ranges:
+            interest = await interest_by_region('nft', start_dt, end_dt, geo='US', session=session)
+
+            assert list(interest) == ['US-CA', 'US-NY', 'US-TX', 'US-FL', 'US-WA']
+            start_ts = int(start_dt.replace(tzinfo=timezone.utc).timestamp())
+            end_ts = int(end_dt.replace(tzinfo=timezone.utc).timestamp())
+            truth = {g: fake._mean(f'nft@{g}', start_ts, end_ts - start_ts) for g in interest}
+            for geo, value in interest.items():
+                assert value == round(truth[geo] / max(truth.values()) * 100)
+
+        worldwide = await interest_by_region('nft', datetime(2021, 1, 1), datetime(2021, 1, 2), session=session)
+        assert list(worldwide) == ['US', 'GB', 'DE', 'FR', 'JP', 'IN']
+
+    # The GEO_MAP widget comes with the explore response, one comparedgeo request per call
+    assert fake.count('/trends/api/explore') == fake.count('/trends/api/widgetdata/comparedgeo') == 3
+
+
+@pytest.mark.asyncio
+async def test_interest_by_region_widgets():
+    fake = FakeTrends()
+    start_dt, end_dt = datetime(2021, 1, 1), datetime(2021, 1, 20)
+
+    async with fake.session() as session:
+        widgets = await explore('nft', start_dt, end_dt, geo='US', session=session)
+        interest = await interest_by_region('nft', widgets=widgets, session=session)
+        cities = await interest_by_region('nft', widgets=widgets, resolution=constants.Resolution.CITY, session=session)
+        assert interest == await interest_by_region('nft', start_dt, end_dt, geo='US', session=session)
+
+    assert list(interest) == list(cities) == ['US-CA', 'US-NY', 'US-TX', 'US-FL', 'US-WA']
+    # One explore for both widget calls, and one for the call without widgets
+    assert fake.count('/trends/api/explore') == 2
+    assert fake.count('/trends/api/widgetdata/comparedgeo') == 3
+
+
+@pytest.mark.asyncio
+async def test_hourly_data_geos():
+    fake = FakeTrends()
+    tz = timezone.utc
+    geos = ['US-CA', 'US-NY', 'US-TX']
+    start_dt, end_dt = datetime(2021, 1, 1), datetime(2021, 1, 10)
+
+    async with fake.session() as session:
+        matrix = await hourly_data_geos('nft', geos, start_dt, end_dt, tz, session=session)
+        assert fake.count('/trends/api/explore') == 6  # 2 windows per geo
+        comparable = await hourly_data_geos('nft', geos, start_dt, end_dt, tz, comparable=True, session=session)
+
+        # 2 windows per geo, and the regions of US
+        assert fake.count('/trends/api/explore') == 6 + 6 + 1
+        assert fake.count('/trends/api/widgetdata/comparedgeo') == 1
+
+        fake.requests.clear()
+        widgets = await explore('nft', start_dt, end_dt, tz, geo='US', session=session)
+        reused = await hourly_data_geos(
+            'nft', geos, start_dt, end_dt, tz, comparable=True, widgets=widgets, session=session,
+        )
+        assert reused.values == comparable.values
+        assert fake.count('/trends/api/explore') == 1 + 6
+
+        with pytest.raises(ValueError):
+            await hourly_data_geos('nft', ['US-CA', 'GB'], start_dt, end_dt, tz, comparable=True, session=session)
+
+    assert matrix.labels == geos
+    assert len(matrix.timestamps) == 9 * 24
+    for geo in geos:
+        series = matrix[geo]
+        truth = [default_series(f'nft@{geo}', t) for t in series.timestamps]
+        assert series.max() == 100
+        assert all(abs(v - e / max(truth) * 100) < 1.5 for v, e in zip(series.values, truth))
+
+    # Means of comparable rows are proportional to the search volume of their geo
+    means = {geo: sum(comparable[geo].values) / len(comparable[geo]) for geo in geos}
+    truth = {geo: sum(default_series(f'nft@{geo}', t) for t in matrix.timestamps) for geo in geos}
+    for geo in geos:
+        assert abs(means[geo] / means['US-CA'] - truth[geo] / truth['US-CA']) < 0.02
+
+
+@pytest.mark.asyncio
+async def test_hourly_data_pack():
+    fake = FakeTrends()
+    tz = timezone(timedelta(hours=2))
+    start_dt, end_dt = datetime(2021, 1, 1), datetime(2021, 12, 31)
+
+    async with fake.session() as session:
+        unpacked = await hourly_data('nft', start_dt, end_dt, tz, session=session)
+        assert fake.count('/trends/api/explore') == 53
+
+        fake.requests.clear()
+        packed = await hourly_data('nft', start_dt, end_dt, tz, pack=5, max_concurrency=2, session=session)
+        assert fake.count('/trends/api/explore') == fake.count('/trends/api/widgetdata/multiline') == 11
+
+    assert [t for t, _ in packed] == [t for t, _ in unpacked]
+    truth = [default_series('nft', t) for t, _ in packed]
+    assert all(abs(v - e / max(truth) * 100) < 2 for (_, v), e in zip(packed, truth))
+
+
+@pytest.mark.asyncio
+async def test_hourly_data_pack_cache():
+    fake = FakeTrends()
+    tz = timezone.utc
+
+    async with fake.session(cache=MemoryCache()) as session:
+        await hourly_data('nft', datetime(2021, 1, 1), datetime(2021, 1, 14), tz, session=session)
+        fake.requests.clear()
+        # 2 of the 4 windows are cached, the other 2 are packed in one request
+        await hourly_data('nft', datetime(2021, 1, 1), datetime(2021, 1, 27), tz, pack=5, session=session)
+
+    assert fake.count('/trends/api/explore') == 1
+    req = ast.literal_eval(fake.requests[-1].url.params['req'])
+    assert len(req['comparisonItem']) == 2
+
+
+@pytest.mark.asyncio
+async def test_related_queries_and_topics():
+    fake = FakeTrends()
+    args = ('nft', datetime(2021, 1, 1), datetime(2021, 3, 1))
+
+    async with fake.session() as session:
+        queries = await related_queries(*args, session=session)
+        topics = await related_topics(*args, session=session)
+
+    assert queries == {
+        'top': [('nft price', 100), ('nft news', 60), ('nft chart', 35)],
+        'rising': [('nft etf', 5000), ('nft crash', 250)],
+    }
+    assert [t['title'] for t in topics['top']] == ['nft price', 'nft news', 'nft chart']
+    assert set(topics['rising'][0]) == {'mid', 'title', 'type', 'value'}
+
+
+@pytest.mark.asyncio
+async def test_keyword_report():
+    fake = FakeTrends(rate_limit_every=2)
+    start_dt, end_dt = datetime(2021, 1, 1), datetime(2021, 1, 3)
+
+    async with fake.session() as session:
+        await keyword_report('btc', start_dt, end_dt, session=session)  # The first explore request succeeds
+        report = await keyword_report('nft', start_dt, end_dt, geo='US', session=session)
+
+    # One explore request per report, plus the rate limited one, and one request per widget
+    assert fake.count('/trends/api/explore') == 3
+    assert fake.count('/trends/api/widgetdata/multiline') == fake.count('/trends/api/widgetdata/comparedgeo') == 2
+    assert fake.count('/trends/api/widgetdata/relatedsearches') == 4
+
+    assert len(report['interest_over_time']) == 48
+    assert list(report['interest_by_region']) == ['US-CA', 'US-NY', 'US-TX', 'US-FL', 'US-WA']
+    assert report['related_queries']['top'][0] == ('nft price', 100)
+    assert report['related_topics']['rising'][0]['title'] == 'nft etf'
@@ -0,0 +1,69 @@
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from google_trends_api import hourly_data
+from google_trends_api.cache import MemoryCache
+from google_trends_api.hooks import StatsHooks, PrometheusHooks, OpenTelemetryHooks
+from google_trends_api.testing import FakeTrends
+
+START_DT = datetime(2021, 1, 1)
+END_DT = START_DT + timedelta(days=13)
+
+
+@pytest.mark.asyncio
+async def test_stats_hooks():
+    fake = FakeTrends(rate_limit_every=2)
+    stats = StatsHooks()
+
+    async with fake.session(cache=MemoryCache(), hooks=[stats]) as session:
+        await hourly_data('nft', START_DT, END_DT, timezone.utc, session=session)
+        await hourly_data('nft', START_DT, END_DT, timezone.utc, session=session)
+
+    summary = stats.summary()
+    assert summary['requests'] == len(fake.requests)
+    assert summary['rate_limited'] == 1
+    assert summary['retries'] == 1
+    assert summary['cache_misses'] == 3  # The rate limited window is looked up again
+    assert summary['cache_hits'] == 2
+    assert summary['bytes'] > 0
+    assert stats.requests['multiline', 200] == 2
+    assert stats.parse_seconds['multiline'] > 0
+
+
+@pytest.mark.asyncio
+async def test_prometheus_hooks():
+    prom = pytest.importorskip('prometheus_client')
+    registry = prom.CollectorRegistry()
+    fake = FakeTrends()
+
+    async with fake.session(hooks=[PrometheusHooks(registry)]) as session:
+        await hourly_data('nft', START_DT, END_DT, timezone.utc, session=session)
+
+    assert registry.get_sample_value(
+        'google_trends_requests_total', {'endpoint': 'explore', 'status': '200'},
+    ) == 2
+    assert registry.get_sample_value('google_trends_request_seconds_count', {'endpoint': 'multiline'}) == 2
+
+
+@pytest.mark.asyncio
+async def test_open_telemetry_hooks():
+    pytest.importorskip('opentelemetry.sdk')
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+    reader = InMemoryMetricReader()
+    meter = MeterProvider(metric_readers=[reader]).get_meter('test')
+    fake = FakeTrends()
+
+    async with fake.session(hooks=[OpenTelemetryHooks(meter)]) as session:
+        await hourly_data('nft', START_DT, END_DT, timezone.utc, session=session)
+
+    metrics = {
+        metric.name: metric
+        for resource_metrics in reader.get_metrics_data().resource_metrics
+        for scope_metrics in resource_metrics.scope_metrics
+        for metric in scope_metrics.metrics
+    }
+    requests = sum(point.value for point in metrics['google_trends.requests'].data.data_points)
+    assert requests == len(fake.requests)
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from google_trends_api import parsing
+from google_trends_api.parsing import Timeline
+
+MULTILINE = ")]}'\n" + json.dumps({'default': {'timelineData': [
+    {'time': '1609459200', 'formattedTime': 'Jan 1', 'value': [10, 20], 'hasData': [True, True]},
+    {'time': '1609462800', 'formattedTime': 'Jan 1', 'value': [0, 30], 'hasData': [False, True]},
+    {'time': '1609466400', 'formattedTime': 'Jan 1', 'value': [100, 5], 'hasData': [True, True]},
+]}})
+
+
+@pytest.fixture(params=['default', 'orjson', 'json'])
+def decoder(request, monkeypatch):
+    """
+    Parse with every decoder available.
+    """
+    if request.param != 'default':
+        monkeypatch.setattr(parsing, 'msgspec', None)
+    if request.param == 'json':
+        monkeypatch.setattr(parsing, 'orjson', None)
+    elif request.param == 'orjson' and parsing.orjson is None:
+        pytest.skip('orjson is not installed')
+    return request.param
+
+
+def test_strip_xssi():
+    assert bytes(parsing.strip_xssi(b")]}',\n{\"a\": 1}")) == b'{"a": 1}'
+    assert bytes(parsing.strip_xssi(b")]}'\n[]")) == b'[]'
+    assert bytes(parsing.strip_xssi(b'{}')) == b'{}'
+
+
+def test_loads(decoder):
+    assert parsing.loads(b")]}',\n{\"widgets\": [1, 2]}") == {'widgets': [1, 2]}
+
+
+def test_parse_timeline(decoder):
+    timeline = parsing.parse_timeline(MULTILINE.encode())
+
+    assert timeline.width == 2
+    assert list(timeline.rows()) == [(1609459200, [10.0, 20.0]), (1609466400, [100.0, 5.0])]
+    assert list(timeline.rows(end_ts=1609466400)) == [(1609459200, [10.0, 20.0])]
+
+    restored = Timeline.from_json(json.loads(json.dumps(timeline.to_json())))
+    assert list(restored.rows()) == list(timeline.rows())
+
+
+def test_parse_windows(decoder):
+    # Two ranges of one keyword, the second one ending earlier
+    content = ")]}'\n" + json.dumps({'default': {'timelineData': [
+        {'time': '1609459200', 'value': [10, 20], 'hasData': [True, True]},
+        {'time': '1609462800', 'value': [100, 0], 'hasData': [True, False]},
+    ]}})
+    first, second = parsing.parse_windows(content.encode(), [1609459200, 1610000000], 3600)
+
+    assert list(first.rows()) == [(1609459200, [10.0]), (1609462800, [100.0])]
+    assert list(second.rows()) == [(1610000000, [20.0])]
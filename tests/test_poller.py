@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+import pytest
+
+from google_trends_api import constants
+from google_trends_api.poller import Poller
+from google_trends_api.testing import FakeTrends, default_series
+
+NOW = 1_640_995_200  # 2022-01-01
+
+
+class Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_poll_rescales_onto_previous_poll():
+    clock = Clock(NOW)
+    fake = FakeTrends(clock=clock)
+
+    async with fake.session() as session:
+        poller = Poller(['nft'], session=session)
+        first = await poller.poll('nft')
+        clock.now += 10 * 60
+        second = await poller.poll('nft')
+
+    assert first.continuous and second.continuous
+    assert len(first.points) == 60
+    assert first.points[-1][0] == NOW - 60
+    # Points of the second poll after the first one, the others only if they changed by rounding
+    assert [t for t, _ in second.points if t > first.points[-1][0]] == [NOW + i * 60 for i in range(10)]
+
+    # Both polls are on the scale of the first one
+    scale = max(default_series('nft', t) for t, _ in first.points) / 100
+    for t, value in first.points + second.points:
+        assert abs(value * scale - default_series('nft', t)) < default_series('nft', t) * 0.02
+
+
+@pytest.mark.asyncio
+async def test_poll_without_overlap_starts_new_scale():
+    clock = Clock(NOW)
+    fake = FakeTrends(clock=clock)
+
+    async with fake.session() as session:
+        poller = Poller(['nft'], time_range=constants.TimeRange.PAST_1H, session=session)
+        await poller.poll('nft')
+        clock.now += 2 * 3600
+        update = await poller.poll('nft')
+
+    assert not update.continuous
+    assert update.ratio == 1.0
+    assert len(update.points) == 60
+
+
+def test_polls_overlapping_on_zero():
+    poller = Poller(['nft'])
+    state = poller._states['nft']
+    poller._update('nft', state, [(0, [50]), (60, [0])])
+    update = poller._update('nft', state, [(60, [7]), (120, [100])])
+
+    # The zero overlap gives no scale, the previous one is kept
+    assert update.continuous and update.ratio == 1.0
+    assert update.points == [(60, 7.0), (120, 100.0)]
+
+    update = poller._update('nft', state, [(120, [50]), (180, [60])])
+    assert update.ratio == pytest.approx(2.0)
+    assert update.points == [(180, pytest.approx(120.0))]
+
+
+def test_refresh_interval():
+    poller = Poller([f'k{i}' for i in range(100)], interval=60, budget=120)
+    assert poller.spacing == 1
+    assert poller.refresh_interval == 100
+    assert poller._time_range() == constants.TimeRange.PAST_1H
+
+    poller = Poller([f'k{i}' for i in range(2000)], interval=60, budget=120)
+    assert poller._time_range() == constants.TimeRange.PAST_4H
+
+
+@pytest.mark.asyncio
+async def test_poller_iterates_within_budget():
+    fake = FakeTrends(clock=Clock(NOW))
+
+    async with fake.session() as session:
+        # 6000 requests per minute: a poll every 20ms
+        poller = Poller(['nft', 'eth'], interval=0, budget=6000, session=session)
+        updates = []
+        started = time.monotonic()
+        async for update in poller:
+            updates.append(update)
+            if len(updates) == 4:
+                poller.watch('doge')
+            if len(updates) == 9:
+                break
+
+    assert [u.keyword for u in updates[:2]] == ['nft', 'eth']
+    assert {u.keyword for u in updates[4:]} == {'nft', 'eth', 'doge'}
+    # Polls are spaced by the budget
+    assert time.monotonic() - started >= 8 * 0.02
+
+
+@pytest.mark.asyncio
+async def test_poller_callback():
+    fake = FakeTrends(clock=Clock(NOW))
+    updates = []
+
+    async def on_update(update):
+        updates.append(update)
+        if len(updates) == 3:
+            poller.stop()
+
+    async with fake.session() as session:
+        poller = Poller(['nft'], interval=0, budget=6000, on_update=on_update, session=session)
+        await asyncio.wait_for(poller.run(), 5)
+
+    assert len(updates) == 3
+    assert len(updates[0].points) == 60
+    assert updates[1].points == updates[2].points == []  # Nothing new while the clock stands still
@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from google_trends_api import hourly_data
+from google_trends_api.proxies import ProxyPool
+from google_trends_api.ratelimit import RateLimiter
+from google_trends_api.testing import FakeTrends
+
+
+def _fast_limiter():
+    return RateLimiter(rate=10_000, burst=10_000, max_rate=10_000)
+
+
+def test_round_robin_skips_cooling_down_proxies():
+    pool = ProxyPool(['http://a', 'http://b', 'http://c'], cooldown=60)
+    assert [pool.acquire().url for _ in range(4)] == ['http://a', 'http://b', 'http://c', 'http://a']
+
+    b = pool.proxies[1]
+    pool.on_rate_limit(b, retry_after=120)
+    assert b.score == pytest.approx(0.9)
+    assert [pool.acquire().url for _ in range(3)] == ['http://c', 'http://a', 'http://c']
+
+    for proxy in pool.proxies:
+        pool.on_error(proxy)
+    # Every proxy cools down, the one available first is used
+    assert pool.acquire().url != 'http://b'
+
+
+def test_weighted_prefers_healthy_proxies():
+    pool = ProxyPool(['http://a', 'http://b'], strategy=ProxyPool.WEIGHTED, cooldown=0)
+    for _ in range(30):
+        pool.on_rate_limit(pool.proxies[0])
+    urls = [pool.acquire().url for _ in range(200)]
+    assert urls.count('http://b') > 150
+
+
+@pytest.mark.asyncio
+async def test_hourly_data_spreads_requests_over_proxies():
+    fake = FakeTrends(rate_limited=1)
+    pool = ProxyPool(['http://a', 'http://b'], rate_limiter_factory=_fast_limiter)
+    async with fake.session(proxy_pool=pool) as session:
+        lst = await hourly_data('nft', datetime(2021, 1, 1), datetime(2021, 1, 20), timezone.utc, session=session)
+
+    assert len(lst) > 0
+    a, b = pool.proxies
+    assert a.rate_limited == 1 and b.rate_limited == 0
+    assert a.requests + b.requests == len(fake.requests)
+    assert b.requests > a.requests
+    # a cools down after its first explore request got rate limited, b serves everything else
+    assert a.requests == 2
+    assert fake.count('/') == 2
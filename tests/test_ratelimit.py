@@ -0,0 +1,51 @@
+from datetime import datetime, timezone, timedelta
+from email.utils import format_datetime
+
+import pytest
+
+from google_trends_api import hourly_data
+from google_trends_api.ratelimit import RateLimiter, parse_retry_after
+from google_trends_api.testing import FakeTrends
+
+
+def test_token_bucket():
+    limiter = RateLimiter(rate=10, burst=2)
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == pytest.approx(0.1, abs=0.01)
+
+
+def test_aimd():
+    limiter = RateLimiter(rate=2, burst=1, min_rate=0.5, max_rate=2.5, increase=1, decrease=0.5)
+    limiter.on_success()
+    assert limiter.rate == 2.5
+
+    limiter.on_rate_limit(retry_after=3)
+    assert limiter.rate == 1.25
+    assert limiter.reserve() == pytest.approx(3 + 1 / 1.25, abs=0.01)
+
+    limiter.on_rate_limit()
+    limiter.on_rate_limit()
+    assert limiter.rate == 0.5
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('12') == 12
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    later = datetime.now(tz=timezone.utc) + timedelta(seconds=60)
+    assert parse_retry_after(format_datetime(later, usegmt=True)) == pytest.approx(60, abs=2)
+
+
+@pytest.mark.asyncio
+async def test_hourly_data_retries_after_rate_limit():
+    fake = FakeTrends(rate_limited=2)
+    limiter = RateLimiter(rate=1000, burst=1000, max_rate=1000)
+    async with fake.session(rate_limiter=limiter) as session:
+        lst = await hourly_data(
+            'nft', datetime(2021, 1, 1), datetime(2021, 1, 3), timezone.utc, session=session,
+        )
+
+    assert len(lst) == 48
+    assert fake.count('/trends/api/explore') == 3
+    assert limiter.rate < 1000
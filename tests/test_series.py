@@ -0,0 +1,80 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from google_trends_api import hourly_data
+from google_trends_api.series import TrendSeries, TrendMatrix, anchor
+from google_trends_api.testing import FakeTrends
+
+
+def test_trend_series():
+    series = TrendSeries.from_items([(0, 10), (3600, 50), (7200, 20)])
+    assert len(series) == 3
+    assert series[1] == (3600, 50)
+    assert series[1:].to_list() == [(3600, 50), (7200, 20)]
+
+    series.extend([(10800, 10)], ratio=2)
+    series.normalize()
+    assert series.to_list() == [(0, 20), (3600, 100), (7200, 40), (10800, 40)]
+
+    series.truncate(7200)
+    assert series.to_list() == [(0, 20), (3600, 100)]
+    assert series.timestamps.itemsize == series.values.itemsize == 8
+
+
+def test_to_numpy():
+    np = pytest.importorskip('numpy')
+    series = TrendSeries([0, 3600], [1.0, 2.0])
+    timestamps, values = series.to_numpy()
+    assert timestamps.dtype == np.int64
+    assert values.tolist() == [1.0, 2.0]
+
+
+@pytest.mark.asyncio
+async def test_hourly_data_as_series():
+    fake = FakeTrends()
+    async with fake.session() as session:
+        args = ('nft', datetime(2021, 1, 1), datetime(2021, 1, 20), timezone.utc)
+        lst = await hourly_data(*args, session=session)
+        series = await hourly_data(*args, as_series=True, session=session)
+
+    assert isinstance(series, TrendSeries)
+    assert series.to_list() == lst
+
+
+def test_anchor():
+    day = 86400
+    fine = TrendSeries.from_items([
+        (-3600, 9),  # Before the first interval, takes its factor
+        (0, 1), (43200, 3),
+        (day, 4), (day + 43200, 4),
+        (2 * day, 5),  # Partially covered interval, takes the factor of the previous one
+    ])
+    coarse = TrendSeries([0, day, 2 * day], [4, 2, 100])
+
+    assert anchor(fine, coarse).to_list() == [
+        (-3600, 18), (0, 2), (43200, 6), (day, 2), (day + 43200, 2), (2 * day, 2.5),
+    ]
+
+
+def test_trend_matrix():
+    matrix = TrendMatrix.from_series({
+        'US': TrendSeries([0, 3600], [10, 20]),
+        'GB': TrendSeries([3600, 7200], [30, 40]),
+    })
+    assert matrix.labels == ['US', 'GB']
+    assert list(matrix.timestamps) == [0, 3600, 7200]
+    assert matrix['US'].to_list() == [(0, 10), (3600, 20)]
+    assert matrix['GB'].to_list() == [(3600, 30), (7200, 40)]
+
+    with pytest.raises(ValueError):
+        TrendMatrix(['US'], [0, 3600], [1.0])
+
+
+def test_trend_matrix_to_numpy():
+    np = pytest.importorskip('numpy')
+    matrix = TrendMatrix(['US', 'GB'], [0, 3600], [1, 2, 3, np.nan])
+    timestamps, values = matrix.to_numpy()
+    assert timestamps.tolist() == [0, 3600]
+    assert values.shape == (2, 2)
+    assert values[1, 0] == 3 and np.isnan(values[1, 1])
@@ -0,0 +1,36 @@
+import json
+
+import httpx
+import pytest
+
+from google_trends_api import _api, constants
+from google_trends_api.session import TrendsSession, session_scope
+
+
+def _handler(request: httpx.Request):
+    if request.url.path == '/trends/api/explore':
+        assert request.headers['Cookie'] == 'NID=abc'
+        body = {'widgets': [{'id': constants.WidgetId.TIME_SERIES, 'token': 't', 'request': {}}]}
+        return httpx.Response(200, text=")]}'\n" + json.dumps(body))
+    return httpx.Response(200, headers={'Set-Cookie': 'NID=abc; Path=/'})
+
+
+@pytest.mark.asyncio
+async def test_session_is_reused():
+    async with TrendsSession(transport=httpx.MockTransport(_handler)) as session:
+        cookies = await _api.get_cookies(session=session)
+        assert cookies == {'NID': 'abc'}
+
+        widgets = await _api.get_widgets(
+            'nft',
+            timezone_offset=0,
+            cookies=cookies,
+            time_range=constants.TimeRange.PAST_1D,
+            session=session,
+        )
+        assert widgets[0]['token'] == 't'
+
+        async with session_scope(session) as scoped:
+            assert scoped is session
+        assert not session.client.is_closed
+    assert session.client.is_closed
@@ -0,0 +1,99 @@
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from google_trends_api.backfill import Backfill, BackfillJob, CheckpointStore
+from google_trends_api.session import TrendsSession
+from google_trends_api.sharding import MemoryBackend, SQLiteBackend, RedisBackend, SharedRateLimiter, \
+    SharedCookiePool, shard, run_sharded, _split
+from google_trends_api.testing import FakeTrends, FakeRedis
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'redis'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryBackend()
+    if request.param == 'sqlite':
+        return SQLiteBackend(str(tmp_path / 'state.db'))
+    return RedisBackend(FakeRedis())
+
+
+def test_shared_rate_limiter(backend):
+    first = SharedRateLimiter(backend, rate=1, burst=2)
+    second = SharedRateLimiter(backend, rate=1, burst=2)
+
+    assert first.reserve() == 0
+    assert second.reserve() == 0
+    assert first.reserve() > 0  # The burst is shared
+
+    second.on_rate_limit(retry_after=10)
+    first.reserve()
+    assert first.rate == 0.5
+    assert first.reserve() > 10
+
+
+@pytest.mark.asyncio
+async def test_shared_cookie_pool(backend):
+    fetched = []
+
+    async def fetch():
+        fetched.append(1)
+        return {'NID': str(len(fetched))}
+
+    first, second = SharedCookiePool(backend), SharedCookiePool(backend)
+    assert await first.get(fetch) == {'NID': '1'}
+    assert await second.get(fetch) == {'NID': '1'}
+    assert len(fetched) == 1
+
+    second.discard({'NID': '1'})
+    assert await first.get(fetch) == {'NID': '2'}
+
+
+def test_shard():
+    jobs = [BackfillJob(f'keyword{i}', datetime(2021, 1, 1), datetime(2021, 2, 1)) for i in range(20)]
+    shards = [shard(jobs, i, 3) for i in range(3)]
+
+    assert sorted(job.keyword for s in shards for job in s) == sorted(job.keyword for job in jobs)
+    assert all(shards)
+
+
+def test_shard_split_across_processes():
+    jobs = [BackfillJob(f'keyword{i}', datetime(2021, 1, 1), datetime(2021, 2, 1)) for i in range(200)]
+    host_jobs = shard(jobs, 0, 4)
+
+    for processes in (2, 4):
+        splits = _split(host_jobs, processes)
+        assert all(splits)
+        assert sorted(job.id for s in splits for job in s) == sorted(job.id for job in host_jobs)
+
+
+def _fake_session(backend) -> TrendsSession:
+    return TrendsSession(
+        transport=FakeTrends().transport(),
+        rate_limiter=SharedRateLimiter(backend, rate=1000, burst=1000, max_rate=1000),
+        cookie_pool=SharedCookiePool(backend),
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_sharded(tmp_path):
+    jobs = [
+        BackfillJob(keyword, datetime(2021, 1, 1), datetime(2021, 1, 20), tz=timezone(timedelta(hours=8)))
+        for keyword in ['nft', 'eth', 'doge', 'sol']
+    ]
+    store_path = str(tmp_path / 'backfill.db')
+    backend = SQLiteBackend(str(tmp_path / 'state.db'))
+
+    stats = run_sharded(jobs, store_path, backend, processes=2, session_factory=_fake_session)
+    assert stats == {'windows': 12, 'saved': 0, 'fetched': 12, 'failed': 0}
+    assert len(backend.get('cookies:None')) == 1
+
+    reference_store = CheckpointStore(str(tmp_path / 'reference.db'))
+    async with FakeTrends().session() as session:
+        await Backfill(reference_store, session=session).run(jobs)
+
+    store = CheckpointStore(store_path)
+    for job in jobs:
+        assert Backfill(store).series(job) == Backfill(reference_store).series(job)
+    store.close()
+    reference_store.close()
@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from google_trends_api import hourly_data
+from google_trends_api.singleflight import SingleFlight
+from google_trends_api.testing import FakeTrends
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_are_shared():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    results = await asyncio.gather(*(single_flight.do('key', fetch) for _ in range(5)))
+    assert results == [1] * 5
+    assert single_flight.shared == 4
+    assert len(single_flight) == 0
+
+    # Calls after the first one completed run again
+    assert await single_flight.do('key', fetch) == 2
+
+
+@pytest.mark.asyncio
+async def test_exceptions_are_shared():
+    single_flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError('boom')
+
+    results = await asyncio.gather(*(single_flight.do('key', fail) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_others():
+    single_flight = SingleFlight()
+    started = asyncio.Event()
+
+    async def fetch():
+        started.set()
+        await asyncio.sleep(0.02)
+        return 'data'
+
+    first = asyncio.ensure_future(single_flight.do('key', fetch))
+    second = asyncio.ensure_future(single_flight.do('key', fetch))
+    await started.wait()
+    first.cancel()
+
+    assert await second == 'data'
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+@pytest.mark.asyncio
+async def test_concurrent_hourly_data_share_windows():
+    fake = FakeTrends()
+    tz = timezone.utc
+    start_dt, end_dt = datetime(2021, 1, 1), datetime(2021, 1, 20)
+
+    async with fake.session() as session:
+        results = await asyncio.gather(*(hourly_data('nft', start_dt, end_dt, tz, session=session) for _ in range(4)))
+
+    assert all(result == results[0] for result in results)
+    assert fake.count('/trends/api/explore') == 3
+    assert fake.count('/trends/api/widgetdata/multiline') == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_packed_hourly_data_share_windows():
+    fake = FakeTrends()
+    tz = timezone.utc
+    start_dt, end_dt = datetime(2021, 1, 1), datetime(2021, 2, 1)
+
+    async with fake.session() as session:
+        results = await asyncio.gather(*(
+            hourly_data('nft', start_dt, end_dt, tz, pack=5, session=session) for _ in range(4)
+        ))
+
+    assert all(result == results[0] for result in results)
+    assert fake.count('/trends/api/explore') == 1
+    assert fake.count('/trends/api/widgetdata/multiline') == 1
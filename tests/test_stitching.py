@@ -0,0 +1,79 @@
+import math
+from datetime import datetime, timezone
+
+import pytest
+
+from google_trends_api import hourly_data
+from google_trends_api.stitching import Stitcher
+from google_trends_api.testing import FakeTrends
+
+
+def night_series(keyword: str, timestamp: int) -> float:
+    """
+    Search volume dropping to zero every night, so that single overlapped hours are often 0.
+    """
+    return max(0.0, 1000 * math.sin(timestamp / 3600 / 24 * 2 * math.pi)) + timestamp / 3600 % 5
+
+
+def test_fit_single_point_is_plain_ratio():
+    stitcher = Stitcher()
+    first = stitcher.fit([], 1.0, [(0, [10]), (1, [40])])
+    scale = stitcher.fit([(0, [10]), (1, [40])], 2.0, [(1, [80]), (2, [100])])
+
+    assert first.ratio == 1 and first.points == 0
+    assert scale.ratio == pytest.approx(2.0 * 40 / 80)
+    assert scale.points == 1
+    assert stitcher.reports == [first, scale]
+
+
+def test_fit_skips_zeros():
+    stitcher = Stitcher(overlap=3)
+    previous = [(0, [5]), (1, [0]), (2, [40]), (3, [60])]
+
+    scale = stitcher.fit(previous, 1.0, [(1, [3]), (2, [20]), (3, [30]), (4, [50])])
+    assert scale.ratio == pytest.approx(2.0)
+    assert scale.points == 2
+    assert 0 < scale.stderr < 0.1
+
+    guess = stitcher.fit([(0, [0])], 1.0, [(0, [0]), (1, [10])])
+    assert guess.ratio == 1.0
+    assert guess.points == 0 and guess.stderr == math.inf
+
+    with pytest.raises(ValueError):
+        stitcher.fit(previous, 1.0, [(10, [1])])
+
+
+def test_fit_zero_overlap_keeps_previous_ratio():
+    stitcher = Stitcher()
+
+    # Only the previous window is zero on the overlap, a ratio of 0 would collapse every later window
+    scale = stitcher.fit([(0, [50]), (1, [0])], 2.0, [(1, [7]), (2, [100])])
+    assert scale.ratio == 2.0
+    assert scale.points == 0 and scale.stderr == math.inf
+
+    # Only the current window is zero, a ratio of inf
+    scale = stitcher.fit([(0, [50]), (1, [3])], 2.0, [(1, [0]), (2, [100])])
+    assert scale.ratio == 2.0
+
+
+@pytest.mark.asyncio
+async def test_hourly_data_wide_overlap():
+    fake = FakeTrends(night_series)
+    tz = timezone.utc
+    start_dt, end_dt = datetime(2021, 1, 1), datetime(2021, 2, 1)
+
+    async with fake.session() as session:
+        stitcher = Stitcher(overlap=24)
+        sequential = await hourly_data('nft', start_dt, end_dt, tz, stitcher=stitcher, session=session)
+        concurrent = await hourly_data(
+            'nft', start_dt, end_dt, tz, max_concurrency=4, stitcher=Stitcher(overlap=24), session=session,
+        )
+
+    assert concurrent == sequential
+    assert [t for t, _ in sequential] == list(range(sequential[0][0], sequential[-1][0] + 1, 3600))
+    assert all(scale.points > 0 for scale in stitcher.reports[1:])
+
+    truth = [night_series('nft', t) for t, _ in sequential]
+    max_truth = max(truth)
+    for (_, value), expected in zip(sequential, truth):
+        assert abs(value - expected / max_truth * 100) < 1.5
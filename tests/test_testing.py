@@ -0,0 +1,24 @@
+import time
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from google_trends_api import hourly_data
+from google_trends_api.testing import FakeTrends
+
+
+@pytest.mark.asyncio
+async def test_latency_and_rate_limit_injection():
+    fake = FakeTrends(latency=0.01, rate_limit_every=2)
+    start_dt = datetime(2021, 1, 1)
+
+    async with fake.session() as session:
+        started = time.monotonic()
+        items = await hourly_data('nft', start_dt, start_dt + timedelta(days=13), timezone.utc, session=session)
+        elapsed = time.monotonic() - started
+
+    assert len(items) == 13 * 24
+    # The second explore request is rate limited and retried
+    assert fake.count('/trends/api/explore') == 3
+    assert fake.count('/trends/api/widgetdata/multiline') == 2
+    assert elapsed >= 0.01 * len(fake.requests)
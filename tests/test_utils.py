@@ -21,6 +21,45 @@ def test_datetime_range():
     ]
 
 
+def test_plan_windows():
+    windows = utils.plan_windows(
+        datetime(2020, 1, 1),
+        datetime(2020, 1, 15),
+        timedelta(days=7),
+        overlap=timedelta(hours=1),
+    )
+    assert windows == [
+        datetime(2020, 1, 1),
+        datetime(2020, 1, 7, 23),
+        datetime(2020, 1, 14, 22),
+    ]
+
+    windows = utils.plan_windows(datetime(2020, 1, 1), datetime(2020, 1, 2), timedelta(days=7), timedelta(hours=1))
+    assert windows == [datetime(2020, 1, 1)]
+
+    # The first window covers the range exactly, its last point is the last hour of the range
+    windows = utils.plan_windows(datetime(2020, 1, 1), datetime(2020, 1, 8), timedelta(days=7), timedelta(hours=1))
+    assert windows == [datetime(2020, 1, 1)]
+
+    # One more hour takes a second window
+    windows = utils.plan_windows(datetime(2020, 1, 1), datetime(2020, 1, 8, 1), timedelta(days=7), timedelta(hours=1))
+    assert windows == [datetime(2020, 1, 1), datetime(2020, 1, 7, 23)]
+
+
+def test_merge_ranges():
+    merged, owners = utils.merge_ranges([
+        (datetime(2020, 1, 10), datetime(2020, 1, 20)),
+        (datetime(2020, 1, 1), datetime(2020, 1, 5)),
+        (datetime(2020, 1, 15), datetime(2020, 1, 25)),
+        (datetime(2020, 1, 5), datetime(2020, 1, 6)),
+    ])
+    assert merged == [
+        (datetime(2020, 1, 1), datetime(2020, 1, 6)),
+        (datetime(2020, 1, 10), datetime(2020, 1, 25)),
+    ]
+    assert owners == [1, 0, 1, 0]
+
+
 def test_find_index():
     lst = [1, 2, 3, 4, 5]
     assert utils.find_index(lst, lambda x: x >= 3) == 2